@@ -18,7 +18,14 @@ CREATE TABLE IF NOT EXISTS users (
   cgpa DECIMAL(3,2),
   reservation_category VARCHAR(50),
   is_lateral_entry BOOLEAN DEFAULT FALSE,
-  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+  -- Alumni mentoring: open (pending + accepted) requests allowed and held
+  mentor_capacity TINYINT UNSIGNED NOT NULL DEFAULT 3,
+  mentor_open_requests SMALLINT UNSIGNED NOT NULL DEFAULT 0,
+  mentor_free_slots SMALLINT AS (CAST(mentor_capacity AS SIGNED) - CAST(mentor_open_requests AS SIGNED)) STORED,
+  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  KEY idx_users_updated_at (updated_at),
+  KEY idx_users_mentor_free_slots (role, mentor_free_slots)
 );
 
 -- Job/Internship postings
@@ -34,6 +41,8 @@ CREATE TABLE IF NOT EXISTS opportunities (
   posted_by INT,
   is_active BOOLEAN DEFAULT TRUE,
   created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  KEY idx_opportunities_updated_at (updated_at),
   FOREIGN KEY (posted_by) REFERENCES users(id) ON DELETE SET NULL
 );
 
@@ -56,6 +65,8 @@ CREATE TABLE IF NOT EXISTS scholarships (
   is_active BOOLEAN DEFAULT TRUE,
   created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
   updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  KEY idx_scholarships_active_deadline (is_active, deadline),
+  KEY idx_scholarships_updated_at (updated_at),
   FOREIGN KEY (posted_by) REFERENCES users(id) ON DELETE SET NULL
 );
 
@@ -68,6 +79,11 @@ CREATE TABLE IF NOT EXISTS mentorship_requests (
   message TEXT,
   status ENUM('pending','accepted','rejected','completed') DEFAULT 'pending',
   created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  KEY idx_mentorship_requests_updated_at (updated_at),
+  KEY idx_mentorship_requests_created_at (created_at),
+  KEY idx_mentorship_mentor_id_status (mentor_id, status),
+  KEY idx_mentorship_student_id_status (student_id, status),
   FOREIGN KEY (student_id) REFERENCES users(id) ON DELETE CASCADE,
   FOREIGN KEY (mentor_id) REFERENCES users(id) ON DELETE CASCADE
 );
@@ -84,7 +100,16 @@ CREATE TABLE IF NOT EXISTS applications (
   resume_url VARCHAR(500),
   -- Scholarship application specific fields
   document_urls TEXT, -- JSON array of uploaded document URLs
+  idempotency_key VARCHAR(255), -- Idempotency-Key header of the request that created it
+  match_score TINYINT UNSIGNED NOT NULL DEFAULT 0, -- 0-100 rank in the poster's review queue
   created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  KEY idx_applications_updated_at (updated_at),
+  KEY idx_applications_created_at (created_at),
+  UNIQUE KEY uq_applications_opportunity (applicant_id, opportunity_id),
+  UNIQUE KEY uq_applications_scholarship (applicant_id, scholarship_id),
+  KEY idx_applications_opportunity_review (opportunity_id, status, match_score),
+  KEY idx_applications_scholarship_review (scholarship_id, status, match_score),
   FOREIGN KEY (applicant_id) REFERENCES users(id) ON DELETE CASCADE,
   FOREIGN KEY (opportunity_id) REFERENCES opportunities(id) ON DELETE CASCADE,
   FOREIGN KEY (scholarship_id) REFERENCES scholarships(id) ON DELETE CASCADE
@@ -99,6 +124,8 @@ CREATE TABLE IF NOT EXISTS messages (
   content TEXT NOT NULL,
   is_read BOOLEAN DEFAULT FALSE,
   created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  KEY idx_messages_updated_at (updated_at),
   FOREIGN KEY (sender_id) REFERENCES users(id) ON DELETE CASCADE,
   FOREIGN KEY (receiver_id) REFERENCES users(id) ON DELETE CASCADE
 );
@@ -112,9 +139,134 @@ CREATE TABLE IF NOT EXISTS stories (
   category VARCHAR(100),
   is_featured BOOLEAN DEFAULT FALSE,
   created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  KEY idx_stories_updated_at (updated_at),
+  FOREIGN KEY (author_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+-- Ids of deleted rows, so /changes feeds can tell clients to drop them
+-- (see new-backend/app/changes.py)
+CREATE TABLE IF NOT EXISTS tombstones (
+  id BIGINT AUTO_INCREMENT PRIMARY KEY,
+  resource VARCHAR(50) NOT NULL,
+  item_id INT NOT NULL,
+  deleted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  UNIQUE KEY uq_tombstones_resource_item (resource, item_id), -- a re-run purge records a row once
+  KEY idx_tombstones_resource_deleted (resource, deleted_at)
+);
+
+-- Denormalised home page feed (see new-backend/app/feed.py)
+CREATE TABLE IF NOT EXISTS home_feed (
+  id BIGINT AUTO_INCREMENT PRIMARY KEY,
+  item_type ENUM('opportunity','story','scholarship') NOT NULL,
+  item_id INT NOT NULL,
+  title VARCHAR(200) NOT NULL,
+  subtitle VARCHAR(100), -- company / category / amount
+  tag VARCHAR(50), -- opportunity type / scholarship deadline
+  summary VARCHAR(300),
+  author_id INT,
+  author_name VARCHAR(100),
+  is_featured BOOLEAN DEFAULT FALSE,
+  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  UNIQUE KEY uq_home_feed_item (item_type, item_id),
+  KEY idx_home_feed_type_created (item_type, created_at),
+  KEY idx_home_feed_type_featured (item_type, is_featured, created_at),
   FOREIGN KEY (author_id) REFERENCES users(id) ON DELETE CASCADE
 );
 
+-- Skills taxonomy (see new-backend/app/skills.py): canonical skills, the
+-- aliases that resolve to them (every skill's own slug included) and the
+-- skills of each user / opportunity, indexed both ways
+CREATE TABLE IF NOT EXISTS skills (
+  id INT AUTO_INCREMENT PRIMARY KEY,
+  name VARCHAR(100) NOT NULL,
+  slug VARCHAR(100) NOT NULL,
+  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  UNIQUE KEY uq_skills_slug (slug)
+);
+
+CREATE TABLE IF NOT EXISTS skill_aliases (
+  alias VARCHAR(100) PRIMARY KEY,
+  skill_id INT NOT NULL,
+  KEY idx_skill_aliases_skill_id (skill_id),
+  FOREIGN KEY (skill_id) REFERENCES skills(id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS user_skills (
+  user_id INT NOT NULL,
+  skill_id INT NOT NULL,
+  PRIMARY KEY (user_id, skill_id),
+  KEY idx_user_skills_skill_user (skill_id, user_id),
+  FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+  FOREIGN KEY (skill_id) REFERENCES skills(id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS opportunity_skills (
+  opportunity_id INT NOT NULL,
+  skill_id INT NOT NULL,
+  PRIMARY KEY (opportunity_id, skill_id),
+  KEY idx_opportunity_skills_skill_opportunity (skill_id, opportunity_id),
+  FOREIGN KEY (opportunity_id) REFERENCES opportunities(id) ON DELETE CASCADE,
+  FOREIGN KEY (skill_id) REFERENCES skills(id) ON DELETE CASCADE
+);
+
+-- Daily analytics rollups and the aggregator's watermarks
+-- (see new-backend/app/analytics.py)
+CREATE TABLE IF NOT EXISTS daily_rollups (
+  metric VARCHAR(50) NOT NULL,
+  day DATE NOT NULL,
+  dimension VARCHAR(50) NOT NULL DEFAULT '', -- role / type / status, '' if none
+  total INT NOT NULL DEFAULT 0,
+  PRIMARY KEY (metric, day, dimension)
+);
+
+CREATE TABLE IF NOT EXISTS rollup_watermarks (
+  metric VARCHAR(50) PRIMARY KEY,
+  last_id BIGINT NOT NULL DEFAULT 0, -- append-only sources: last id counted
+  last_updated_at TIMESTAMP NULL -- status sources: rows updated since are recounted
+);
+
+-- Engagement sketches, one per name and day (see new-backend/app/sketches.py)
+CREATE TABLE IF NOT EXISTS sketches (
+  name VARCHAR(50) NOT NULL,
+  day DATE NOT NULL,
+  data MEDIUMBLOB NOT NULL, -- serialized HyperLogLog / Count-Min + Space-Saving
+  updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (name, day)
+);
+
+-- Revoked tokens and users, loaded by every backend process (see new-backend/app/revocation.py)
+CREATE TABLE IF NOT EXISTS revoked_tokens (
+  id BIGINT PRIMARY KEY AUTO_INCREMENT,
+  kind ENUM('token', 'family', 'user') NOT NULL,
+  token_key VARCHAR(64) NOT NULL, -- jti of a token, family of a login, or id of a user
+  revoked_at BIGINT NOT NULL, -- unix seconds
+  expires_at BIGINT NOT NULL, -- unix seconds after which nothing it covers is valid
+  UNIQUE KEY uq_revoked_tokens_kind_key (kind, token_key), -- one insert wins a refresh token rotation
+  KEY idx_revoked_tokens_revoked_at (revoked_at),
+  KEY idx_revoked_tokens_expires_at (expires_at)
+);
+
+-- Background job queue (see new-backend/app/jobs.py)
+CREATE TABLE IF NOT EXISTS jobs (
+  id BIGINT AUTO_INCREMENT PRIMARY KEY,
+  kind VARCHAR(100) NOT NULL,
+  payload TEXT, -- JSON
+  status ENUM('queued','running','succeeded','failed') NOT NULL DEFAULT 'queued',
+  attempts INT NOT NULL DEFAULT 0,
+  max_attempts INT NOT NULL DEFAULT 5,
+  idempotency_key VARCHAR(255),
+  result TEXT, -- JSON
+  error TEXT,
+  run_after TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  locked_at TIMESTAMP NULL,
+  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  finished_at TIMESTAMP NULL,
+  UNIQUE KEY uq_jobs_idempotency_key (idempotency_key),
+  KEY idx_jobs_status_run_after (status, run_after),
+  KEY idx_jobs_kind_status (kind, status)
+);
+
 -- Insert demo data
 INSERT INTO users (email, password_hash, name, role, graduation_year, major, company, position, bio, skills) VALUES
   ('alice@alumni.edu', '$2b$12$CgkJxu49qllIpCNNTwaVQu6wCeojAewFfBBmCokbwhW3k/djaCT2e', 'Alice Johnson', 'alumni', 2020, 'Computer Science', 'Google', 'Software Engineer', 'Passionate about helping students succeed in tech careers.', 'Python, JavaScript, React, Machine Learning'),
@@ -134,11 +286,63 @@ INSERT INTO scholarships (title, description, amount, deadline, requirements, po
   ('Business Leadership Award', 'Supporting future business leaders.', 3000.00, '2024-11-30', 'Business major, leadership experience', 2)
 ON DUPLICATE KEY UPDATE title=VALUES(title);
 
+-- Canonical skills and common aliases
+INSERT INTO skills (name, slug) VALUES
+  ('Python', 'python'), ('JavaScript', 'javascript'), ('TypeScript', 'typescript'),
+  ('Java', 'java'), ('C++', 'c++'), ('C#', 'c#'), ('Go', 'go'), ('Rust', 'rust'),
+  ('SQL', 'sql'), ('React', 'react'), ('Node.js', 'node.js'), ('Web Development', 'web development'),
+  ('Machine Learning', 'machine learning'), ('Artificial Intelligence', 'artificial intelligence'),
+  ('Data Science', 'data science'), ('Kubernetes', 'kubernetes'), ('Docker', 'docker'),
+  ('Amazon Web Services', 'amazon web services'), ('Product Management', 'product management'),
+  ('Strategy', 'strategy'), ('Leadership', 'leadership'), ('Business Analysis', 'business analysis'),
+  ('Marketing', 'marketing'), ('Finance', 'finance'), ('Communication', 'communication')
+ON DUPLICATE KEY UPDATE name = VALUES(name);
+
+INSERT IGNORE INTO skill_aliases (alias, skill_id)
+SELECT slug, id FROM skills;
+
+INSERT IGNORE INTO skill_aliases (alias, skill_id)
+SELECT a.alias, s.id
+FROM (
+  SELECT 'js' AS alias, 'javascript' AS slug UNION ALL SELECT 'ecmascript', 'javascript'
+  UNION ALL SELECT 'es6', 'javascript' UNION ALL SELECT 'ts', 'typescript'
+  UNION ALL SELECT 'py', 'python' UNION ALL SELECT 'python3', 'python'
+  UNION ALL SELECT 'cpp', 'c++' UNION ALL SELECT 'csharp', 'c#'
+  UNION ALL SELECT 'golang', 'go' UNION ALL SELECT 'mysql', 'sql'
+  UNION ALL SELECT 'reactjs', 'react' UNION ALL SELECT 'react.js', 'react'
+  UNION ALL SELECT 'node', 'node.js' UNION ALL SELECT 'nodejs', 'node.js'
+  UNION ALL SELECT 'web dev', 'web development' UNION ALL SELECT 'ml', 'machine learning'
+  UNION ALL SELECT 'ai', 'artificial intelligence' UNION ALL SELECT 'k8s', 'kubernetes'
+  UNION ALL SELECT 'aws', 'amazon web services' UNION ALL SELECT 'communication skills', 'communication'
+) a
+JOIN skills s ON s.slug = a.slug;
+
+-- Demo users' and opportunities' skills; real data is indexed by the
+-- backfill_skills job (POST /api/admin/skills/backfill)
+INSERT IGNORE INTO user_skills (user_id, skill_id)
+SELECT u.id, a.skill_id
+FROM users u
+JOIN skill_aliases a ON FIND_IN_SET(a.alias, LOWER(REPLACE(u.skills, ', ', ',')));
+
+INSERT IGNORE INTO opportunity_skills (opportunity_id, skill_id)
+SELECT o.id, a.skill_id
+FROM opportunities o
+JOIN skill_aliases a ON FIND_IN_SET(a.alias, LOWER(REPLACE(o.requirements, ', ', ',')));
+
 INSERT INTO mentorship_requests (student_id, mentor_id, subject, message, status) VALUES
   (3, 1, 'Career Guidance in Tech', 'I would love to learn about your journey from student to Google engineer.', 'accepted'),
   (4, 2, 'Product Management Career', 'Interested in understanding product management roles.', 'pending')
 ON DUPLICATE KEY UPDATE subject=VALUES(subject);
 
+-- Mentor load counters for the seeded requests
+UPDATE users u
+JOIN (
+  SELECT mentor_id, COUNT(*) AS open_requests FROM mentorship_requests
+  WHERE status IN ('pending', 'accepted')
+  GROUP BY mentor_id
+) mr ON mr.mentor_id = u.id
+SET u.mentor_open_requests = mr.open_requests;
+
 INSERT INTO applications (applicant_id, opportunity_id, type, status, cover_letter) VALUES
   (3, 1, 'job', 'submitted', 'I am excited to apply for the Software Engineering Intern position...'),
   (4, 2, 'job', 'under_review', 'My business background and passion for technology make me a great fit...')
@@ -149,4 +353,29 @@ INSERT INTO stories (author_id, title, content, category, is_featured) VALUES
   (2, 'Building Products That Matter', 'Product management taught me that technology is about solving real problems...', 'Career Advice', FALSE)
 ON DUPLICATE KEY UPDATE title=VALUES(title);
 
+-- Backfill the home feed from existing rows
+INSERT INTO home_feed (item_type, item_id, title, subtitle, tag, summary, author_id, author_name, is_featured, created_at)
+SELECT 'opportunity', o.id, o.title, o.company, o.type, LEFT(o.description, 300), o.posted_by, u.name, FALSE, o.created_at
+FROM opportunities o LEFT JOIN users u ON o.posted_by = u.id
+WHERE o.is_active = TRUE
+ON DUPLICATE KEY UPDATE title = VALUES(title);
+
+INSERT INTO home_feed (item_type, item_id, title, subtitle, tag, summary, author_id, author_name, is_featured, created_at)
+SELECT 'story', s.id, s.title, s.category, NULL, LEFT(s.content, 300), s.author_id, u.name, s.is_featured, s.created_at
+FROM stories s LEFT JOIN users u ON s.author_id = u.id
+ON DUPLICATE KEY UPDATE title = VALUES(title);
+
+INSERT INTO home_feed (item_type, item_id, title, subtitle, tag, summary, author_id, author_name, is_featured, created_at)
+SELECT 'scholarship', s.id, s.title, s.amount, s.deadline, LEFT(s.description, 300), s.posted_by, u.name, FALSE, s.created_at
+FROM scholarships s LEFT JOIN users u ON s.posted_by = u.id
+WHERE s.is_active = TRUE
+ON DUPLICATE KEY UPDATE title = VALUES(title);
 
+-- Keep the newest 50 (HOME_FEED_SIZE) items per type, and every featured one
+DELETE f FROM home_feed f JOIN (
+  SELECT id FROM (
+    SELECT id, ROW_NUMBER() OVER (PARTITION BY item_type ORDER BY created_at DESC, id DESC) AS position
+    FROM home_feed WHERE is_featured = FALSE
+  ) ranked
+  WHERE position > 50
+) trimmed ON trimmed.id = f.id;
@@ -0,0 +1,41 @@
+-- Migration for analytics rollups
+-- The rollup_analytics job fills daily_rollups from the existing rows on
+-- its first run
+USE alumni_connect;
+
+SET @dbname = DATABASE();
+
+CREATE TABLE IF NOT EXISTS daily_rollups (
+  metric VARCHAR(50) NOT NULL,
+  day DATE NOT NULL,
+  dimension VARCHAR(50) NOT NULL DEFAULT '', -- role / type / status, '' if none
+  total INT NOT NULL DEFAULT 0,
+  PRIMARY KEY (metric, day, dimension)
+);
+
+CREATE TABLE IF NOT EXISTS rollup_watermarks (
+  metric VARCHAR(50) PRIMARY KEY,
+  last_id BIGINT NOT NULL DEFAULT 0, -- append-only sources: last id counted
+  last_updated_at TIMESTAMP NULL -- status sources: rows updated since are recounted
+);
+
+-- Status rollups recount a day by created_at range
+SET @index_exists = (SELECT COUNT(*) FROM INFORMATION_SCHEMA.STATISTICS
+    WHERE TABLE_SCHEMA = @dbname AND TABLE_NAME = 'applications' AND INDEX_NAME = 'idx_applications_created_at');
+SET @sql = IF(@index_exists = 0,
+    'ALTER TABLE applications ADD KEY idx_applications_created_at (created_at)',
+    'SELECT "Index idx_applications_created_at already exists"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+SET @index_exists = (SELECT COUNT(*) FROM INFORMATION_SCHEMA.STATISTICS
+    WHERE TABLE_SCHEMA = @dbname AND TABLE_NAME = 'mentorship_requests' AND INDEX_NAME = 'idx_mentorship_requests_created_at');
+SET @sql = IF(@index_exists = 0,
+    'ALTER TABLE mentorship_requests ADD KEY idx_mentorship_requests_created_at (created_at)',
+    'SELECT "Index idx_mentorship_requests_created_at already exists"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+SELECT 'Migration completed successfully!' as status;
@@ -0,0 +1,34 @@
+-- Migration for the poster-side application review queue
+USE alumni_connect;
+
+SET @dbname = DATABASE();
+
+-- Applications submitted before this migration keep a score of 0
+SET @col_exists = (SELECT COUNT(*) FROM INFORMATION_SCHEMA.COLUMNS
+    WHERE TABLE_SCHEMA = @dbname AND TABLE_NAME = 'applications' AND COLUMN_NAME = 'match_score');
+SET @sql = IF(@col_exists = 0,
+    'ALTER TABLE applications ADD COLUMN match_score TINYINT UNSIGNED NOT NULL DEFAULT 0 AFTER idempotency_key',
+    'SELECT "Column match_score already exists"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+SET @index_exists = (SELECT COUNT(*) FROM INFORMATION_SCHEMA.STATISTICS
+    WHERE TABLE_SCHEMA = @dbname AND TABLE_NAME = 'applications' AND INDEX_NAME = 'idx_applications_opportunity_review');
+SET @sql = IF(@index_exists = 0,
+    'ALTER TABLE applications ADD KEY idx_applications_opportunity_review (opportunity_id, status, match_score)',
+    'SELECT "Index idx_applications_opportunity_review already exists"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+SET @index_exists = (SELECT COUNT(*) FROM INFORMATION_SCHEMA.STATISTICS
+    WHERE TABLE_SCHEMA = @dbname AND TABLE_NAME = 'applications' AND INDEX_NAME = 'idx_applications_scholarship_review');
+SET @sql = IF(@index_exists = 0,
+    'ALTER TABLE applications ADD KEY idx_applications_scholarship_review (scholarship_id, status, match_score)',
+    'SELECT "Index idx_applications_scholarship_review already exists"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+SELECT 'Migration completed successfully!' as status;
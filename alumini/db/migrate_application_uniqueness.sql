@@ -0,0 +1,40 @@
+-- Migration to make applications unique per applicant and posting
+USE alumni_connect;
+
+-- Keep the oldest of any duplicate applications
+DELETE a FROM applications a
+JOIN applications b
+  ON a.applicant_id = b.applicant_id
+ AND a.id > b.id
+ AND (a.opportunity_id = b.opportunity_id OR a.scholarship_id = b.scholarship_id);
+
+SET @dbname = DATABASE();
+
+SET @col_exists = (SELECT COUNT(*) FROM INFORMATION_SCHEMA.COLUMNS
+    WHERE TABLE_SCHEMA = @dbname AND TABLE_NAME = 'applications' AND COLUMN_NAME = 'idempotency_key');
+SET @sql = IF(@col_exists = 0,
+    'ALTER TABLE applications ADD COLUMN idempotency_key VARCHAR(255) AFTER document_urls',
+    'SELECT "Column idempotency_key already exists"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+SET @index_exists = (SELECT COUNT(*) FROM INFORMATION_SCHEMA.STATISTICS
+    WHERE TABLE_SCHEMA = @dbname AND TABLE_NAME = 'applications' AND INDEX_NAME = 'uq_applications_opportunity');
+SET @sql = IF(@index_exists = 0,
+    'ALTER TABLE applications ADD UNIQUE KEY uq_applications_opportunity (applicant_id, opportunity_id)',
+    'SELECT "Index uq_applications_opportunity already exists"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+SET @index_exists = (SELECT COUNT(*) FROM INFORMATION_SCHEMA.STATISTICS
+    WHERE TABLE_SCHEMA = @dbname AND TABLE_NAME = 'applications' AND INDEX_NAME = 'uq_applications_scholarship');
+SET @sql = IF(@index_exists = 0,
+    'ALTER TABLE applications ADD UNIQUE KEY uq_applications_scholarship (applicant_id, scholarship_id)',
+    'SELECT "Index uq_applications_scholarship already exists"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+SELECT 'Migration completed successfully!' as status;
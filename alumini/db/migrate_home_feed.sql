@@ -0,0 +1,71 @@
+-- Migration to add the denormalised home page feed
+USE alumni_connect;
+
+SET @dbname = DATABASE();
+
+-- Denormalised home page feed (see new-backend/app/feed.py)
+CREATE TABLE IF NOT EXISTS home_feed (
+  id BIGINT AUTO_INCREMENT PRIMARY KEY,
+  item_type ENUM('opportunity','story','scholarship') NOT NULL,
+  item_id INT NOT NULL,
+  title VARCHAR(200) NOT NULL,
+  subtitle VARCHAR(100), -- company / category / amount
+  tag VARCHAR(50), -- opportunity type / scholarship deadline
+  summary VARCHAR(300),
+  author_id INT,
+  author_name VARCHAR(100),
+  is_featured BOOLEAN DEFAULT FALSE,
+  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  UNIQUE KEY uq_home_feed_item (item_type, item_id),
+  KEY idx_home_feed_type_created (item_type, created_at),
+  KEY idx_home_feed_type_featured (item_type, is_featured, created_at),
+  FOREIGN KEY (author_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+-- Sections list by created_at within a type; featured stories come first
+SET @index_columns = (SELECT GROUP_CONCAT(COLUMN_NAME ORDER BY SEQ_IN_INDEX) FROM INFORMATION_SCHEMA.STATISTICS
+    WHERE TABLE_SCHEMA = @dbname AND TABLE_NAME = 'home_feed' AND INDEX_NAME = 'idx_home_feed_type_created');
+SET @sql = IF(@index_columns = 'item_type,is_featured,created_at',
+    'ALTER TABLE home_feed DROP KEY idx_home_feed_type_created, ADD KEY idx_home_feed_type_created (item_type, created_at)',
+    'SELECT "Index idx_home_feed_type_created is up to date"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+SET @index_exists = (SELECT COUNT(*) FROM INFORMATION_SCHEMA.STATISTICS
+    WHERE TABLE_SCHEMA = @dbname AND TABLE_NAME = 'home_feed' AND INDEX_NAME = 'idx_home_feed_type_featured');
+SET @sql = IF(@index_exists = 0,
+    'ALTER TABLE home_feed ADD KEY idx_home_feed_type_featured (item_type, is_featured, created_at)',
+    'SELECT "Index idx_home_feed_type_featured already exists"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+-- Backfill the home feed from existing rows
+INSERT INTO home_feed (item_type, item_id, title, subtitle, tag, summary, author_id, author_name, is_featured, created_at)
+SELECT 'opportunity', o.id, o.title, o.company, o.type, LEFT(o.description, 300), o.posted_by, u.name, FALSE, o.created_at
+FROM opportunities o LEFT JOIN users u ON o.posted_by = u.id
+WHERE o.is_active = TRUE
+ON DUPLICATE KEY UPDATE title = VALUES(title);
+
+INSERT INTO home_feed (item_type, item_id, title, subtitle, tag, summary, author_id, author_name, is_featured, created_at)
+SELECT 'story', s.id, s.title, s.category, NULL, LEFT(s.content, 300), s.author_id, u.name, s.is_featured, s.created_at
+FROM stories s LEFT JOIN users u ON s.author_id = u.id
+ON DUPLICATE KEY UPDATE title = VALUES(title);
+
+INSERT INTO home_feed (item_type, item_id, title, subtitle, tag, summary, author_id, author_name, is_featured, created_at)
+SELECT 'scholarship', s.id, s.title, s.amount, s.deadline, LEFT(s.description, 300), s.posted_by, u.name, FALSE, s.created_at
+FROM scholarships s LEFT JOIN users u ON s.posted_by = u.id
+WHERE s.is_active = TRUE
+ON DUPLICATE KEY UPDATE title = VALUES(title);
+
+-- Keep the newest 50 (HOME_FEED_SIZE) items per type, and every featured one
+DELETE f FROM home_feed f JOIN (
+  SELECT id FROM (
+    SELECT id, ROW_NUMBER() OVER (PARTITION BY item_type ORDER BY created_at DESC, id DESC) AS position
+    FROM home_feed WHERE is_featured = FALSE
+  ) ranked
+  WHERE position > 50
+) trimmed ON trimmed.id = f.id;
+
+SELECT 'Migration completed successfully!' as status;
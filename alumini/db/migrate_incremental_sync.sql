@@ -0,0 +1,186 @@
+-- Migration for incremental sync: updated_at on every table, plus tombstones
+USE alumni_connect;
+
+SET @dbname = DATABASE();
+
+CREATE TABLE IF NOT EXISTS tombstones (
+  id BIGINT AUTO_INCREMENT PRIMARY KEY,
+  resource VARCHAR(50) NOT NULL,
+  item_id INT NOT NULL,
+  deleted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  UNIQUE KEY uq_tombstones_resource_item (resource, item_id), -- a re-run purge records a row once
+  KEY idx_tombstones_resource_deleted (resource, deleted_at)
+);
+
+-- tombstones: one row per deleted item, keeping the first (clients have seen it)
+SET @index_exists = (SELECT COUNT(*) FROM INFORMATION_SCHEMA.STATISTICS
+    WHERE TABLE_SCHEMA = @dbname AND TABLE_NAME = 'tombstones' AND INDEX_NAME = 'uq_tombstones_resource_item');
+SET @sql = IF(@index_exists = 0,
+    'DELETE newer FROM tombstones newer JOIN tombstones older ON older.resource = newer.resource AND older.item_id = newer.item_id AND older.id < newer.id',
+    'SELECT "Index uq_tombstones_resource_item already exists"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+SET @sql = IF(@index_exists = 0,
+    'ALTER TABLE tombstones ADD UNIQUE KEY uq_tombstones_resource_item (resource, item_id)',
+    'SELECT "Index uq_tombstones_resource_item already exists"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+-- users: existing rows start with updated_at = created_at
+SET @col_exists = (SELECT COUNT(*) FROM INFORMATION_SCHEMA.COLUMNS
+    WHERE TABLE_SCHEMA = @dbname AND TABLE_NAME = 'users' AND COLUMN_NAME = 'updated_at');
+SET @sql = IF(@col_exists = 0,
+    'ALTER TABLE users ADD COLUMN updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP AFTER created_at',
+    'SELECT "Column users.updated_at already exists"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+SET @sql = IF(@col_exists = 0,
+    'UPDATE users SET updated_at = created_at',
+    'SELECT "Skipping users.updated_at backfill"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+SET @index_exists = (SELECT COUNT(*) FROM INFORMATION_SCHEMA.STATISTICS
+    WHERE TABLE_SCHEMA = @dbname AND TABLE_NAME = 'users' AND INDEX_NAME = 'idx_users_updated_at');
+SET @sql = IF(@index_exists = 0,
+    'ALTER TABLE users ADD KEY idx_users_updated_at (updated_at)',
+    'SELECT "Index idx_users_updated_at already exists"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+-- opportunities: existing rows start with updated_at = created_at
+SET @col_exists = (SELECT COUNT(*) FROM INFORMATION_SCHEMA.COLUMNS
+    WHERE TABLE_SCHEMA = @dbname AND TABLE_NAME = 'opportunities' AND COLUMN_NAME = 'updated_at');
+SET @sql = IF(@col_exists = 0,
+    'ALTER TABLE opportunities ADD COLUMN updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP AFTER created_at',
+    'SELECT "Column opportunities.updated_at already exists"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+SET @sql = IF(@col_exists = 0,
+    'UPDATE opportunities SET updated_at = created_at',
+    'SELECT "Skipping opportunities.updated_at backfill"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+SET @index_exists = (SELECT COUNT(*) FROM INFORMATION_SCHEMA.STATISTICS
+    WHERE TABLE_SCHEMA = @dbname AND TABLE_NAME = 'opportunities' AND INDEX_NAME = 'idx_opportunities_updated_at');
+SET @sql = IF(@index_exists = 0,
+    'ALTER TABLE opportunities ADD KEY idx_opportunities_updated_at (updated_at)',
+    'SELECT "Index idx_opportunities_updated_at already exists"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+-- scholarships already has updated_at
+SET @index_exists = (SELECT COUNT(*) FROM INFORMATION_SCHEMA.STATISTICS
+    WHERE TABLE_SCHEMA = @dbname AND TABLE_NAME = 'scholarships' AND INDEX_NAME = 'idx_scholarships_updated_at');
+SET @sql = IF(@index_exists = 0,
+    'ALTER TABLE scholarships ADD KEY idx_scholarships_updated_at (updated_at)',
+    'SELECT "Index idx_scholarships_updated_at already exists"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+-- mentorship_requests: existing rows start with updated_at = created_at
+SET @col_exists = (SELECT COUNT(*) FROM INFORMATION_SCHEMA.COLUMNS
+    WHERE TABLE_SCHEMA = @dbname AND TABLE_NAME = 'mentorship_requests' AND COLUMN_NAME = 'updated_at');
+SET @sql = IF(@col_exists = 0,
+    'ALTER TABLE mentorship_requests ADD COLUMN updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP AFTER created_at',
+    'SELECT "Column mentorship_requests.updated_at already exists"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+SET @sql = IF(@col_exists = 0,
+    'UPDATE mentorship_requests SET updated_at = created_at',
+    'SELECT "Skipping mentorship_requests.updated_at backfill"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+SET @index_exists = (SELECT COUNT(*) FROM INFORMATION_SCHEMA.STATISTICS
+    WHERE TABLE_SCHEMA = @dbname AND TABLE_NAME = 'mentorship_requests' AND INDEX_NAME = 'idx_mentorship_requests_updated_at');
+SET @sql = IF(@index_exists = 0,
+    'ALTER TABLE mentorship_requests ADD KEY idx_mentorship_requests_updated_at (updated_at)',
+    'SELECT "Index idx_mentorship_requests_updated_at already exists"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+-- applications: existing rows start with updated_at = created_at
+SET @col_exists = (SELECT COUNT(*) FROM INFORMATION_SCHEMA.COLUMNS
+    WHERE TABLE_SCHEMA = @dbname AND TABLE_NAME = 'applications' AND COLUMN_NAME = 'updated_at');
+SET @sql = IF(@col_exists = 0,
+    'ALTER TABLE applications ADD COLUMN updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP AFTER created_at',
+    'SELECT "Column applications.updated_at already exists"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+SET @sql = IF(@col_exists = 0,
+    'UPDATE applications SET updated_at = created_at',
+    'SELECT "Skipping applications.updated_at backfill"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+SET @index_exists = (SELECT COUNT(*) FROM INFORMATION_SCHEMA.STATISTICS
+    WHERE TABLE_SCHEMA = @dbname AND TABLE_NAME = 'applications' AND INDEX_NAME = 'idx_applications_updated_at');
+SET @sql = IF(@index_exists = 0,
+    'ALTER TABLE applications ADD KEY idx_applications_updated_at (updated_at)',
+    'SELECT "Index idx_applications_updated_at already exists"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+-- messages: existing rows start with updated_at = created_at
+SET @col_exists = (SELECT COUNT(*) FROM INFORMATION_SCHEMA.COLUMNS
+    WHERE TABLE_SCHEMA = @dbname AND TABLE_NAME = 'messages' AND COLUMN_NAME = 'updated_at');
+SET @sql = IF(@col_exists = 0,
+    'ALTER TABLE messages ADD COLUMN updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP AFTER created_at',
+    'SELECT "Column messages.updated_at already exists"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+SET @sql = IF(@col_exists = 0,
+    'UPDATE messages SET updated_at = created_at',
+    'SELECT "Skipping messages.updated_at backfill"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+SET @index_exists = (SELECT COUNT(*) FROM INFORMATION_SCHEMA.STATISTICS
+    WHERE TABLE_SCHEMA = @dbname AND TABLE_NAME = 'messages' AND INDEX_NAME = 'idx_messages_updated_at');
+SET @sql = IF(@index_exists = 0,
+    'ALTER TABLE messages ADD KEY idx_messages_updated_at (updated_at)',
+    'SELECT "Index idx_messages_updated_at already exists"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+-- stories: existing rows start with updated_at = created_at
+SET @col_exists = (SELECT COUNT(*) FROM INFORMATION_SCHEMA.COLUMNS
+    WHERE TABLE_SCHEMA = @dbname AND TABLE_NAME = 'stories' AND COLUMN_NAME = 'updated_at');
+SET @sql = IF(@col_exists = 0,
+    'ALTER TABLE stories ADD COLUMN updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP AFTER created_at',
+    'SELECT "Column stories.updated_at already exists"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+SET @sql = IF(@col_exists = 0,
+    'UPDATE stories SET updated_at = created_at',
+    'SELECT "Skipping stories.updated_at backfill"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+SET @index_exists = (SELECT COUNT(*) FROM INFORMATION_SCHEMA.STATISTICS
+    WHERE TABLE_SCHEMA = @dbname AND TABLE_NAME = 'stories' AND INDEX_NAME = 'idx_stories_updated_at');
+SET @sql = IF(@index_exists = 0,
+    'ALTER TABLE stories ADD KEY idx_stories_updated_at (updated_at)',
+    'SELECT "Index idx_stories_updated_at already exists"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+SELECT 'Migration completed successfully!' as status;
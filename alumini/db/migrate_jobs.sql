@@ -0,0 +1,23 @@
+-- Migration to add the background job queue table
+USE alumni_connect;
+
+CREATE TABLE IF NOT EXISTS jobs (
+  id BIGINT AUTO_INCREMENT PRIMARY KEY,
+  kind VARCHAR(100) NOT NULL,
+  payload TEXT, -- JSON
+  status ENUM('queued','running','succeeded','failed') NOT NULL DEFAULT 'queued',
+  attempts INT NOT NULL DEFAULT 0,
+  max_attempts INT NOT NULL DEFAULT 5,
+  idempotency_key VARCHAR(255),
+  result TEXT, -- JSON
+  error TEXT,
+  run_after TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  locked_at TIMESTAMP NULL,
+  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  finished_at TIMESTAMP NULL,
+  UNIQUE KEY uq_jobs_idempotency_key (idempotency_key),
+  KEY idx_jobs_status_run_after (status, run_after),
+  KEY idx_jobs_kind_status (kind, status)
+);
+
+SELECT 'Migration completed successfully!' as status;
@@ -0,0 +1,71 @@
+-- Migration for mentor capacity and the mentorship inbox/outbox
+USE alumni_connect;
+
+SET @dbname = DATABASE();
+
+SET @col_exists = (SELECT COUNT(*) FROM INFORMATION_SCHEMA.COLUMNS
+    WHERE TABLE_SCHEMA = @dbname AND TABLE_NAME = 'users' AND COLUMN_NAME = 'mentor_capacity');
+SET @sql = IF(@col_exists = 0,
+    'ALTER TABLE users ADD COLUMN mentor_capacity TINYINT UNSIGNED NOT NULL DEFAULT 3 AFTER is_lateral_entry',
+    'SELECT "Column mentor_capacity already exists"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+SET @col_exists = (SELECT COUNT(*) FROM INFORMATION_SCHEMA.COLUMNS
+    WHERE TABLE_SCHEMA = @dbname AND TABLE_NAME = 'users' AND COLUMN_NAME = 'mentor_open_requests');
+SET @sql = IF(@col_exists = 0,
+    'ALTER TABLE users ADD COLUMN mentor_open_requests SMALLINT UNSIGNED NOT NULL DEFAULT 0 AFTER mentor_capacity',
+    'SELECT "Column mentor_open_requests already exists"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+SET @col_exists = (SELECT COUNT(*) FROM INFORMATION_SCHEMA.COLUMNS
+    WHERE TABLE_SCHEMA = @dbname AND TABLE_NAME = 'users' AND COLUMN_NAME = 'mentor_free_slots');
+SET @sql = IF(@col_exists = 0,
+    'ALTER TABLE users ADD COLUMN mentor_free_slots SMALLINT AS (CAST(mentor_capacity AS SIGNED) - CAST(mentor_open_requests AS SIGNED)) STORED AFTER mentor_open_requests',
+    'SELECT "Column mentor_free_slots already exists"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+SET @index_exists = (SELECT COUNT(*) FROM INFORMATION_SCHEMA.STATISTICS
+    WHERE TABLE_SCHEMA = @dbname AND TABLE_NAME = 'users' AND INDEX_NAME = 'idx_users_mentor_free_slots');
+SET @sql = IF(@index_exists = 0,
+    'ALTER TABLE users ADD KEY idx_users_mentor_free_slots (role, mentor_free_slots)',
+    'SELECT "Index idx_users_mentor_free_slots already exists"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+SET @index_exists = (SELECT COUNT(*) FROM INFORMATION_SCHEMA.STATISTICS
+    WHERE TABLE_SCHEMA = @dbname AND TABLE_NAME = 'mentorship_requests' AND INDEX_NAME = 'idx_mentorship_mentor_id_status');
+SET @sql = IF(@index_exists = 0,
+    'ALTER TABLE mentorship_requests ADD KEY idx_mentorship_mentor_id_status (mentor_id, status)',
+    'SELECT "Index idx_mentorship_mentor_id_status already exists"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+SET @index_exists = (SELECT COUNT(*) FROM INFORMATION_SCHEMA.STATISTICS
+    WHERE TABLE_SCHEMA = @dbname AND TABLE_NAME = 'mentorship_requests' AND INDEX_NAME = 'idx_mentorship_student_id_status');
+SET @sql = IF(@index_exists = 0,
+    'ALTER TABLE mentorship_requests ADD KEY idx_mentorship_student_id_status (student_id, status)',
+    'SELECT "Index idx_mentorship_student_id_status already exists"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+-- Count the open requests every mentor already holds; mentors who are over
+-- capacity keep their requests but take no new ones until some close
+UPDATE users u
+LEFT JOIN (
+    SELECT mentor_id, COUNT(*) AS open_requests FROM mentorship_requests
+    WHERE status IN ('pending', 'accepted')
+    GROUP BY mentor_id
+) mr ON mr.mentor_id = u.id
+SET u.mentor_open_requests = COALESCE(mr.open_requests, 0)
+WHERE u.role = 'alumni';
+
+SELECT 'Migration completed successfully!' as status;
@@ -0,0 +1,28 @@
+-- Migration for refresh token families
+USE alumni_connect;
+
+SET @dbname = DATABASE();
+
+ALTER TABLE revoked_tokens
+  MODIFY kind ENUM('token', 'family', 'user') NOT NULL,
+  MODIFY token_key VARCHAR(64) NOT NULL; -- jti of a token, family of a login, or id of a user
+
+-- One row per revoked key, so only one refresh of a token can insert it.
+-- Keep the latest revocation of each key, which covers the earlier ones.
+SET @index_exists = (SELECT COUNT(*) FROM INFORMATION_SCHEMA.STATISTICS
+    WHERE TABLE_SCHEMA = @dbname AND TABLE_NAME = 'revoked_tokens' AND INDEX_NAME = 'uq_revoked_tokens_kind_key');
+SET @sql = IF(@index_exists = 0,
+    'DELETE older FROM revoked_tokens older JOIN revoked_tokens newer ON newer.kind = older.kind AND newer.token_key = older.token_key AND newer.id > older.id',
+    'SELECT "Index uq_revoked_tokens_kind_key already exists"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+SET @sql = IF(@index_exists = 0,
+    'ALTER TABLE revoked_tokens ADD UNIQUE KEY uq_revoked_tokens_kind_key (kind, token_key)',
+    'SELECT "Index uq_revoked_tokens_kind_key already exists"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+SELECT 'Migration completed successfully!' as status;
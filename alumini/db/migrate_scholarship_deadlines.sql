@@ -0,0 +1,22 @@
+-- Migration to index scholarships by deadline
+USE alumni_connect;
+
+-- Serves the "open now" list (is_active = TRUE AND deadline >= CURDATE())
+-- and the expiry sweeper as range scans
+SET @index_exists = (SELECT COUNT(*) FROM INFORMATION_SCHEMA.STATISTICS
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'scholarships'
+      AND INDEX_NAME = 'idx_scholarships_active_deadline');
+SET @sql = IF(@index_exists = 0,
+    'ALTER TABLE scholarships ADD KEY idx_scholarships_active_deadline (is_active, deadline)',
+    'SELECT "Index idx_scholarships_active_deadline already exists"');
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+-- Deactivate scholarships that are already past their deadline
+UPDATE scholarships SET is_active = FALSE WHERE is_active = TRUE AND deadline < CURDATE();
+DELETE FROM home_feed
+WHERE item_type = 'scholarship'
+  AND item_id NOT IN (SELECT id FROM scholarships WHERE is_active = TRUE);
+
+SELECT 'Migration completed successfully!' as status;
@@ -0,0 +1,16 @@
+-- Migration for token revocation
+USE alumni_connect;
+
+SET @dbname = DATABASE();
+
+CREATE TABLE IF NOT EXISTS revoked_tokens (
+  id BIGINT PRIMARY KEY AUTO_INCREMENT,
+  kind ENUM('token', 'user') NOT NULL,
+  token_key VARCHAR(64) NOT NULL, -- jti of a token, or id of a user
+  revoked_at BIGINT NOT NULL, -- unix seconds
+  expires_at BIGINT NOT NULL, -- unix seconds after which nothing it covers is valid
+  KEY idx_revoked_tokens_revoked_at (revoked_at),
+  KEY idx_revoked_tokens_expires_at (expires_at)
+);
+
+SELECT 'Migration completed successfully!' as status;
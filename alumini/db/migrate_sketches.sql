@@ -0,0 +1,14 @@
+-- Migration for engagement sketches
+USE alumni_connect;
+
+SET @dbname = DATABASE();
+
+CREATE TABLE IF NOT EXISTS sketches (
+  name VARCHAR(50) NOT NULL,
+  day DATE NOT NULL,
+  data MEDIUMBLOB NOT NULL, -- serialized HyperLogLog / Count-Min + Space-Saving
+  updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (name, day)
+);
+
+SELECT 'Migration completed successfully!' as status;
@@ -0,0 +1,72 @@
+-- Migration for the skills taxonomy
+-- Afterwards, index existing profiles and opportunities with
+-- POST /api/admin/skills/backfill (the backfill_skills job)
+USE alumni_connect;
+
+SET @dbname = DATABASE();
+
+CREATE TABLE IF NOT EXISTS skills (
+  id INT AUTO_INCREMENT PRIMARY KEY,
+  name VARCHAR(100) NOT NULL,
+  slug VARCHAR(100) NOT NULL,
+  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  UNIQUE KEY uq_skills_slug (slug)
+);
+
+CREATE TABLE IF NOT EXISTS skill_aliases (
+  alias VARCHAR(100) PRIMARY KEY,
+  skill_id INT NOT NULL,
+  KEY idx_skill_aliases_skill_id (skill_id),
+  FOREIGN KEY (skill_id) REFERENCES skills(id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS user_skills (
+  user_id INT NOT NULL,
+  skill_id INT NOT NULL,
+  PRIMARY KEY (user_id, skill_id),
+  KEY idx_user_skills_skill_user (skill_id, user_id),
+  FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+  FOREIGN KEY (skill_id) REFERENCES skills(id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS opportunity_skills (
+  opportunity_id INT NOT NULL,
+  skill_id INT NOT NULL,
+  PRIMARY KEY (opportunity_id, skill_id),
+  KEY idx_opportunity_skills_skill_opportunity (skill_id, opportunity_id),
+  FOREIGN KEY (opportunity_id) REFERENCES opportunities(id) ON DELETE CASCADE,
+  FOREIGN KEY (skill_id) REFERENCES skills(id) ON DELETE CASCADE
+);
+
+-- Canonical skills and common aliases
+INSERT INTO skills (name, slug) VALUES
+  ('Python', 'python'), ('JavaScript', 'javascript'), ('TypeScript', 'typescript'),
+  ('Java', 'java'), ('C++', 'c++'), ('C#', 'c#'), ('Go', 'go'), ('Rust', 'rust'),
+  ('SQL', 'sql'), ('React', 'react'), ('Node.js', 'node.js'), ('Web Development', 'web development'),
+  ('Machine Learning', 'machine learning'), ('Artificial Intelligence', 'artificial intelligence'),
+  ('Data Science', 'data science'), ('Kubernetes', 'kubernetes'), ('Docker', 'docker'),
+  ('Amazon Web Services', 'amazon web services'), ('Product Management', 'product management'),
+  ('Strategy', 'strategy'), ('Leadership', 'leadership'), ('Business Analysis', 'business analysis'),
+  ('Marketing', 'marketing'), ('Finance', 'finance'), ('Communication', 'communication')
+ON DUPLICATE KEY UPDATE name = VALUES(name);
+
+INSERT IGNORE INTO skill_aliases (alias, skill_id)
+SELECT slug, id FROM skills;
+
+INSERT IGNORE INTO skill_aliases (alias, skill_id)
+SELECT a.alias, s.id
+FROM (
+  SELECT 'js' AS alias, 'javascript' AS slug UNION ALL SELECT 'ecmascript', 'javascript'
+  UNION ALL SELECT 'es6', 'javascript' UNION ALL SELECT 'ts', 'typescript'
+  UNION ALL SELECT 'py', 'python' UNION ALL SELECT 'python3', 'python'
+  UNION ALL SELECT 'cpp', 'c++' UNION ALL SELECT 'csharp', 'c#'
+  UNION ALL SELECT 'golang', 'go' UNION ALL SELECT 'mysql', 'sql'
+  UNION ALL SELECT 'reactjs', 'react' UNION ALL SELECT 'react.js', 'react'
+  UNION ALL SELECT 'node', 'node.js' UNION ALL SELECT 'nodejs', 'node.js'
+  UNION ALL SELECT 'web dev', 'web development' UNION ALL SELECT 'ml', 'machine learning'
+  UNION ALL SELECT 'ai', 'artificial intelligence' UNION ALL SELECT 'k8s', 'kubernetes'
+  UNION ALL SELECT 'aws', 'amazon web services' UNION ALL SELECT 'communication skills', 'communication'
+) a
+JOIN skills s ON s.slug = a.slug;
+
+SELECT 'Migration completed successfully!' as status;
@@ -1,26 +1,36 @@
 from flask import Flask
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
+from werkzeug.middleware.proxy_fix import ProxyFix
 from .config import get_config
 
 
 def create_app() -> Flask:
     app = Flask(__name__)
     app.config.from_mapping(get_config())
+
+    # Behind proxies, take the client address from the headers they add
+    hops = app.config["TRUSTED_PROXY_HOPS"]
+    if hops > 0:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops)
     
     # Configure JWT - identity will be user ID (integer)
     app.config['JWT_IDENTITY_CLAIM'] = 'sub'
 
     CORS(app, resources={
         r"/api/*": {
-            "origins": ["http://localhost:5173", "http://localhost:3000"],
+            "origins": app.config["CORS_ORIGINS"],
             "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
             "allow_headers": ["Content-Type", "Authorization"],
+            "expose_headers": ["Retry-After"],
             "supports_credentials": True
         }
     })
     
     jwt = JWTManager(app)
+
+    from .revocation import init_revocation
+    init_revocation(jwt)
     
     # Handle OPTIONS requests before JWT validation
     @app.before_request
@@ -39,6 +49,9 @@ def create_app() -> Flask:
     from .routes.messages import bp as messages_bp
     from .routes.stories import bp as stories_bp
     from .routes.admin import bp as admin_bp
+    from .routes.bulk import bp as bulk_bp
+    from .routes.batch import bp as batch_bp
+    from .routes.feed import bp as feed_bp
 
     app.register_blueprint(health_bp, url_prefix="/api")
     app.register_blueprint(auth_bp, url_prefix="/api/auth")
@@ -50,6 +63,38 @@ def create_app() -> Flask:
     app.register_blueprint(messages_bp, url_prefix="/api/messages")
     app.register_blueprint(stories_bp, url_prefix="/api/stories")
     app.register_blueprint(admin_bp, url_prefix="/api/admin")
+    app.register_blueprint(bulk_bp, url_prefix="/api/admin")
+    app.register_blueprint(batch_bp, url_prefix="/api")
+    app.register_blueprint(feed_bp, url_prefix="/api/feed")
+
+    from .models import init_sticky_reads
+    init_sticky_reads(app)
+
+    from .ratelimit import init_rate_limits
+    init_rate_limits(app)
+
+    from .compression import init_compression
+    init_compression(app)
+
+    from .models import start_warm_up
+    if app.config["DB_WARM_UP"]:
+        start_warm_up()
+
+    from .probes import start_checker
+    if app.config["HEALTH_PROBE_INTERVAL"] > 0:
+        start_checker(app.config["HEALTH_PROBE_INTERVAL"])
+
+    from .sketches import start_flusher
+    if app.config["SKETCH_FLUSH_SECONDS"] > 0:
+        start_flusher(app.config["SKETCH_FLUSH_SECONDS"])
+
+    from .revocation import start_syncer
+    if app.config["REVOCATION_SYNC_SECONDS"] > 0:
+        start_syncer(app.config["REVOCATION_SYNC_SECONDS"])
+
+    from .jobs import start_workers
+    if app.config["JOB_WORKERS"] > 0:
+        start_workers(app.config["JOB_WORKERS"])
 
     return app
 
@@ -0,0 +1,262 @@
+"""
+Daily analytics rollups for the admin dashboard.
+
+`daily_rollups` holds one row per (metric, day, dimension): new users by
+role, opportunities by type, scholarships, messages, and applications and
+mentorship requests by status. The rollup_analytics job fills it
+incrementally from a per-metric watermark in `rollup_watermarks`, so a
+chart over years reads a few thousand rows off the primary key instead of
+counting the source tables.
+
+Append-only sources are rolled up by id: each run adds the rows past
+`last_id` to their day's counts and moves the watermark in the same
+transaction. Rows newer than ROLLUP_SETTLE_SECONDS wait for the next run,
+so a transaction that took an id a little before a newer one committed is
+not skipped. Deleting a row later does not take it back out; these are
+counts of what happened each day.
+
+Status sources change after they are created, so each run finds the days
+whose rows were updated since `last_updated_at` and recounts those days by
+current status (one created_at range per day).
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+
+from sqlalchemy import bindparam
+from .changes import EPOCH
+from .config import get_config
+from .jobs import job
+from .models import get_engine
+from .statements import statement
+
+
+# metric: (table, dimension column or None)
+EVENT_METRICS = {
+    "users": ("users", "role"),
+    "opportunities": ("opportunities", "type"),
+    "scholarships": ("scholarships", None),
+    "messages": ("messages", None),
+}
+
+STATUS_METRICS = {
+    "applications": ("applications", "status"),
+    "mentorship_requests": ("mentorship_requests", "status"),
+}
+
+METRICS = (*EVENT_METRICS, *STATUS_METRICS)
+
+BUCKETS = ("day", "week", "month")
+
+# Series of every metric: the sum over its dimensions
+TOTAL = "total"
+
+
+def dimension_sql(column):
+    return f"COALESCE({column}, '')" if column else "''"
+
+
+ENSURE_WATERMARK = statement("analytics.ensure_watermark", """
+    INSERT IGNORE INTO rollup_watermarks (metric) VALUES (:metric)
+""")
+
+LOCK_WATERMARK = statement("analytics.lock_watermark", """
+    SELECT last_id, last_updated_at FROM rollup_watermarks
+    WHERE metric = :metric
+    FOR UPDATE
+""")
+
+SAVE_WATERMARK = statement("analytics.save_watermark", """
+    UPDATE rollup_watermarks
+    SET last_id = :last_id, last_updated_at = :last_updated_at
+    WHERE metric = :metric
+""")
+
+ADD_ROLLUPS = statement("analytics.add_rollups", """
+    INSERT INTO daily_rollups (metric, day, dimension, total)
+    VALUES (:metric, :day, :dimension, :total)
+    ON DUPLICATE KEY UPDATE total = total + VALUES(total)
+""")
+
+LIST_NEW_EVENTS = {
+    metric: statement(f"analytics.list_new_{metric}", f"""
+        SELECT id, DATE(created_at) AS day, {dimension_sql(column)} AS dimension,
+               created_at < NOW() - INTERVAL :settle_seconds SECOND AS settled
+        FROM {table}
+        WHERE id > :last_id
+        ORDER BY id
+        LIMIT :batch_size
+    """)
+    for metric, (table, column) in EVENT_METRICS.items()
+}
+
+
+def lock_watermark(conn, metric):
+    conn.execute(ENSURE_WATERMARK, {"metric": metric})
+    return conn.execute(LOCK_WATERMARK, {"metric": metric}).fetchone()
+
+
+def roll_up_events(metric, batch_size, settle_seconds):
+    """Add settled rows past the watermark to the rollups; returns rows counted"""
+    counted = 0
+    while True:
+        with get_engine().begin() as conn:
+            watermark = lock_watermark(conn, metric)
+            rows = conn.execute(LIST_NEW_EVENTS[metric], {
+                "last_id": watermark.last_id,
+                "batch_size": batch_size,
+                "settle_seconds": settle_seconds
+            }).fetchall()
+
+            totals = defaultdict(int)
+            last_id = watermark.last_id
+            for row in rows:
+                if not row.settled:
+                    break
+                totals[row.day, row.dimension] += 1
+                last_id = row.id
+            if totals:
+                conn.execute(ADD_ROLLUPS, [
+                    {"metric": metric, "day": day, "dimension": dimension, "total": total}
+                    for (day, dimension), total in totals.items()
+                ])
+                conn.execute(SAVE_WATERMARK, {
+                    "metric": metric,
+                    "last_id": last_id,
+                    "last_updated_at": watermark.last_updated_at
+                })
+        counted += sum(totals.values())
+        if len(rows) < batch_size or last_id == watermark.last_id or not rows[-1].settled:
+            return counted
+
+
+LIST_CHANGED_DAYS = {
+    metric: statement(f"analytics.list_changed_{metric}_days", f"""
+        SELECT DATE(created_at) AS day, MAX(updated_at) AS newest
+        FROM {table}
+        WHERE updated_at >= :since
+        GROUP BY DATE(created_at)
+    """)
+    for metric, (table, _) in STATUS_METRICS.items()
+}
+
+DELETE_DAY = statement("analytics.delete_day", """
+    DELETE FROM daily_rollups WHERE metric = :metric AND day = :day
+""")
+
+RECOUNT_DAY = {
+    metric: statement(f"analytics.recount_{metric}_day", f"""
+        INSERT INTO daily_rollups (metric, day, dimension, total)
+        SELECT :metric, :day, {dimension_sql(column)}, COUNT(*)
+        FROM {table}
+        WHERE created_at >= :day AND created_at < :next_day
+        GROUP BY {dimension_sql(column)}
+    """)
+    for metric, (table, column) in STATUS_METRICS.items()
+}
+
+
+def roll_up_statuses(metric, batch_size, settle_seconds):
+    """Recount the days with rows updated since the watermark; returns days recounted"""
+    with get_engine().connect() as conn:
+        watermark = lock_watermark(conn, metric)
+        conn.commit()
+        changed = conn.execute(LIST_CHANGED_DAYS[metric], {
+            "since": watermark.last_updated_at or EPOCH
+        }).fetchall()
+    if not changed:
+        return 0
+
+    days = sorted(row.day for row in changed)
+    # Recounting is idempotent: a run that dies part way is simply redone
+    for start in range(0, len(days), batch_size):
+        with get_engine().begin() as conn:
+            for day in days[start:start + batch_size]:
+                params = {"metric": metric, "day": day, "next_day": day + timedelta(days=1)}
+                conn.execute(DELETE_DAY, params)
+                conn.execute(RECOUNT_DAY[metric], params)
+
+    newest = max(row.newest for row in changed)
+    with get_engine().begin() as conn:
+        watermark = lock_watermark(conn, metric)
+        conn.execute(SAVE_WATERMARK, {
+            "metric": metric,
+            "last_id": watermark.last_id,
+            "last_updated_at": max(newest - timedelta(seconds=settle_seconds),
+                                   watermark.last_updated_at or EPOCH)
+        })
+    return len(days)
+
+
+@job("rollup_analytics", every=get_config()["ROLLUP_INTERVAL"])
+def rollup_analytics_job(payload):
+    cfg = get_config()
+    result = {}
+    for metric in EVENT_METRICS:
+        result[metric] = {"rows": roll_up_events(
+            metric, cfg["ROLLUP_BATCH_SIZE"], cfg["ROLLUP_SETTLE_SECONDS"])}
+    for metric in STATUS_METRICS:
+        # A day is one range query, so batches of days are far smaller
+        result[metric] = {"days": roll_up_statuses(
+            metric, max(cfg["ROLLUP_BATCH_SIZE"] // 100, 1), cfg["ROLLUP_SETTLE_SECONDS"])}
+    return result
+
+
+def bucket_start(day, bucket):
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())
+    if bucket == "month":
+        return day.replace(day=1)
+    return day
+
+
+def bucket_labels(start, end, bucket):
+    """First day of every bucket from `start` to `end`"""
+    labels = []
+    day = bucket_start(start, bucket)
+    while day <= end:
+        labels.append(day)
+        if bucket == "day":
+            day += timedelta(days=1)
+        elif bucket == "week":
+            day += timedelta(days=7)
+        else:
+            day = date(day.year + day.month // 12, day.month % 12 + 1, 1)
+    return labels
+
+
+def shape_series(rows, metrics, start, end, bucket):
+    """
+    Chart-ready series from (metric, day, dimension, total) rows: a label
+    per bucket and, per metric, a zero-filled list of counts for the total
+    and for each dimension value seen.
+    """
+    labels = bucket_labels(start, end, bucket)
+    position = {label: i for i, label in enumerate(labels)}
+    series = {metric: {TOTAL: [0] * len(labels)} for metric in metrics}
+    for metric, day, dimension, total in rows:
+        i = position[bucket_start(day, bucket)]
+        metric_series = series[metric]
+        metric_series[TOTAL][i] += total
+        if dimension:
+            if dimension not in metric_series:
+                metric_series[dimension] = [0] * len(labels)
+            metric_series[dimension][i] += total
+    return {
+        "bucket": bucket,
+        "from": start.isoformat(),
+        "to": end.isoformat(),
+        "labels": [label.isoformat() for label in labels],
+        "metrics": series
+    }
+
+
+LIST_ROLLUPS = statement("analytics.list_rollups", """
+    SELECT metric, day, dimension, total FROM daily_rollups
+    WHERE metric IN :metrics AND day BETWEEN :start AND :end
+""", bindparam("metrics", expanding=True))
+
+
+def time_series(conn, metrics, start, end, bucket="day"):
+    """Counts of `metrics` per bucket for the days `start`..`end` (inclusive)"""
+    rows = conn.execute(LIST_ROLLUPS, {"metrics": list(metrics), "start": start, "end": end})
+    return shape_series(rows, metrics, start, end, bucket)
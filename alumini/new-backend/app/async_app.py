@@ -0,0 +1,203 @@
+"""
+Async serving mode.
+
+create_asgi_app() wraps the Flask app in an ASGI application for uvicorn
+(see asgi.py). The read-heavy endpoints below are served natively on
+SQLAlchemy's async engine with aiomysql, so a waiting query parks a
+coroutine instead of a worker thread. Every other route falls through to the
+regular Flask app via asgiref's WsgiToAsgi, which runs it in a thread.
+
+The async handlers reuse the SQL and row serializers of the sync routes, so
+both modes return identical JSON.
+"""
+import json
+import math
+import re
+
+import jwt
+from asgiref.wsgi import WsgiToAsgi
+from sqlalchemy.ext.asyncio import create_async_engine
+from . import create_app, revocation
+from .config import get_config
+from .ratelimit import get_limiter
+from .routes.messages import LIST_MESSAGES, serialize_message
+from .routes.opportunities import LIST_OPPORTUNITIES, serialize_opportunity
+from .routes.scholarships import LIST_SCHOLARSHIPS, serialize_scholarship
+from .routes.stories import LIST_STORIES, serialize_story
+from .routes.users import GET_USER, serialize_user
+
+
+_async_engine = None
+
+
+def get_async_engine():
+    global _async_engine
+    if _async_engine is None:
+        cfg = get_config()
+        _async_engine = create_async_engine(
+            cfg["SQLALCHEMY_ASYNC_DATABASE_URI"],
+            pool_pre_ping=True,
+            pool_size=cfg["ASYNC_POOL_SIZE"],
+            max_overflow=cfg["ASYNC_POOL_SIZE"],
+        )
+    return _async_engine
+
+
+def bearer_identity(scope):
+    """
+    Return the JWT identity (user id) from the Authorization header, or None
+    for a missing, invalid, non-access or revoked token (the same checks as
+    the Flask routes' JWTManager)
+    """
+    for name, value in scope["headers"]:
+        if name == b"authorization" and value.startswith(b"Bearer "):
+            try:
+                claims = jwt.decode(value[7:].decode(), get_config()["JWT_SECRET_KEY"], algorithms=["HS256"])
+            except jwt.PyJWTError:
+                return None
+            if claims.get("type", "access") != "access" or revocation.is_revoked(claims):
+                return None
+            return claims.get("sub")
+    return None
+
+
+async def list_opportunities(scope):
+    async with get_async_engine().connect() as conn:
+        result = await conn.execute(LIST_OPPORTUNITIES)
+        return 200, [serialize_opportunity(row) for row in result]
+
+
+async def list_stories(scope):
+    async with get_async_engine().connect() as conn:
+        result = await conn.execute(LIST_STORIES)
+        return 200, [serialize_story(row) for row in result]
+
+
+async def list_scholarships(scope):
+    async with get_async_engine().connect() as conn:
+        result = await conn.execute(LIST_SCHOLARSHIPS)
+        return 200, [serialize_scholarship(row) for row in result]
+
+
+async def list_messages(scope):
+    identity = bearer_identity(scope)
+    if identity is None:
+        return 401, {"msg": "Missing or invalid Authorization Header"}
+    user_id = int(identity)
+
+    async with get_async_engine().connect() as conn:
+        result = await conn.execute(LIST_MESSAGES, {"user_id": user_id})
+        return 200, [serialize_message(row, user_id) for row in result]
+
+
+async def get_user(scope, user_id):
+    async with get_async_engine().connect() as conn:
+        result = await conn.execute(GET_USER, {"user_id": int(user_id)})
+        user = result.fetchone()
+        if not user:
+            return 404, {"error": "User not found"}
+        return 200, serialize_user(user)
+
+
+# (path, handler, Flask endpoint it stands in for, for rate limiting)
+ASYNC_ROUTES = [
+    (re.compile(r"^/api/opportunities/?$"), list_opportunities, "opportunities.list_opportunities"),
+    (re.compile(r"^/api/stories/?$"), list_stories, "stories.list_stories"),
+    (re.compile(r"^/api/scholarships/?$"), list_scholarships, "scholarships.list_scholarships"),
+    (re.compile(r"^/api/messages/?$"), list_messages, "messages.list_messages"),
+    (re.compile(r"^/api/users/(?P<user_id>\d+)$"), get_user, "users.get_user"),
+]
+
+
+def match_async_route(scope):
+    if scope["type"] != "http" or scope["method"] != "GET":
+        return None, None, None
+    for pattern, handler, endpoint in ASYNC_ROUTES:
+        match = pattern.match(scope["path"])
+        if match:
+            return handler, match.groupdict(), endpoint
+    return None, None, None
+
+
+def client_address(scope):
+    """The client IP, taken from X-Forwarded-For as ProxyFix does when TRUSTED_PROXY_HOPS is set"""
+    hops = get_config()["TRUSTED_PROXY_HOPS"]
+    if hops > 0:
+        for name, value in scope["headers"]:
+            if name == b"x-forwarded-for":
+                forwarded = [part.strip() for part in value.decode().split(",")]
+                if len(forwarded) >= hops:
+                    return forwarded[-hops]
+    return scope["client"][0] if scope.get("client") else None
+
+
+def client_key(scope):
+    """Rate-limit key, as ratelimit.client_key() builds it for Flask requests"""
+    identity = bearer_identity(scope)
+    if identity is not None:
+        return f"user:{identity}"
+    return f"ip:{client_address(scope)}"
+
+
+def cors_headers(scope, origins):
+    """Mirror the Flask-CORS policy configured in create_app()"""
+    for name, value in scope["headers"]:
+        if name == b"origin" and value.decode() in origins:
+            return [
+                (b"access-control-allow-origin", value),
+                (b"access-control-allow-credentials", b"true"),
+                (b"access-control-expose-headers", b"Retry-After"),
+                (b"vary", b"Origin"),
+            ]
+    return []
+
+
+class AsyncApp:
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        self.fallback = WsgiToAsgi(flask_app)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self.lifespan(receive, send)
+            return
+
+        handler, args, endpoint = match_async_route(scope)
+        if handler is None:
+            await self.fallback(scope, receive, send)
+            return
+
+        extra_headers = []
+        retry_after = get_limiter().check(endpoint, client_key(scope))
+        if retry_after:
+            seconds = max(1, math.ceil(retry_after))
+            status, payload = 429, {"error": f"Too many requests, retry in {seconds} seconds"}
+            extra_headers.append((b"retry-after", str(seconds).encode()))
+        else:
+            try:
+                status, payload = await handler(scope, **args)
+            except Exception as e:
+                status, payload = 500, {"error": str(e)}
+
+        body = json.dumps(payload).encode()
+        headers = [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+        ] + extra_headers + cors_headers(scope, self.flask_app.config["CORS_ORIGINS"])
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if _async_engine is not None:
+                    await _async_engine.dispose()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+
+def create_asgi_app():
+    return AsyncApp(create_app())
@@ -1,6 +1,13 @@
 from flask_jwt_extended import get_jwt_identity
 from .models import get_engine
-from sqlalchemy import text
+from .statements import statement
+
+
+GET_CURRENT_USER = statement("auth_helpers.get_current_user", """
+    SELECT id, email, name, role, graduation_year, major, company, position,
+           cgpa, reservation_category, is_lateral_entry
+    FROM users WHERE id = :user_id
+""")
 
 
 def get_current_user():
@@ -19,11 +26,7 @@ def get_current_user():
     engine = get_engine()
     try:
         with engine.connect() as conn:
-            result = conn.execute(text("""
-                SELECT id, email, name, role, graduation_year, major, company, position,
-                       cgpa, reservation_category, is_lateral_entry
-                FROM users WHERE id = :user_id
-            """), {"user_id": user_id})
+            result = conn.execute(GET_CURRENT_USER, {"user_id": user_id})
             
             user = result.fetchone()
             if not user:
@@ -0,0 +1,72 @@
+"""
+Small in-process TTL cache for read-mostly responses.
+
+Entries live only in the current worker process. Writers call invalidate()
+with the URL prefix they affect; other workers converge within the TTL.
+"""
+import threading
+import time
+
+
+class TTLCache:
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            self._entries.pop(key, None)
+            return None
+        return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                # Drop the entry closest to expiry to make room
+                oldest = min(self._entries, key=lambda k: self._entries[k][0])
+                self._entries.pop(oldest, None)
+            self._entries[key] = (time.monotonic() + ttl, value)
+
+    def invalidate(self, prefix=""):
+        """Drop every entry whose key starts with `prefix`"""
+        with self._lock:
+            for key in [k for k in self._entries if k.startswith(prefix)]:
+                del self._entries[key]
+
+
+response_cache = TTLCache()
+
+# Public GET endpoints whose response does not depend on who is asking.
+# Their responses (whole HTTP responses, and /api/batch parts) are cached
+# briefly; writers invalidate the matching URL prefix in response_cache.
+# STREAMED_ENDPOINTS are the exception: their bodies are streamed from the
+# database (rows.json_rows), so only their batch parts are cached.
+CACHEABLE_ENDPOINTS = {
+    "feed.get_feed",
+    "opportunities.list_opportunities",
+    "opportunities.get_opportunity",
+    "opportunities.list_changed_opportunities",
+    "stories.list_stories",
+    "stories.get_story",
+    "stories.list_changed_stories",
+    "scholarships.list_scholarships",
+    "scholarships.list_changed_scholarships",
+    "users.list_users",
+    "users.list_alumni",
+    "users.list_students",
+    "users.get_user",
+    "users.suggest_skills",
+    "users.list_skill_users",
+    "mentorship.list_available_mentors",
+}
+
+STREAMED_ENDPOINTS = {
+    "users.list_users",
+    "users.list_alumni",
+    "users.list_students",
+}
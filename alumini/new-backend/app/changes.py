@@ -0,0 +1,116 @@
+"""
+Incremental sync ("changes since") for client-side caches.
+
+`GET /api/<resource>/changes?since=<watermark>` returns the rows of a list
+endpoint created or updated since the watermark, and the ids that left the
+list since then (rows deactivated, and deletions recorded in `tombstones`):
+
+    {"full": false, "changes": [...], "deleted": [3, 7], "since": "<next watermark>"}
+
+Without `since`, or with one older than TOMBSTONE_RETENTION_DAYS, the whole
+list comes back with "full": true and the client replaces its cache.
+
+The next watermark is the newest updated_at / deleted_at in the response
+minus SYNC_OVERLAP_SECONDS. Taking it from the rows rather than the clock
+keeps it safe on a lagging replica, and the overlap covers transactions
+that commit a little after their timestamp. Rows inside the overlap are
+sent again, so clients merge by id.
+"""
+from datetime import datetime, timedelta, timezone
+
+from flask import jsonify, request
+from .config import get_config
+from .jobs import job
+from .models import get_engine, read_connection
+from .statements import statement
+
+
+# Before any row's updated_at: "changes since" this is the whole list
+EPOCH = datetime(1970, 1, 2)
+
+LIST_TOMBSTONES = statement("changes.list_tombstones", """
+    SELECT item_id, deleted_at FROM tombstones
+    WHERE resource = :resource AND deleted_at >= :since
+""")
+
+
+def parse_since(value):
+    """
+    Watermark from ?since=, None for a full sync; ValueError if malformed.
+    One with a timezone (e.g. JavaScript's toISOString(), ending in Z) is
+    converted to naive UTC, like the watermarks handed out.
+    """
+    if not value:
+        return None
+    since = datetime.fromisoformat(value)
+    if since.tzinfo is not None:
+        since = since.astimezone(timezone.utc).replace(tzinfo=None)
+    return since
+
+
+def changes_response(resource, changed_query, serialize, *keys, params=None):
+    """
+    Delta of one list resource.
+
+    `changed_query` selects the list's columns plus `updated_at` and
+    `is_listed` (whether the row still belongs in the list) for every row
+    with updated_at >= :since; `serialize` turns a row into the list's JSON.
+    `keys` are passed to read_connection and `params` to the query (e.g. to
+    scope it to the caller). Raises ValueError for a bad since.
+    """
+    cfg = get_config()
+    since = parse_since(request.args.get("since"))
+    full = since is None or since < datetime.now() - timedelta(days=cfg["TOMBSTONE_RETENTION_DAYS"])
+
+    changes, deleted, newest = [], [], None if full else since
+    with read_connection(*keys) as conn:
+        for row in conn.execute(changed_query, {**(params or {}), "since": EPOCH if full else since}):
+            if row.is_listed:
+                changes.append(serialize(row))
+            elif not full:
+                deleted.append(row.id)
+            if row.updated_at and (newest is None or row.updated_at > newest):
+                newest = row.updated_at
+        if not full:
+            for row in conn.execute(LIST_TOMBSTONES, {"resource": resource, "since": since}):
+                deleted.append(row.item_id)
+                if newest is None or row.deleted_at > newest:
+                    newest = row.deleted_at
+
+    watermark = None
+    if newest is not None:
+        watermark = newest - timedelta(seconds=cfg["SYNC_OVERLAP_SECONDS"])
+        if not full:
+            watermark = max(watermark, since)
+
+    return jsonify({
+        "full": full,
+        "changes": changes,
+        "deleted": deleted,
+        "since": watermark.isoformat() if watermark else None
+    }), 200
+
+
+TOMBSTONE_PURGE_BATCH_SIZE = 1000
+
+DELETE_OLD_TOMBSTONES = statement("changes.delete_old_tombstones", """
+    DELETE FROM tombstones
+    WHERE deleted_at < NOW() - INTERVAL :retention_days DAY
+    LIMIT :batch_size
+""")
+
+
+@job("purge_tombstones", every=86400)
+def purge_tombstones_job(payload):
+    """Drop tombstones past retention; clients that old get a full sync instead"""
+    cfg = get_config()
+    deleted = 0
+    while True:
+        with get_engine().begin() as conn:
+            count = conn.execute(DELETE_OLD_TOMBSTONES, {
+                "retention_days": cfg["TOMBSTONE_RETENTION_DAYS"],
+                "batch_size": TOMBSTONE_PURGE_BATCH_SIZE
+            }).rowcount
+        deleted += count
+        if count < TOMBSTONE_PURGE_BATCH_SIZE:
+            return {"deleted": deleted}
@@ -0,0 +1,155 @@
+"""
+Response compression.
+
+init_compression() negotiates Content-Encoding for every compressible
+response: brotli and zstd when the `brotli` / `zstandard` packages are
+installed, gzip always. Bodies under COMPRESS_MIN_SIZE are sent as-is.
+Streamed bodies (rows.json_rows, bulk exports) are compressed chunk by chunk
+with a flush after each one, so clients still receive them progressively.
+
+GET responses of the public CACHEABLE_ENDPOINTS are also kept in
+response_cache, already encoded, under "<path>#<encoding>". A hit is
+answered before the view runs, with no JSON encoding or compression.
+Writers' existing response_cache.invalidate(<path prefix>) calls drop
+these entries too. STREAMED_ENDPOINTS are left out: a streamed body is
+never held whole, so they are cached only as /api/batch parts.
+"""
+import zlib
+
+from flask import Response, g, request
+from .cache import CACHEABLE_ENDPOINTS, STREAMED_ENDPOINTS, response_cache
+from .config import get_config
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+COMPRESSIBLE_TYPES = (
+    "application/json", "application/x-ndjson", "application/javascript", "text/",
+)
+
+
+def _gzip_compressor(level):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return (lambda chunk: compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH),
+            compressor.flush)
+
+
+def _brotli_compressor(level):
+    compressor = brotli.Compressor(quality=min(level, 11))
+    return (lambda chunk: compressor.process(chunk) + compressor.flush(),
+            compressor.finish)
+
+
+def _zstd_compressor(level):
+    compressor = zstandard.ZstdCompressor(level=level).compressobj()
+    return (lambda chunk: compressor.compress(chunk) + compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK),
+            compressor.flush)
+
+
+# Server preference order, used to break ties between equally weighted encodings
+ENCODERS = {}
+if brotli is not None:
+    ENCODERS["br"] = _brotli_compressor
+if zstandard is not None:
+    ENCODERS["zstd"] = _zstd_compressor
+ENCODERS["gzip"] = _gzip_compressor
+
+
+def negotiate_encoding():
+    """Best encoding the client accepts, or None for identity"""
+    accepted = request.accept_encodings
+    best, best_quality = None, 0
+    for encoding in ENCODERS:
+        quality = accepted[encoding]
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(data, encoding):
+    compress_chunk, finish = ENCODERS[encoding](get_config()["COMPRESS_LEVEL"][encoding])
+    return compress_chunk(data) + finish()
+
+
+def compress_stream(chunks, encoding):
+    compress_chunk, finish = ENCODERS[encoding](get_config()["COMPRESS_LEVEL"][encoding])
+    for chunk in chunks:
+        data = compress_chunk(chunk)
+        if data:
+            yield data
+    yield finish()
+
+
+def is_compressible(response):
+    return (
+        200 <= response.status_code < 300
+        and response.status_code != 204
+        and not response.direct_passthrough
+        and "Content-Encoding" not in response.headers
+        and (response.mimetype.startswith(COMPRESSIBLE_TYPES) or response.mimetype.endswith("+json"))
+    )
+
+
+# Endpoints whose whole responses are cached
+WHOLE_RESPONSE_ENDPOINTS = CACHEABLE_ENDPOINTS - STREAMED_ENDPOINTS
+
+
+def cache_key(encoding):
+    return f"{request.full_path.rstrip('?')}#{encoding or 'identity'}"
+
+
+def serve_cached():
+    if request.method != "GET" or request.endpoint not in WHOLE_RESPONSE_ENDPOINTS:
+        return None
+    encoding = negotiate_encoding()
+    entry = response_cache.get(cache_key(encoding))
+    if entry is None:
+        return None
+
+    body, mimetype, content_encoding = entry
+    response = Response(body, mimetype=mimetype)
+    if content_encoding:
+        response.headers["Content-Encoding"] = content_encoding
+    response.vary.add("Accept-Encoding")
+    g.served_from_cache = True
+    return response
+
+
+def compress_response(response):
+    if g.get("served_from_cache") or not is_compressible(response):
+        return response
+    response.vary.add("Accept-Encoding")
+
+    encoding = negotiate_encoding()
+    cfg = get_config()
+    if response.is_streamed:
+        if encoding:
+            response.response = compress_stream(response.iter_encoded(), encoding)
+            response.headers["Content-Encoding"] = encoding
+            response.headers.pop("Content-Length", None)
+        return response
+
+    data = response.get_data()
+    if encoding and len(data) >= cfg["COMPRESS_MIN_SIZE"]:
+        compressed = compress(data, encoding)
+        if len(compressed) < len(data):
+            response.set_data(compressed)
+            response.headers["Content-Encoding"] = encoding
+
+    if request.method == "GET" and request.endpoint in WHOLE_RESPONSE_ENDPOINTS and response.status_code == 200:
+        entry = (response.get_data(), response.mimetype, response.headers.get("Content-Encoding"))
+        response_cache.set(cache_key(encoding), entry, cfg["RESPONSE_CACHE_TTL"])
+    return response
+
+
+def init_compression(app):
+    app.before_request(serve_cached)
+    app.after_request(compress_response)
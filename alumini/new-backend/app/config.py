@@ -12,12 +12,130 @@ def get_config():
 
     return {
         "SQLALCHEMY_DATABASE_URI": f"mysql+pymysql://{db['user']}:{db['password']}@{db['host']}:{db['port']}/{db['name']}",
+        # Used by the async serving mode (asgi.py / app/async_app.py)
+        "SQLALCHEMY_ASYNC_DATABASE_URI": f"mysql+aiomysql://{db['user']}:{db['password']}@{db['host']}:{db['port']}/{db['name']}",
+        "ASYNC_POOL_SIZE": int(os.getenv("ASYNC_POOL_SIZE", "20")),
         "SQLALCHEMY_TRACK_MODIFICATIONS": False,
+        # Read replicas: comma-separated SQLAlchemy URIs; empty means read from the primary
+        "SQLALCHEMY_REPLICA_URIS": [uri for uri in os.getenv("DB_REPLICA_URIS", "").split(",") if uri],
+        "REPLICA_STICKY_SECONDS": float(os.getenv("REPLICA_STICKY_SECONDS", "5")),
+        "REPLICA_RETRY_SECONDS": float(os.getenv("REPLICA_RETRY_SECONDS", "30")),
+        # Connect to the databases in the background at startup (see models.warm_up)
+        "DB_WARM_UP": os.getenv("DB_WARM_UP", "1") == "1",
+        # /api/health/ready reads a probe refreshed every HEALTH_PROBE_INTERVAL seconds
+        # (0 disables the checker and probes on each health request); it fails once the request pool reaches
+        # HEALTH_MAX_POOL_SATURATION, and replicas further behind than
+        # REPLICA_MAX_LAG_SECONDS are taken out of read rotation
+        "HEALTH_PROBE_INTERVAL": float(os.getenv("HEALTH_PROBE_INTERVAL", "5")),
+        "HEALTH_MAX_POOL_SATURATION": float(os.getenv("HEALTH_MAX_POOL_SATURATION", "1.0")),
+        "REPLICA_MAX_LAG_SECONDS": float(os.getenv("REPLICA_MAX_LAG_SECONDS", "30")),
+        "CORS_ORIGINS": os.getenv("CORS_ORIGINS", "http://localhost:5173,http://localhost:3000").split(","),
         "SECRET_KEY": os.getenv("SECRET_KEY", "dev-secret"),
         "JWT_SECRET_KEY": os.getenv("JWT_SECRET_KEY", "jwt-secret"),
+        # Token lifetimes in seconds: access tokens stay short and are renewed
+        # through POST /api/auth/refresh; revocations are kept the longer of the two
+        "JWT_ACCESS_TOKEN_EXPIRES": int(os.getenv("JWT_ACCESS_TOKEN_EXPIRES", "900")),
+        "JWT_REFRESH_TOKEN_EXPIRES": int(os.getenv("JWT_REFRESH_TOKEN_EXPIRES", "2592000")),
+        # Seconds a profile returned by /api/auth/refresh is cached
+        "PROFILE_CACHE_SECONDS": int(os.getenv("PROFILE_CACHE_SECONDS", "60")),
         # Bootstrap admin credential (single admin account)
         "ADMIN_EMAIL": os.getenv("ADMIN_EMAIL", "admin@alumni.local"),
         "ADMIN_PASSWORD": os.getenv("ADMIN_PASSWORD", "ChangeMe123!"),
+        # Rows deleted per transaction when an admin kicks a user
+        "KICK_DELETE_BATCH_SIZE": int(os.getenv("KICK_DELETE_BATCH_SIZE", "1000")),
+        # Background job queue (see app/jobs.py); JOB_WORKERS=0 disables workers in this process
+        "JOB_WORKERS": int(os.getenv("JOB_WORKERS", "2")),
+        "JOB_POLL_INTERVAL": float(os.getenv("JOB_POLL_INTERVAL", "1.0")),
+        "JOB_MAX_ATTEMPTS": int(os.getenv("JOB_MAX_ATTEMPTS", "5")),
+        "JOB_RETRY_BACKOFF": int(os.getenv("JOB_RETRY_BACKOFF", "2")),
+        "JOB_LEASE_SECONDS": int(os.getenv("JOB_LEASE_SECONDS", "300")),
+        "JOB_RETENTION_DAYS": int(os.getenv("JOB_RETENTION_DAYS", "7")),
+        # Seconds a platform stats snapshot is served before a refresh job is queued
+        "STATS_MAX_AGE": int(os.getenv("STATS_MAX_AGE", "60")),
+        # bcrypt cost of passwords set at registration (and of imported ones after first login)
+        "BCRYPT_ROUNDS": int(os.getenv("BCRYPT_ROUNDS", "12")),
+        # Admin bulk import: rows per multi-row INSERT, bcrypt hashing threads and
+        # the (cheaper) bcrypt cost of imported passwords, raised at first login
+        "BULK_BATCH_SIZE": int(os.getenv("BULK_BATCH_SIZE", "500")),
+        "BULK_HASH_WORKERS": int(os.getenv("BULK_HASH_WORKERS", str(os.cpu_count() or 4))),
+        "BULK_BCRYPT_ROUNDS": int(os.getenv("BULK_BCRYPT_ROUNDS", "8")),
+        # /api/batch: concurrent sub-requests, parts per call, cache TTL for public parts
+        "BATCH_WORKERS": int(os.getenv("BATCH_WORKERS", "4")),
+        "BATCH_MAX_PARTS": int(os.getenv("BATCH_MAX_PARTS", "10")),
+        "BATCH_CACHE_TTL": int(os.getenv("BATCH_CACHE_TTL", "5")),
+        # Items kept per type in the denormalised home_feed table
+        "HOME_FEED_SIZE": int(os.getenv("HOME_FEED_SIZE", "50")),
+        # Expired scholarships are deactivated every SCHOLARSHIP_SWEEP_INTERVAL seconds,
+        # SCHOLARSHIP_SWEEP_BATCH_SIZE rows per transaction
+        "SCHOLARSHIP_SWEEP_INTERVAL": int(os.getenv("SCHOLARSHIP_SWEEP_INTERVAL", "3600")),
+        "SCHOLARSHIP_SWEEP_BATCH_SIZE": int(os.getenv("SCHOLARSHIP_SWEEP_BATCH_SIZE", "500")),
+        # Mentorship: the most open mentees an alumnus may take on, how many
+        # alternative mentors a full mentor's 409 suggests, inbox/outbox pages
+        "MENTOR_MAX_CAPACITY": int(os.getenv("MENTOR_MAX_CAPACITY", "20")),
+        "MENTOR_SUGGESTIONS": int(os.getenv("MENTOR_SUGGESTIONS", "5")),
+        "MENTORSHIP_PAGE_SIZE": int(os.getenv("MENTORSHIP_PAGE_SIZE", "20")),
+        "MENTORSHIP_MAX_PAGE_SIZE": int(os.getenv("MENTORSHIP_MAX_PAGE_SIZE", "100")),
+        # Alumni directory: seconds between catch-up syncs of the in-memory
+        # facet index, values shown per facet, page sizes
+        "DIRECTORY_REFRESH_SECONDS": int(os.getenv("DIRECTORY_REFRESH_SECONDS", "30")),
+        "DIRECTORY_FACET_VALUES": int(os.getenv("DIRECTORY_FACET_VALUES", "20")),
+        "DIRECTORY_PAGE_SIZE": int(os.getenv("DIRECTORY_PAGE_SIZE", "20")),
+        "DIRECTORY_MAX_PAGE_SIZE": int(os.getenv("DIRECTORY_MAX_PAGE_SIZE", "100")),
+        # Skills taxonomy: "who knows X" pages, autocomplete suggestions,
+        # rows re-tokenized per backfill transaction
+        "SKILL_PAGE_SIZE": int(os.getenv("SKILL_PAGE_SIZE", "20")),
+        "SKILL_MAX_PAGE_SIZE": int(os.getenv("SKILL_MAX_PAGE_SIZE", "100")),
+        "SKILL_SUGGESTIONS": int(os.getenv("SKILL_SUGGESTIONS", "10")),
+        "SKILLS_BACKFILL_BATCH_SIZE": int(os.getenv("SKILLS_BACKFILL_BATCH_SIZE", "500")),
+        # Analytics rollups: seconds between aggregator runs, how old a row
+        # must be before it is counted, source rows per transaction, and the
+        # default and longest range of GET /api/admin/analytics
+        "ROLLUP_INTERVAL": int(os.getenv("ROLLUP_INTERVAL", "300")),
+        "ROLLUP_SETTLE_SECONDS": int(os.getenv("ROLLUP_SETTLE_SECONDS", "60")),
+        "ROLLUP_BATCH_SIZE": int(os.getenv("ROLLUP_BATCH_SIZE", "5000")),
+        "ANALYTICS_DEFAULT_DAYS": int(os.getenv("ANALYTICS_DEFAULT_DAYS", "30")),
+        "ANALYTICS_MAX_DAYS": int(os.getenv("ANALYTICS_MAX_DAYS", "3660")),
+        # Engagement sketches: seconds between flushes of each process's
+        # deltas, the longest window the admin endpoints merge, default
+        # top-k size, and days of sketches kept
+        "SKETCH_FLUSH_SECONDS": float(os.getenv("SKETCH_FLUSH_SECONDS", "10")),
+        "SKETCH_MAX_DAYS": int(os.getenv("SKETCH_MAX_DAYS", "90")),
+        "SKETCH_TOP_K": int(os.getenv("SKETCH_TOP_K", "10")),
+        "SKETCH_RETENTION_DAYS": int(os.getenv("SKETCH_RETENTION_DAYS", "400")),
+        # Token revocation: seconds between loads of revocations made by other
+        # processes (0 keeps logouts and kicks in the process that handled them;
+        # refresh token rotations are always checked in the database)
+        "REVOCATION_SYNC_SECONDS": float(os.getenv("REVOCATION_SYNC_SECONDS", "5")),
+        # /changes feeds: watermarks step back SYNC_OVERLAP_SECONDS to catch late commits;
+        # tombstones (and so incremental sync) reach back TOMBSTONE_RETENTION_DAYS
+        "SYNC_OVERLAP_SECONDS": int(os.getenv("SYNC_OVERLAP_SECONDS", "5")),
+        "TOMBSTONE_RETENTION_DAYS": int(os.getenv("TOMBSTONE_RETENTION_DAYS", "30")),
+        # Poster review queue: default and largest page, most applications per status update
+        "REVIEW_PAGE_SIZE": int(os.getenv("REVIEW_PAGE_SIZE", "50")),
+        "REVIEW_MAX_PAGE_SIZE": int(os.getenv("REVIEW_MAX_PAGE_SIZE", "200")),
+        "REVIEW_MAX_BATCH": int(os.getenv("REVIEW_MAX_BATCH", "1000")),
+        # Rate limits (see app/ratelimit.py): "<count>/<second|minute|hour|day>" or "off".
+        # RATE_LIMITS overrides the default per endpoint or blueprint ("name=limit,...")
+        "RATE_LIMIT_DEFAULT": os.getenv("RATE_LIMIT_DEFAULT", "300/minute"),
+        "RATE_LIMITS": dict(rule.split("=", 1) for rule in os.getenv(
+            "RATE_LIMITS",
+            "auth.login=10/minute,auth.register=5/minute,users=60/minute,batch=30/minute,health=off"
+        ).split(",") if rule),
+        # Shares rate-limit buckets between workers and hosts; empty keeps them per process
+        "RATE_LIMIT_REDIS_URL": os.getenv("RATE_LIMIT_REDIS_URL", ""),
+        # Reverse proxies in front of the app (e.g. the Vite dev proxy) whose
+        # X-Forwarded-For / -Proto entries are trusted for the client address
+        "TRUSTED_PROXY_HOPS": int(os.getenv("TRUSTED_PROXY_HOPS", "0")),
+        # Response compression (see app/compression.py): bodies below COMPRESS_MIN_SIZE
+        # bytes are sent uncompressed; levels per encoding trade CPU for size
+        "COMPRESS_MIN_SIZE": int(os.getenv("COMPRESS_MIN_SIZE", "1024")),
+        "COMPRESS_LEVEL": {
+            "gzip": int(os.getenv("COMPRESS_GZIP_LEVEL", "6")),
+            "br": int(os.getenv("COMPRESS_BROTLI_LEVEL", "4")),
+            "zstd": int(os.getenv("COMPRESS_ZSTD_LEVEL", "3")),
+        },
+        # Seconds whole responses of public GET endpoints stay in the response cache
+        "RESPONSE_CACHE_TTL": int(os.getenv("RESPONSE_CACHE_TTL", "5")),
     }
 
 
@@ -0,0 +1,422 @@
+"""
+In-memory facet index of the alumni directory.
+
+Every alumnus gets a slot (a small integer, reused after removal) and every
+facet value (a graduation year, major, company, position or canonical
+skill from the taxonomy in app/skills.py) keeps a
+posting of the slots that have it. A posting is a plain set while it is
+small and a bitmap (a Python int, bit i for slot i) once it covers more
+than 1/DENSE_FRACTION of the slots: bitmaps intersect with one `&` and
+count with int.bit_count(), while the long tail of rare companies and
+skills stays cheap in memory. Filters with a small posting start from it
+and check each candidate's own values instead of building bitmaps.
+
+Values within one facet are OR-ed, facets are AND-ed. Facet counts are
+"live": each facet is counted against the filters on the other facets, so
+picking a major still shows how many alumni the other majors have.
+
+The index is built from the database on first use. Writes in this process
+(register, profile update, kick) expire it, and at most every
+DIRECTORY_REFRESH_SECONDS it pulls the users whose updated_at moved (of
+every role, so one who stops being an alumnus leaves the index) and the
+`users` tombstones, which also brings in writes made by other workers.
+"""
+import heapq
+import threading
+import time
+from collections import Counter
+from datetime import timedelta
+from operator import itemgetter
+
+from .changes import EPOCH, LIST_TOMBSTONES
+from .config import get_config
+from .models import read_connection
+from .statements import statement
+
+
+FACETS = ("graduation_year", "major", "company", "position", "skills")
+
+# Fields of a directory entry, as in GET /api/users/alumni; entries also
+# carry `canonical_skills`, the names the skills facet counts
+FIELDS = ("id", "name", "graduation_year", "major", "company", "position",
+          "bio", "skills", "mentor_capacity", "mentor_open_requests")
+
+DENSE_FRACTION = 256
+DENSE_MIN = 64
+
+# Above this many matches a page is found by walking the name order rather
+# than sorting the matches
+SORT_MAX = 4096
+
+# Filter combinations whose matches and facet counts are kept
+RESULT_CACHE_SIZE = 256
+
+
+def facet_key(facet, value):
+    """Normalised key of a facet value (None for blanks)"""
+    if value is None:
+        return None
+    if facet == "graduation_year":
+        return int(value)
+    value = " ".join(str(value).split())
+    return value.casefold() or None
+
+
+def facet_values(facet, row):
+    """(key, label) pairs of one alumnus for a facet"""
+    if facet == "skills":
+        labels = row["canonical_skills"]
+    else:
+        labels = [row[facet]]
+    pairs = {}
+    for label in labels:
+        key = facet_key(facet, label)
+        if key is not None:
+            pairs.setdefault(key, label.strip() if isinstance(label, str) else label)
+    return list(pairs.items())
+
+
+def to_bits(slots):
+    buf = bytearray((max(slots) >> 3) + 1 if slots else 0)
+    for slot in slots:
+        buf[slot >> 3] |= 1 << (slot & 7)
+    return int.from_bytes(buf, "little")
+
+
+def bit_slots(bits):
+    """Slots set in a bitmap, ascending"""
+    text = bin(bits)[:1:-1]
+    slot = text.find("1")
+    while slot != -1:
+        yield slot
+        slot = text.find("1", slot + 1)
+
+
+def bit_tester(bits):
+    """O(1) membership test for a bitmap (testing a big int itself is O(width))"""
+    data = bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+    size = len(data)
+    return lambda slot: (slot >> 3) < size and data[slot >> 3] >> (slot & 7) & 1
+
+
+def top_counts(counts, top):
+    """The `top` (value, count) pairs with the highest non-zero counts"""
+    return heapq.nlargest(top, (item for item in counts.items() if item[1]), key=itemgetter(1))
+
+
+class Posting:
+    """Slots holding one facet value: a set while small, a bitmap once large"""
+    __slots__ = ("slots", "bits", "count")
+
+    def __init__(self):
+        self.slots = set()
+        self.bits = None
+        self.count = 0
+
+    def add(self, slot):
+        self.count += 1
+        if self.bits is not None:
+            self.bits |= 1 << slot
+        else:
+            self.slots.add(slot)
+
+    def compact(self, capacity):
+        """Switch to a bitmap once the set is large for a directory of `capacity` slots"""
+        if self.bits is None and self.count > max(DENSE_MIN, capacity // DENSE_FRACTION):
+            self.bits, self.slots = to_bits(self.slots), None
+
+    def discard(self, slot):
+        self.count -= 1
+        if self.bits is not None:
+            self.bits &= ~(1 << slot)
+        else:
+            self.slots.discard(slot)
+
+    def as_bits(self):
+        return self.bits if self.bits is not None else to_bits(self.slots)
+
+
+class FacetIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.slot_of = {}
+        self.rows = []
+        self.keys = []
+        self.sort_keys = []
+        self.free = []
+        self.postings = {facet: {} for facet in FACETS}
+        self.labels = {facet: {} for facet in FACETS}
+        self._order = None
+        self._results = {}
+        self._unfiltered = {}
+
+    def __len__(self):
+        return len(self.slot_of)
+
+    def _add(self, row, touched):
+        slot = self.free.pop() if self.free else len(self.rows)
+        if slot == len(self.rows):
+            self.rows.append(None)
+            self.keys.append(None)
+            self.sort_keys.append(None)
+        self.slot_of[row["id"]] = slot
+        self.rows[slot] = row
+        self.sort_keys[slot] = ((row["name"] or "").casefold(), row["id"])
+        keys = {}
+        for facet in FACETS:
+            pairs = facet_values(facet, row)
+            keys[facet] = tuple(key for key, _ in pairs)
+            postings = self.postings[facet]
+            for key, label in pairs:
+                posting = postings.get(key)
+                if posting is None:
+                    posting = postings[key] = Posting()
+                    self.labels[facet][key] = label
+                posting.add(slot)
+                touched.add(posting)
+        self.keys[slot] = keys
+
+    def _remove(self, user_id):
+        slot = self.slot_of.pop(user_id, None)
+        if slot is None:
+            return
+        for facet, keys in self.keys[slot].items():
+            for key in keys:
+                posting = self.postings[facet][key]
+                posting.discard(slot)
+                if not posting.count:
+                    del self.postings[facet][key]
+                    del self.labels[facet][key]
+        self.rows[slot] = self.keys[slot] = self.sort_keys[slot] = None
+        self.free.append(slot)
+
+    def apply(self, rows=(), removed=()):
+        """Upsert alumni rows (dicts of FIELDS) and drop removed user ids"""
+        with self._lock:
+            removed = [user_id for user_id in removed if user_id in self.slot_of]
+            # Syncs overlap, so rows already indexed as they are come back
+            rows = [row for row in rows if row["id"] not in self.slot_of
+                    or self.rows[self.slot_of[row["id"]]] != row]
+            if not rows and not removed:
+                return
+            for user_id in removed:
+                self._remove(user_id)
+            touched = set()
+            for row in rows:
+                self._remove(row["id"])
+                self._add(row, touched)
+            # Sets grow first and turn into bitmaps once per batch, so a
+            # full build never grows a bitmap one bit at a time
+            for posting in touched:
+                posting.compact(len(self.rows))
+            self._order = None
+            self._results.clear()
+            self._unfiltered.clear()
+
+    # -- queries
+
+    def _select(self, facet, keys):
+        """Slots with any of `keys`: a set when every posting is a set, else a bitmap"""
+        postings = [self.postings[facet][key] for key in keys if key in self.postings[facet]]
+        if all(posting.bits is None for posting in postings):
+            return set().union(*(posting.slots for posting in postings))
+        bits = 0
+        for posting in postings:
+            bits |= posting.as_bits()
+        return bits
+
+    def _match(self, filters, skip=None):
+        """Slots matching every filter but `skip`'s: None (everyone), a set or a bitmap"""
+        filters = {facet: keys for facet, keys in filters.items() if facet != skip}
+        if not filters:
+            return None
+        selections = {facet: self._select(facet, keys) for facet, keys in filters.items()}
+        small = [(len(slots), facet) for facet, slots in selections.items() if isinstance(slots, set)]
+        if small:
+            # Check the fewest candidates against their own values
+            _, start = min(small)
+            others = [(facet, set(keys)) for facet, keys in filters.items() if facet != start]
+            return {
+                slot for slot in selections[start]
+                if all(not wanted.isdisjoint(self.keys[slot][facet]) for facet, wanted in others)
+            }
+        bits = -1
+        for selection in selections.values():
+            bits &= selection
+        return bits
+
+    @staticmethod
+    def _size(match):
+        return match.bit_count() if isinstance(match, int) else len(match)
+
+    def _slots(self, match):
+        return list(bit_slots(match)) if isinstance(match, int) else list(match)
+
+    def _counts(self, facet, match, slots=None):
+        """{value: matches} for one facet; `slots` are the match's slots if already listed"""
+        postings = self.postings[facet]
+        if match is None:
+            return {key: posting.count for key, posting in postings.items()}
+        if slots is not None or isinstance(match, set) or self._size(match) <= 4 * len(postings):
+            # Tally the matches' own values
+            keys = self.keys
+            return Counter(key for slot in (slots or self._slots(match)) for key in keys[slot][facet])
+        contains = bit_tester(match)
+        counts = {}
+        for key, posting in postings.items():
+            if posting.bits is not None:
+                counts[key] = (posting.bits & match).bit_count()
+            else:
+                counts[key] = sum(1 for slot in posting.slots if contains(slot))
+        return counts
+
+    def _unfiltered_top(self, facet, top):
+        """A facet's most common values over the whole directory, kept until the index changes"""
+        best = self._unfiltered.get((facet, top))
+        if best is None:
+            best = self._unfiltered[(facet, top)] = top_counts(self._counts(facet, None), top)
+        return best
+
+    def _ordered(self):
+        """Every slot in name order"""
+        if self._order is None:
+            self._order = sorted(self.slot_of.values(), key=self.sort_keys.__getitem__)
+        return self._order
+
+    def _evaluate(self, filters, top):
+        match = self._match(filters)
+        total = len(self.slot_of) if match is None else self._size(match)
+        # Up to SORT_MAX matches are listed and sorted once; beyond that
+        # pages walk the name order
+        slots = self._slots(match) if match is not None and total <= SORT_MAX else None
+        facets = {}
+        for facet in FACETS:
+            base = self._match(filters, skip=facet) if facet in filters else match
+            if base is None:
+                best = self._unfiltered_top(facet, top)
+                count_of = lambda key: self.postings[facet][key].count if key in self.postings[facet] else 0
+            else:
+                counts = self._counts(facet, base, None if facet in filters else slots)
+                best = top_counts(counts, top)
+                count_of = lambda key: counts.get(key, 0)
+            shown = {key for key, _ in best}
+            best = best + [(key, count_of(key)) for key in filters.get(facet, ()) if key not in shown]
+            facets[facet] = [{"value": self.labels[facet].get(key, key), "count": count} for key, count in best]
+        if slots is not None:
+            slots.sort(key=self.sort_keys.__getitem__)
+        return {"match": match, "total": total, "sorted": slots, "facets": facets}
+
+    def _page(self, result, offset, limit):
+        if result["sorted"] is not None:
+            return result["sorted"][offset:offset + limit]
+        if result["match"] is None:
+            return self._ordered()[offset:offset + limit]
+        match = result["match"]
+        # A large match is a set when it came from many small postings of one facet
+        contains = match.__contains__ if isinstance(match, set) else bit_tester(match)
+        page, skipped = [], 0
+        for slot in self._ordered():
+            if contains(slot):
+                if skipped < offset:
+                    skipped += 1
+                    continue
+                page.append(slot)
+                if len(page) == limit:
+                    break
+        return page
+
+    def search(self, filters, offset=0, limit=20, top=20):
+        """
+        Alumni matching `filters` ({facet: [values]}), sorted by name.
+
+        Returns {"total", "alumni" (the page), "facets"}: per facet the
+        `top` values with most matches (selected values always included)
+        as {"value", "count"}. Counts and matches are kept per filter
+        combination until the index next changes, so paging and repeated
+        queries only slice.
+        """
+        filters = {
+            facet: sorted({key for key in (facet_key(facet, value) for value in values) if key is not None})
+            for facet, values in filters.items() if facet in FACETS and values
+        }
+        cache_key = (top, tuple(sorted((facet, tuple(keys)) for facet, keys in filters.items())))
+        with self._lock:
+            result = self._results.pop(cache_key, None)
+            if result is None:
+                result = self._evaluate(filters, top)
+                if len(self._results) >= RESULT_CACHE_SIZE:
+                    del self._results[next(iter(self._results))]
+            # Re-inserted last: the dict is in least recently used order
+            self._results[cache_key] = result
+            return {
+                "total": result["total"],
+                "alumni": [self.rows[slot] for slot in self._page(result, offset, limit)],
+                "facets": result["facets"]
+            }
+
+
+LIST_CHANGED_USERS = statement("directory.list_changed_users", f"""
+    SELECT {", ".join(FIELDS)}, role, updated_at,
+           (SELECT GROUP_CONCAT(s.name ORDER BY s.name SEPARATOR ',')
+            FROM user_skills us JOIN skills s ON s.id = us.skill_id
+            WHERE us.user_id = users.id) AS canonical_skills
+    FROM users
+    WHERE updated_at >= :since
+""")
+
+_index = FacetIndex()
+_sync_lock = threading.Lock()
+_since = None
+_synced_at = None
+
+
+def sync():
+    """Pull users changed since the last sync (everyone on the first one)"""
+    global _since, _synced_at
+    started = time.monotonic()
+    newest = _since
+    rows, removed = [], []
+    with read_connection("users") as conn:
+        for row in conn.execute(LIST_CHANGED_USERS, {"since": _since or EPOCH}):
+            if row.updated_at and (newest is None or row.updated_at > newest):
+                newest = row.updated_at
+            if row.role != "alumni":
+                removed.append(row.id)
+                continue
+            entry = {field: getattr(row, field) for field in FIELDS}
+            entry["canonical_skills"] = row.canonical_skills.split(",") if row.canonical_skills else []
+            rows.append(entry)
+        if _since is not None:
+            for row in conn.execute(LIST_TOMBSTONES, {"resource": "users", "since": _since}):
+                removed.append(row.item_id)
+                if row.deleted_at > newest:
+                    newest = row.deleted_at
+    _index.apply(rows, removed)
+    # Sort the name order and count the unfiltered facets before the first query needs them
+    _index.search({}, limit=1, top=get_config()["DIRECTORY_FACET_VALUES"])
+    if newest is not None:
+        # Same overlap as the /changes feeds, for transactions committed late
+        _since = max(newest - timedelta(seconds=get_config()["SYNC_OVERLAP_SECONDS"]), _since or EPOCH)
+    _synced_at = started
+
+
+def expire():
+    """Make the next directory query sync first (after a local write)"""
+    global _synced_at
+    if _synced_at is not None:
+        _synced_at = 0
+
+
+def get_index():
+    """The facet index, synced if DIRECTORY_REFRESH_SECONDS have passed"""
+    stale = _synced_at is None or time.monotonic() - _synced_at >= get_config()["DIRECTORY_REFRESH_SECONDS"]
+    if stale:
+        # Queries keep using the current index while another thread syncs,
+        # except before the first build
+        if _sync_lock.acquire(blocking=_synced_at is None):
+            try:
+                if _synced_at is None or time.monotonic() - _synced_at >= get_config()["DIRECTORY_REFRESH_SECONDS"]:
+                    sync()
+            finally:
+                _sync_lock.release()
+    return _index
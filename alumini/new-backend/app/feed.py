@@ -0,0 +1,112 @@
+"""
+Maintenance of the denormalised `home_feed` table.
+
+Write routes call these helpers on their own connection, before commit, so
+the feed row lands in the same transaction as the item it mirrors. The
+table keeps the newest HOME_FEED_SIZE items per type, plus every featured
+one, with the author's name copied in, so the home page is served without
+joining `users`.
+"""
+from sqlalchemy import bindparam
+from .statements import statement
+from .cache import response_cache
+from .config import get_config
+
+
+UPSERT_FEED_ITEM = statement("feed.upsert_feed_item", """
+    INSERT INTO home_feed (item_type, item_id, title, subtitle, tag, summary,
+                           author_id, author_name, is_featured)
+    VALUES (:item_type, :item_id, :title, :subtitle, :tag, :summary,
+            :author_id, :author_name, :is_featured)
+    ON DUPLICATE KEY UPDATE
+        title = VALUES(title), subtitle = VALUES(subtitle), tag = VALUES(tag),
+        summary = VALUES(summary), is_featured = VALUES(is_featured)
+""")
+
+# Featured items are never trimmed: the stories section lists them first
+TRIM_FEED = statement("feed.trim_feed", """
+    DELETE FROM home_feed
+    WHERE item_type = :item_type AND is_featured = FALSE AND created_at < (
+        SELECT created_at FROM (
+            SELECT created_at FROM home_feed
+            WHERE item_type = :item_type AND is_featured = FALSE
+            ORDER BY created_at DESC
+            LIMIT 1 OFFSET :keep
+        ) AS oldest_kept
+    )
+""")
+
+
+def trim(conn, item_type):
+    """Drop the items of a type past the newest HOME_FEED_SIZE (featured ones stay)"""
+    conn.execute(TRIM_FEED, {"item_type": item_type, "keep": get_config()["HOME_FEED_SIZE"] - 1})
+
+
+def add_item(conn, item_type, item_id, title, author_id, author_name,
+             subtitle=None, tag=None, summary=None, is_featured=False):
+    """Insert (or refresh the content of) a feed item and trim its type to HOME_FEED_SIZE"""
+    conn.execute(UPSERT_FEED_ITEM, {
+        "item_type": item_type,
+        "item_id": item_id,
+        "title": title,
+        "subtitle": None if subtitle is None else str(subtitle),
+        "tag": None if tag is None else str(tag),
+        "summary": summary[:300] if summary else None,
+        "author_id": author_id,
+        "author_name": author_name,
+        "is_featured": bool(is_featured)
+    })
+
+    trim(conn, item_type)
+    response_cache.invalidate("/api/feed")
+
+
+ADD_RECENT_OPPORTUNITIES = statement("feed.add_recent_opportunities", """
+    INSERT INTO home_feed (item_type, item_id, title, subtitle, tag, summary,
+                           author_id, author_name, is_featured, created_at)
+    SELECT 'opportunity', o.id, o.title, o.company, o.type, LEFT(o.description, 300),
+           o.posted_by, u.name, FALSE, o.created_at
+    FROM opportunities o LEFT JOIN users u ON o.posted_by = u.id
+    WHERE o.is_active = TRUE AND o.created_at >= :since
+    ORDER BY o.created_at DESC, o.id DESC
+    LIMIT :limit
+    ON DUPLICATE KEY UPDATE title = VALUES(title)
+""")
+
+
+def add_recent_opportunities(conn, since):
+    """Add the newest opportunities created since `since` (e.g. by a bulk import) and trim"""
+    conn.execute(ADD_RECENT_OPPORTUNITIES, {"since": since, "limit": get_config()["HOME_FEED_SIZE"]})
+    trim(conn, "opportunity")
+    response_cache.invalidate("/api/feed")
+
+
+DELETE_FEED_ITEM = statement("feed.delete_feed_item", """
+    DELETE FROM home_feed WHERE item_type = :item_type AND item_id = :item_id
+""")
+
+
+def remove_item(conn, item_type, item_id):
+    conn.execute(DELETE_FEED_ITEM, {"item_type": item_type, "item_id": item_id})
+    response_cache.invalidate("/api/feed")
+
+
+DELETE_FEED_ITEMS = statement("feed.delete_feed_items", """
+    DELETE FROM home_feed WHERE item_type = :item_type AND item_id IN :item_ids
+""", bindparam("item_ids", expanding=True))
+
+
+def remove_items(conn, item_type, item_ids):
+    if item_ids:
+        conn.execute(DELETE_FEED_ITEMS, {"item_type": item_type, "item_ids": list(item_ids)})
+        response_cache.invalidate("/api/feed")
+
+
+RENAME_FEED_AUTHOR = statement("feed.rename_feed_author", """
+    UPDATE home_feed SET author_name = :author_name WHERE author_id = :author_id
+""")
+
+
+def rename_author(conn, author_id, author_name):
+    conn.execute(RENAME_FEED_AUTHOR, {"author_id": author_id, "author_name": author_name})
+    response_cache.invalidate("/api/feed")
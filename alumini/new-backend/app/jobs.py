@@ -0,0 +1,292 @@
+"""
+In-process background jobs backed by the `jobs` table.
+
+Routes call enqueue() to hand work off the request path. Worker threads
+started by start_workers() claim due rows with SELECT ... FOR UPDATE SKIP
+LOCKED, so any number of threads and processes can share the queue without
+an external broker. Failed jobs are retried with exponential backoff until
+max_attempts is reached. While a handler runs, its worker renews the job's
+lease every JOB_LEASE_SECONDS / 3, so only a job whose worker died is picked
+up again once its lease expires (or failed, if it has no attempts left).
+Handlers must be idempotent: that retry starts the job over.
+
+Handlers registered with `every=` seconds are also enqueued periodically by
+the workers. Each period has its own idempotency key, so however many
+processes run workers, a periodic job is queued once per period.
+"""
+import json
+import threading
+import time
+
+from .statements import statement
+from .config import get_config
+from .models import get_engine
+
+
+_handlers = {}
+_schedules = {}
+_workers = []
+_stop = threading.Event()
+
+
+def job(kind, every=None):
+    """Register the decorated function as the handler for jobs of this kind.
+
+    The handler receives the job payload (a dict) and returns a JSON
+    serialisable result that is stored on the job row. With `every`, the
+    job is also queued (with an empty payload) once every `every` seconds.
+    """
+    def decorator(func):
+        _handlers[kind] = func
+        if every:
+            _schedules[kind] = every
+        return func
+    return decorator
+
+
+ENQUEUE_JOB = statement("jobs.enqueue_job", """
+    INSERT INTO jobs (kind, payload, idempotency_key, max_attempts, run_after)
+    VALUES (:kind, :payload, :idempotency_key, :max_attempts,
+            NOW() + INTERVAL :delay SECOND)
+    ON DUPLICATE KEY UPDATE
+        id = LAST_INSERT_ID(id),
+        attempts = IF(status = 'failed', 0, attempts),
+        run_after = IF(status = 'failed', NOW(), run_after),
+        status = IF(status = 'failed', 'queued', status)
+""")
+
+
+def enqueue(kind, payload=None, idempotency_key=None, delay=0):
+    """Queue a job and return its id.
+
+    Enqueueing again with the same idempotency_key returns the existing job
+    instead of creating a new one; a job that had permanently failed is
+    queued to run again.
+    """
+    cfg = get_config()
+    with get_engine().begin() as conn:
+        result = conn.execute(ENQUEUE_JOB, {
+            "kind": kind,
+            "payload": json.dumps(payload or {}),
+            "idempotency_key": idempotency_key,
+            "max_attempts": cfg["JOB_MAX_ATTEMPTS"],
+            "delay": delay
+        })
+        return result.lastrowid
+
+
+GET_JOB = statement("jobs.get_job", """
+    SELECT id, kind, status, attempts, max_attempts, result, error,
+           run_after, created_at, finished_at
+    FROM jobs WHERE id = :job_id
+""")
+
+
+def get_job(job_id):
+    """Return a job as a dict, or None if it does not exist"""
+    with get_engine().connect() as conn:
+        row = conn.execute(GET_JOB, {"job_id": job_id}).fetchone()
+
+    if not row:
+        return None
+
+    return {
+        "id": row.id,
+        "kind": row.kind,
+        "status": row.status,
+        "attempts": row.attempts,
+        "max_attempts": row.max_attempts,
+        "result": json.loads(row.result) if row.result else None,
+        "error": row.error,
+        "run_after": row.run_after.isoformat() if row.run_after else None,
+        "created_at": row.created_at.isoformat() if row.created_at else None,
+        "finished_at": row.finished_at.isoformat() if row.finished_at else None
+    }
+
+
+LATEST_RESULT = statement("jobs.latest_result", """
+    SELECT result, TIMESTAMPDIFF(SECOND, finished_at, NOW()) AS age FROM jobs
+    WHERE kind = :kind AND status = 'succeeded'
+    ORDER BY id DESC LIMIT 1
+""")
+
+
+def latest_result(kind):
+    """Return (result, age in seconds) of the newest successful job of a kind"""
+    with get_engine().connect() as conn:
+        row = conn.execute(LATEST_RESULT, {"kind": kind}).fetchone()
+
+    if not row:
+        return None, None
+    return json.loads(row.result) if row.result else None, row.age
+
+
+CLAIM_NEXT_JOB = statement("jobs.claim_next_job", """
+    SELECT id, kind, payload, attempts, max_attempts FROM jobs
+    WHERE (status = 'queued' AND run_after <= NOW())
+       OR (status = 'running' AND locked_at < NOW() - INTERVAL :lease SECOND
+           AND attempts < max_attempts)
+    ORDER BY run_after
+    LIMIT 1
+    FOR UPDATE SKIP LOCKED
+""")
+
+MARK_JOB_RUNNING = statement("jobs.mark_job_running", """
+    UPDATE jobs SET status = 'running', attempts = attempts + 1, locked_at = NOW()
+    WHERE id = :job_id
+""")
+
+
+def _claim(lease_seconds):
+    """Lock the next due job, mark it running and return it (or None)"""
+    with get_engine().begin() as conn:
+        row = conn.execute(CLAIM_NEXT_JOB, {"lease": lease_seconds}).fetchone()
+
+        if not row:
+            return None
+
+        conn.execute(MARK_JOB_RUNNING, {"job_id": row.id})
+
+    return row
+
+
+FAIL_ABANDONED_JOBS = statement("jobs.fail_abandoned_jobs", """
+    UPDATE jobs SET status = 'failed', error = 'Worker stopped responding',
+                    locked_at = NULL, finished_at = NOW()
+    WHERE status = 'running' AND locked_at < NOW() - INTERVAL :lease SECOND
+      AND attempts >= max_attempts
+""")
+
+
+def _fail_abandoned(lease_seconds):
+    """Fail jobs whose last attempt's worker died (they are not reclaimed)"""
+    with get_engine().begin() as conn:
+        conn.execute(FAIL_ABANDONED_JOBS, {"lease": lease_seconds})
+
+
+EXTEND_LEASE = statement("jobs.extend_lease", """
+    UPDATE jobs SET locked_at = NOW() WHERE id = :job_id AND status = 'running'
+""")
+
+
+def _heartbeat(job_id, interval, done):
+    """Renew a running job's lease every `interval` seconds until `done` is set"""
+    while not done.wait(interval):
+        try:
+            with get_engine().begin() as conn:
+                conn.execute(EXTEND_LEASE, {"job_id": job_id})
+        except Exception as e:
+            print(f"Job {job_id} heartbeat failed: {e}")
+
+
+RESCHEDULE_JOB = statement("jobs.reschedule_job", """
+    UPDATE jobs SET
+        status = :status,
+        error = :error,
+        locked_at = NULL,
+        run_after = NOW() + INTERVAL :delay SECOND,
+        finished_at = IF(:final, NOW(), NULL)
+    WHERE id = :job_id
+""")
+
+MARK_JOB_SUCCEEDED = statement("jobs.mark_job_succeeded", """
+    UPDATE jobs SET status = 'succeeded', result = :result, error = NULL,
+                    locked_at = NULL, finished_at = NOW()
+    WHERE id = :job_id
+""")
+
+
+def _run(row, backoff_seconds, lease_seconds):
+    attempts = row.attempts + 1
+    handler = _handlers.get(row.kind)
+
+    done = threading.Event()
+    threading.Thread(target=_heartbeat, args=(row.id, lease_seconds / 3, done),
+                     name=f"job-{row.id}-heartbeat", daemon=True).start()
+    try:
+        if handler is None:
+            raise LookupError(f"No handler registered for job kind '{row.kind}'")
+        result = handler(json.loads(row.payload) if row.payload else {})
+    except Exception as e:
+        print(f"Job {row.id} ({row.kind}) attempt {attempts} failed: {e}")
+        final = attempts >= row.max_attempts
+        with get_engine().begin() as conn:
+            conn.execute(RESCHEDULE_JOB, {
+                "job_id": row.id,
+                "status": "failed" if final else "queued",
+                "error": str(e),
+                "delay": backoff_seconds * 2 ** (attempts - 1),
+                "final": final
+            })
+        return
+    finally:
+        done.set()
+
+    with get_engine().begin() as conn:
+        conn.execute(MARK_JOB_SUCCEEDED, {"job_id": row.id, "result": json.dumps(result)})
+
+
+PRUNE_JOBS = statement("jobs.prune_jobs", """
+    DELETE FROM jobs
+    WHERE status IN ('succeeded', 'failed')
+      AND finished_at < NOW() - INTERVAL :days DAY
+    LIMIT 1000
+""")
+
+
+def _prune(retention_days):
+    """Drop finished jobs older than the retention window"""
+    with get_engine().begin() as conn:
+        conn.execute(PRUNE_JOBS, {"days": retention_days})
+
+
+def _enqueue_scheduled(due):
+    """Queue every periodic job whose next run (in `due`) has come"""
+    now = time.time()
+    for kind, every in _schedules.items():
+        if due.get(kind, 0) <= now:
+            period = int(now // every)
+            enqueue(kind, idempotency_key=f"{kind}:every:{period}")
+            due[kind] = (period + 1) * every
+
+
+def _worker_loop():
+    cfg = get_config()
+    last_prune = 0.0
+    due = {}
+
+    while not _stop.is_set():
+        try:
+            _enqueue_scheduled(due)
+            row = _claim(cfg["JOB_LEASE_SECONDS"])
+            if row is not None:
+                _run(row, cfg["JOB_RETRY_BACKOFF"], cfg["JOB_LEASE_SECONDS"])
+                continue
+
+            _fail_abandoned(cfg["JOB_LEASE_SECONDS"])
+
+            if time.monotonic() - last_prune > 600:
+                _prune(cfg["JOB_RETENTION_DAYS"])
+                last_prune = time.monotonic()
+        except Exception as e:
+            print(f"Job worker error: {e}")
+
+        _stop.wait(cfg["JOB_POLL_INTERVAL"])
+
+
+def start_workers(count):
+    """Start `count` daemon worker threads (once per process)"""
+    if _workers:
+        return
+    _stop.clear()
+    for i in range(count):
+        worker = threading.Thread(target=_worker_loop, name=f"job-worker-{i}", daemon=True)
+        worker.start()
+        _workers.append(worker)
+
+
+def stop_workers():
+    _stop.set()
+    for worker in _workers:
+        worker.join()
+    _workers.clear()
@@ -1,17 +1,185 @@
-from sqlalchemy import create_engine, text
+import itertools
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import g, has_request_context, request
+from sqlalchemy import create_engine
 from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError
 from .config import get_config
+from .statements import statement
+
+
+_engine = None
+_replicas = None
+_engine_lock = threading.Lock()
+
+# Replica engine -> monotonic time until which it is skipped after a failed connect
+_replica_down_until = {}
+_replica_turn = itertools.count()
+
+# write key (e.g. "stories", "user:42") -> monotonic time of the last write
+_recent_writes = {}
+
+# Carries the (wall clock) time of a client's last write to every worker
+STICKY_COOKIE = "last_write"
+
+# Set once warm_up() has tried every engine
+_warmed_up = threading.Event()
 
 
 def get_engine() -> Engine:
-    uri = get_config()["SQLALCHEMY_DATABASE_URI"]
-    return create_engine(uri, pool_pre_ping=True)
+    """Return the process-wide engine so every caller shares one connection pool"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                uri = get_config()["SQLALCHEMY_DATABASE_URI"]
+                _engine = create_engine(uri, pool_pre_ping=True)
+    return _engine
+
+
+def get_replica_engines() -> list:
+    """Engines for the configured read replicas (empty when none are configured)"""
+    global _replicas
+    if _replicas is None:
+        with _engine_lock:
+            if _replicas is None:
+                _replicas = [
+                    create_engine(uri, pool_pre_ping=True)
+                    for uri in get_config()["SQLALCHEMY_REPLICA_URIS"]
+                ]
+    return _replicas
+
+
+def note_write(*keys):
+    """
+    Record a write so reads tagged with any of `keys` go to the primary for
+    the next REPLICA_STICKY_SECONDS in this process. Keys name a resource
+    ("stories") or a user's private data ("user:42"). Within a request, the
+    client is also sent a STICKY_COOKIE, so its own reads go to the primary
+    for as long in whichever worker serves them.
+    """
+    if has_request_context():
+        g.last_write = time.time()
+    now = time.monotonic()
+    if len(_recent_writes) > 10000:
+        sticky = get_config()["REPLICA_STICKY_SECONDS"]
+        for key, wrote_at in list(_recent_writes.items()):
+            if now - wrote_at >= sticky:
+                _recent_writes.pop(key, None)
+    for key in keys:
+        _recent_writes[key] = now
+
+
+def _wrote_recently(sticky):
+    """Whether the client of the current request wrote in the last `sticky` seconds"""
+    if not has_request_context():
+        return False
+    try:
+        return time.time() - float(request.cookies.get(STICKY_COOKIE, 0)) < sticky
+    except ValueError:
+        return False
+
+
+def _read_candidates(keys):
+    replicas = get_replica_engines()
+    if not replicas:
+        return []
+
+    now = time.monotonic()
+    sticky = get_config()["REPLICA_STICKY_SECONDS"]
+    if _wrote_recently(sticky):
+        return []
+    for key in keys:
+        wrote_at = _recent_writes.get(key)
+        if wrote_at is None:
+            continue
+        if now - wrote_at < sticky:
+            return []
+        _recent_writes.pop(key, None)
+
+    # Round-robin start, then the others as failover, skipping any marked down
+    start = next(_replica_turn) % len(replicas)
+    ordered = replicas[start:] + replicas[:start]
+    return [engine for engine in ordered if _replica_down_until.get(engine, 0) <= now]
+
+
+def init_sticky_reads(app):
+    """Send STICKY_COOKIE with responses to requests that wrote (see note_write)"""
+    @app.after_request
+    def set_sticky_cookie(response):
+        if "last_write" in g:
+            response.set_cookie(STICKY_COOKIE, f"{g.last_write:.3f}",
+                                max_age=math.ceil(app.config["REPLICA_STICKY_SECONDS"]),
+                                httponly=True, samesite="Lax")
+        return response
+
+
+def skip_replica(engine, seconds):
+    """Keep reads off replica `engine` for `seconds` (it is down or lagging)"""
+    _replica_down_until[engine] = time.monotonic() + seconds
+
+
+@contextmanager
+def read_connection(*keys):
+    """
+    Connection for read-only queries.
+
+    Picks the next healthy replica round-robin. A replica that refuses a
+    connection is skipped for REPLICA_RETRY_SECONDS and the next one is
+    tried. Falls back to the primary when there are no replicas, all are
+    down, or the client or one of `keys` wrote recently (see note_write).
+    """
+    conn = None
+    for engine in _read_candidates(keys):
+        try:
+            conn = engine.connect()
+            break
+        except DBAPIError as e:
+            print(f"Replica {engine.url.host} unavailable, failing over: {e}")
+            skip_replica(engine, get_config()["REPLICA_RETRY_SECONDS"])
+
+    if conn is None:
+        conn = get_engine().connect()
+
+    with conn:
+        yield conn
+
+
+PING = statement("models.ping", "SELECT 1")
 
 
 def ping_db() -> bool:
     engine = get_engine()
     with engine.connect() as conn:
-        conn.execute(text("SELECT 1"))
+        conn.execute(PING)
     return True
 
 
+def warm_up():
+    """
+    Connect to the primary and each replica once, so the driver and dialect
+    are imported and a pooled connection is open before the first request.
+    Failures are logged; requests will retry the connection themselves.
+    """
+    try:
+        for engine in [get_engine(), *get_replica_engines()]:
+            try:
+                with engine.connect() as conn:
+                    conn.execute(PING)
+            except Exception as e:
+                print(f"Database warm-up failed for {engine.url.host}: {e}")
+    finally:
+        _warmed_up.set()
+
+
+def start_warm_up():
+    """Run warm_up() in a background thread so create_app() does not wait for the database"""
+    threading.Thread(target=warm_up, name="db-warm-up", daemon=True).start()
+
+
+def is_warmed_up() -> bool:
+    return _warmed_up.is_set()
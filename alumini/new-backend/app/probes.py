@@ -0,0 +1,144 @@
+"""
+Background database probes for the readiness check.
+
+One checker thread probes the primary and every replica each
+HEALTH_PROBE_INTERVAL seconds and keeps the result in `latest()`. Probes go
+through their own one-connection engines, so they never take a connection
+from the request pools, and health-check traffic costs no I/O at all: the
+health routes only read the snapshot.
+
+A replica more than REPLICA_MAX_LAG_SECONDS behind the primary is taken out
+of read rotation until the next probe (see models.skip_replica). Failures
+are logged with the host and driver error; the health routes only publish
+whether each database is ok.
+"""
+import threading
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import create_engine
+from sqlalchemy.exc import DBAPIError
+from .config import get_config
+from .models import PING, get_engine, get_replica_engines, skip_replica
+from .statements import statement
+
+
+SHOW_REPLICA_STATUS = statement("probes.show_replica_status", "SHOW REPLICA STATUS")
+# MySQL before 8.0.22
+SHOW_SLAVE_STATUS = statement("probes.show_slave_status", "SHOW SLAVE STATUS")
+
+_snapshot = None
+_probe_engines = None
+_checker = None
+
+
+def probe_engines():
+    """(primary, [replicas]) engines reserved for probes, one connection each"""
+    global _probe_engines
+    if _probe_engines is None:
+        cfg = get_config()
+        make = lambda uri: create_engine(uri, pool_size=1, max_overflow=0, pool_pre_ping=True)
+        _probe_engines = (
+            make(cfg["SQLALCHEMY_DATABASE_URI"]),
+            [make(uri) for uri in cfg["SQLALCHEMY_REPLICA_URIS"]],
+        )
+    return _probe_engines
+
+
+def pool_stats(engine):
+    """Usage of a request pool; saturation is checked-out / (pool size + max overflow)"""
+    pool = engine.pool
+    if not hasattr(pool, "checkedout"):
+        return None
+    capacity = pool.size() + max(getattr(pool, "_max_overflow", 0), 0)
+    checked_out = pool.checkedout()
+    return {
+        "size": pool.size(),
+        "checked_out": checked_out,
+        "capacity": capacity,
+        "saturation": round(checked_out / capacity, 2) if capacity else None,
+    }
+
+
+def replica_lag(conn):
+    """Seconds the replica behind `conn` trails its source, or None if unknown"""
+    for query, column in ((SHOW_REPLICA_STATUS, "Seconds_Behind_Source"),
+                          (SHOW_SLAVE_STATUS, "Seconds_Behind_Master")):
+        try:
+            row = conn.execute(query).mappings().fetchone()
+        except DBAPIError:
+            conn.rollback()
+            continue
+        return row.get(column) if row else None
+    return None
+
+
+def probe(engine, with_lag=False):
+    started = time.monotonic()
+    result = {"host": engine.url.host, "ok": False, "latency_ms": None, "error": None}
+    try:
+        with engine.connect() as conn:
+            conn.execute(PING)
+            result["latency_ms"] = round((time.monotonic() - started) * 1000, 1)
+            if with_lag:
+                result["lag_seconds"] = replica_lag(conn)
+        result["ok"] = True
+    except Exception as e:
+        result["error"] = str(e)
+        print(f"Health probe of {engine.url.host} failed: {e}")
+    return result
+
+
+def run_probes():
+    """Probe every database once and publish the snapshot"""
+    global _snapshot
+    cfg = get_config()
+    primary, replicas = probe_engines()
+
+    db = probe(primary)
+    db["pool"] = pool_stats(get_engine())
+    replica_results = []
+    for engine, probe_engine in zip(get_replica_engines(), replicas):
+        result = probe(probe_engine, with_lag=True)
+        lag = result.get("lag_seconds")
+        if lag is not None and lag > cfg["REPLICA_MAX_LAG_SECONDS"]:
+            result["ok"] = False
+            result["error"] = f"{lag}s behind the primary"
+            print(f"Replica {result['host']} is {lag}s behind the primary")
+            skip_replica(engine, cfg["HEALTH_PROBE_INTERVAL"])
+        replica_results.append(result)
+
+    _snapshot = {
+        "checked_at": datetime.now(timezone.utc).isoformat(),
+        "monotonic": time.monotonic(),
+        "db": db,
+        "replicas": replica_results,
+    }
+    return _snapshot
+
+
+def latest():
+    """The last snapshot with its age in seconds, or None before the first probe"""
+    snapshot = _snapshot
+    if snapshot is None:
+        return None
+    result = {key: value for key, value in snapshot.items() if key != "monotonic"}
+    result["age_seconds"] = round(time.monotonic() - snapshot["monotonic"], 1)
+    return result
+
+
+def _check_loop(interval):
+    while True:
+        try:
+            run_probes()
+        except Exception as e:
+            print(f"Health probe error: {e}")
+        time.sleep(interval)
+
+
+def start_checker(interval):
+    """Start the checker thread (once per process)"""
+    global _checker
+    if _checker is None:
+        _checker = threading.Thread(target=_check_loop, args=(interval,), name="health-checker", daemon=True)
+        _checker.start()
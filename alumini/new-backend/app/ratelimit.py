@@ -0,0 +1,211 @@
+"""
+Rate limiting.
+
+Every /api request takes a token from a bucket keyed by its rate-limit rule
+and its client: the JWT subject when the request carries a valid access
+token, the IP address otherwise. Buckets refill continuously at the rule's
+rate up to one period's worth of tokens, so a client can spend a burst at
+once and then settles at the rate. A request that finds its bucket empty
+gets 429 with Retry-After. Each part of an /api/batch request is checked
+against its own endpoint's rule as well (see routes/batch.py).
+
+Rules come from RATE_LIMITS (endpoint or blueprint name -> "<count>/<period>"
+or "off") and fall back to RATE_LIMIT_DEFAULT; they are resolved once per
+endpoint. Buckets live in process memory, so with N workers a client gets up
+to N times its limit. Set RATE_LIMIT_REDIS_URL (needs the `redis` package)
+to share them between workers and hosts.
+"""
+import math
+import threading
+import time
+
+from flask import jsonify, request
+from flask_jwt_extended import decode_token
+from .config import get_config
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+class Limit:
+    __slots__ = ("rule", "rate", "burst")
+
+    def __init__(self, rule, spec):
+        count, _, period = spec.partition("/")
+        self.rule = rule
+        self.burst = int(count)
+        self.rate = self.burst / PERIODS[period.strip()]
+
+
+class MemoryBuckets:
+    """Token buckets in this process: key -> (tokens, updated_at, full_at)"""
+
+    def __init__(self, max_entries=100000):
+        self.max_entries = max_entries
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def take(self, key, limit):
+        """Take one token; return 0 on success or the seconds until one is available"""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= self.max_entries:
+                    self._prune(now)
+                tokens = limit.burst
+            else:
+                tokens = min(limit.burst, bucket[0] + (now - bucket[1]) * limit.rate)
+
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / limit.rate
+            self._buckets[key] = (tokens, now, now + (limit.burst - tokens) / limit.rate)
+            return wait
+
+    def _prune(self, now):
+        # A bucket that has refilled is the same as no bucket at all
+        for key in [key for key, bucket in self._buckets.items() if bucket[2] <= now]:
+            del self._buckets[key]
+        if len(self._buckets) >= self.max_entries:
+            # Every bucket is in use (e.g. a flood of distinct IPs): start over
+            # rather than grow without bound
+            self._buckets.clear()
+
+
+# Same algorithm as MemoryBuckets, atomically in Redis on the server's clock
+TAKE_SCRIPT = """
+local rate, burst = tonumber(ARGV[1]), tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = burst
+if bucket[1] then
+  tokens = math.min(burst, tonumber(bucket[1]) + (now - tonumber(bucket[2])) * rate)
+end
+local wait = 0
+if tokens >= 1 then tokens = tokens - 1 else wait = (1 - tokens) / rate end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated_at', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil((burst - tokens) / rate) + 1)
+return tostring(wait)
+"""
+
+
+class RedisBuckets:
+    """Token buckets shared through Redis, one round-trip per check"""
+
+    def __init__(self, url):
+        if redis is None:
+            raise RuntimeError("RATE_LIMIT_REDIS_URL is set but the 'redis' package is not installed")
+        self._take = redis.Redis.from_url(url).register_script(TAKE_SCRIPT)
+
+    def take(self, key, limit):
+        return float(self._take(keys=[f"ratelimit:{key}"], args=[limit.rate, limit.burst]))
+
+
+class RateLimiter:
+    def __init__(self, default, rules, buckets):
+        self.default = None if default == "off" else Limit("default", default)
+        self.rules = {name: None if spec == "off" else Limit(name, spec) for name, spec in rules.items()}
+        self.buckets = buckets
+        self._limits = {}
+
+    def limit_for(self, endpoint):
+        """Rule for `endpoint` ("blueprint.view"): its own, its blueprint's or the default"""
+        try:
+            return self._limits[endpoint]
+        except KeyError:
+            pass
+        blueprint = endpoint.rpartition(".")[0]
+        for name in (endpoint, blueprint):
+            if name in self.rules:
+                limit = self.rules[name]
+                break
+        else:
+            limit = self.default
+        self._limits[endpoint] = limit
+        return limit
+
+    def check(self, endpoint, client):
+        """0 if `client` may call `endpoint` now, else the seconds to wait"""
+        limit = self.limit_for(endpoint)
+        if limit is None:
+            return 0.0
+        return self.buckets.take(f"{limit.rule}:{client}", limit)
+
+
+_limiter = None
+
+
+def get_limiter():
+    global _limiter
+    if _limiter is None:
+        cfg = get_config()
+        buckets = RedisBuckets(cfg["RATE_LIMIT_REDIS_URL"]) if cfg["RATE_LIMIT_REDIS_URL"] else MemoryBuckets()
+        _limiter = RateLimiter(cfg["RATE_LIMIT_DEFAULT"], cfg["RATE_LIMITS"], buckets)
+    return _limiter
+
+
+def retry_seconds(retry_after):
+    """Whole seconds to advertise in Retry-After"""
+    return max(1, math.ceil(retry_after))
+
+
+def too_many_requests(retry_after):
+    seconds = retry_seconds(retry_after)
+    response = jsonify({"error": f"Too many requests, retry in {seconds} seconds"})
+    response.status_code = 429
+    response.headers["Retry-After"] = str(seconds)
+    return response
+
+
+# Bearer token -> (subject, expires_at) of tokens already verified here, so a
+# client's repeat requests skip the signature check (the view still does it)
+_subjects = {}
+MAX_SUBJECTS = 10000
+
+
+def token_subject(token):
+    entry = _subjects.get(token)
+    if entry is not None and entry[1] > time.time():
+        return entry[0]
+    try:
+        claims = decode_token(token)
+    except Exception:
+        return None
+    if len(_subjects) >= MAX_SUBJECTS:
+        _subjects.clear()
+    subject = claims["sub"]
+    _subjects[token] = (subject, claims.get("exp", math.inf))
+    return subject
+
+
+def client_key():
+    """JWT subject of a valid bearer token, else the client IP"""
+    authorization = request.headers.get("Authorization", "")
+    if authorization.startswith("Bearer "):
+        subject = token_subject(authorization[7:])
+        if subject is not None:
+            return f"user:{subject}"
+    return f"ip:{request.remote_addr}"
+
+
+def check_rate_limit():
+    if request.endpoint is None:
+        return None
+    retry_after = get_limiter().check(request.endpoint, client_key())
+    if retry_after:
+        return too_many_requests(retry_after)
+    return None
+
+
+def init_rate_limits(app):
+    get_limiter()
+    app.before_request(check_rate_limit)
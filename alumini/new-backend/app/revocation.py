@@ -0,0 +1,236 @@
+"""
+Token revocation.
+
+JWTs stay valid until they expire, so logging out, rotating a refresh
+token and kicking a user are recorded here and checked by the JWTManager
+blocklist loader on every protected request:
+
+- a revoked token, by its `jti`, until the token's own expiry;
+- a revoked family: every access and refresh token minted from one login
+  (they share a `family` claim), until the last of them expires;
+- a revoked user: every token of theirs issued at or before the
+  revocation, for as long as any such token can live.
+
+A refresh token is revoked as soon as it is rotated, so presenting it again
+means it was copied: the whole family is revoked, cutting off whoever holds
+the newer tokens as well. Rotation is decided by the database, not the
+in-memory list: it inserts the token into `revoked_tokens`, whose
+(kind, token_key) key lets only one insert win, so two refreshes racing
+on different workers cannot both get a new pair.
+
+Checks are dict lookups in process memory. Revocations are also written to
+`revoked_tokens`, which every process loads at start and polls every
+REVOCATION_SYNC_SECONDS, so a logout or kick handled by one worker reaches
+the others within that interval and survives restarts. With
+REVOCATION_SYNC_SECONDS = 0 revocations other than rotations stay in the
+process that made them.
+Entries are evicted once the tokens they cover have expired.
+"""
+import heapq
+import threading
+import time
+
+from sqlalchemy.exc import IntegrityError
+
+from .config import get_config
+from .jobs import job
+from .models import get_engine
+from .statements import statement
+
+
+def token_lifetime():
+    """Longest a token issued now can stay valid, in seconds"""
+    cfg = get_config()
+    return max(cfg["JWT_ACCESS_TOKEN_EXPIRES"], cfg["JWT_REFRESH_TOKEN_EXPIRES"])
+
+
+class RevocationList:
+    """Revoked jtis, families and users, each kept until its expiry"""
+
+    def __init__(self):
+        self._keys = {"token": {}, "family": {}}  # kind -> {jti or family: expires_at}
+        self._users = {}  # user id (JWT subject) -> (revoked_at, expires_at)
+        self._expiry = []  # heap of (expires_at, kind, key)
+        self._lock = threading.Lock()
+
+    def add(self, kind, key, revoked_at, expires_at):
+        with self._lock:
+            if kind in self._keys:
+                if self._keys[kind].get(key, 0) >= expires_at:
+                    return
+                self._keys[kind][key] = expires_at
+            else:
+                known = self._users.get(key)
+                if known and known[0] >= revoked_at and known[1] >= expires_at:
+                    return
+                if known:
+                    revoked_at, expires_at = max(revoked_at, known[0]), max(expires_at, known[1])
+                self._users[key] = (revoked_at, expires_at)
+            heapq.heappush(self._expiry, (expires_at, kind, key))
+
+    def is_revoked(self, claims):
+        user = self._users.get(claims["sub"])
+        if user is not None and claims.get("iat", 0) <= user[0]:
+            return True
+        return claims.get("jti") in self._keys["token"] or self.has_family(claims.get("family"))
+
+    def has_family(self, family):
+        return family in self._keys["family"]
+
+    def evict(self, now=None):
+        """Drop entries whose tokens have all expired"""
+        now = now if now is not None else time.time()
+        with self._lock:
+            while self._expiry and self._expiry[0][0] <= now:
+                _, kind, key = heapq.heappop(self._expiry)
+                # A later revocation of the same key may have extended it
+                if kind in self._keys:
+                    if self._keys[kind].get(key, now + 1) <= now:
+                        del self._keys[kind][key]
+                elif self._users.get(key, (0, now + 1))[1] <= now:
+                    del self._users[key]
+
+    def __len__(self):
+        return sum(len(keys) for keys in self._keys.values()) + len(self._users)
+
+
+_revoked = RevocationList()
+_since = 0
+_syncer = None
+
+
+# Revoking a family or user again moves revoked_at, so other processes reload it
+UPSERT_REVOCATION = statement("revocation.upsert_revocation", """
+    INSERT INTO revoked_tokens (kind, token_key, revoked_at, expires_at)
+    VALUES (:kind, :token_key, :revoked_at, :expires_at)
+    ON DUPLICATE KEY UPDATE
+        revoked_at = GREATEST(revoked_at, VALUES(revoked_at)),
+        expires_at = GREATEST(expires_at, VALUES(expires_at))
+""")
+
+
+def _revoke(kind, key, expires_at):
+    revoked_at = int(time.time())
+    _revoked.add(kind, key, revoked_at, expires_at)
+    if get_config()["REVOCATION_SYNC_SECONDS"] > 0:
+        with get_engine().begin() as conn:
+            conn.execute(UPSERT_REVOCATION, {
+                "kind": kind, "token_key": key, "revoked_at": revoked_at, "expires_at": expires_at
+            })
+
+
+def revoke_token(claims):
+    """Revoke one token until it expires"""
+    _revoke("token", claims["jti"], int(claims.get("exp") or time.time() + token_lifetime()))
+
+
+INSERT_ROTATION = statement("revocation.insert_rotation", """
+    INSERT INTO revoked_tokens (kind, token_key, revoked_at, expires_at)
+    VALUES ('token', :token_key, :revoked_at, :expires_at)
+""")
+
+
+def rotate(claims):
+    """
+    Revoke a refresh token as it is traded for a new pair. Returns False if
+    any process rotated it before (the insert hits the unique key): it was
+    replayed, so its session is revoked and no new pair may be issued.
+    """
+    revoked_at = int(time.time())
+    expires_at = int(claims.get("exp") or revoked_at + token_lifetime())
+    try:
+        with get_engine().begin() as conn:
+            conn.execute(INSERT_ROTATION, {
+                "token_key": claims["jti"], "revoked_at": revoked_at, "expires_at": expires_at
+            })
+    except IntegrityError:
+        revoke_session(claims)
+        return False
+    _revoked.add("token", claims["jti"], revoked_at, expires_at)
+    return True
+
+
+def revoke_family(family):
+    """Revoke every token minted from one login (e.g. on logout)"""
+    _revoke("family", family, int(time.time()) + token_lifetime())
+
+
+def revoke_session(claims):
+    """Revoke the session a token belongs to: its family, or just the token if it predates families"""
+    if claims.get("family"):
+        revoke_family(claims["family"])
+    else:
+        revoke_token(claims)
+
+
+def revoke_user(user_id):
+    """Revoke every token issued so far to a user (e.g. when they are kicked)"""
+    _revoke("user", str(user_id), int(time.time()) + token_lifetime())
+
+
+def is_revoked(claims):
+    revoked = _revoked.is_revoked(claims)
+    family = claims.get("family")
+    if revoked and claims.get("type") == "refresh" and family and not _revoked.has_family(family):
+        # A rotated refresh token came back: end the family, whoever holds it
+        try:
+            revoke_family(family)
+        except Exception as e:
+            print(f"Revocation error: {e}")
+    return revoked
+
+
+LIST_REVOCATIONS = statement("revocation.list_revocations", """
+    SELECT kind, token_key, revoked_at, expires_at FROM revoked_tokens
+    WHERE revoked_at >= :since AND expires_at > :now
+""")
+
+
+def sync():
+    """Load revocations recorded since the last sync (all live ones on the first)"""
+    global _since
+    now = int(time.time())
+    newest = _since
+    with get_engine().connect() as conn:
+        for row in conn.execute(LIST_REVOCATIONS, {"since": _since, "now": now}):
+            _revoked.add(row.kind, row.token_key, row.revoked_at, row.expires_at)
+            newest = max(newest, row.revoked_at)
+    # Re-read a little before the newest, for revocations committed late
+    _since = max(_since, newest - get_config()["SYNC_OVERLAP_SECONDS"])
+    _revoked.evict(now)
+
+
+def _sync_loop(interval):
+    while True:
+        try:
+            sync()
+        except Exception as e:
+            print(f"Revocation sync error: {e}")
+        time.sleep(interval)
+
+
+def start_syncer(interval):
+    """Start the sync thread (once per process); its first sync loads every live revocation"""
+    global _syncer
+    if _syncer is None:
+        _syncer = threading.Thread(target=_sync_loop, args=(interval,), name="revocation-sync", daemon=True)
+        _syncer.start()
+
+
+def init_revocation(jwt):
+    """Consult the revocation list on every protected request"""
+    @jwt.token_in_blocklist_loader
+    def check_if_token_revoked(jwt_header, jwt_payload):
+        return is_revoked(jwt_payload)
+
+
+DELETE_EXPIRED_REVOCATIONS = statement("revocation.delete_expired_revocations", """
+    DELETE FROM revoked_tokens WHERE expires_at <= :now
+""")
+
+
+@job("purge_revocations", every=86400)
+def purge_revocations_job(payload):
+    with get_engine().begin() as conn:
+        deleted = conn.execute(DELETE_EXPIRED_REVOCATIONS, {"now": int(time.time())}).rowcount
+    return {"deleted": deleted}
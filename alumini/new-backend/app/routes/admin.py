@@ -1,7 +1,16 @@
+import time
+from datetime import date, timedelta
+
 from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required, get_jwt
-from ..models import get_engine
-from sqlalchemy import text
+from ..models import get_engine, note_write, read_connection
+from ..config import get_config
+from ..jobs import job, enqueue, get_job, latest_result
+from ..cache import response_cache
+from .. import analytics, directory, revocation, sketches
+from ..statements import statement
+from sqlalchemy import bindparam
+from ..rows import RowEncoder, iso, json_columns, json_rows, wants_columnar
 
 bp = Blueprint("admin", __name__)
 
@@ -19,6 +28,28 @@ def require_admin(current_user):
     return None
 
 
+LIST_ALL_USERS = statement("admin.list_all_users", """
+    SELECT 
+        u.id, u.email, u.name, u.role, u.created_at,
+        u.graduation_year, u.major, u.company, u.position,
+        (SELECT COUNT(*) FROM stories WHERE author_id = u.id) as story_count,
+        (SELECT COUNT(*) FROM opportunities WHERE posted_by = u.id) as opportunity_count,
+        (SELECT COUNT(*) FROM scholarships WHERE posted_by = u.id) as scholarship_count,
+        (SELECT COUNT(*) FROM mentorship_requests WHERE student_id = u.id OR mentor_id = u.id) as mentorship_count,
+        (SELECT COUNT(*) FROM messages WHERE sender_id = u.id OR receiver_id = u.id) as message_count,
+        (SELECT COUNT(*) FROM applications WHERE applicant_id = u.id) as application_count
+    FROM users u
+    ORDER BY u.created_at DESC
+""")
+
+ALL_USERS_ROW = RowEncoder([
+    "id", "email", "name", "role", ("created_at", iso),
+    "graduation_year", "major", "company", "position",
+    "stats.stories", "stats.opportunities", "stats.scholarships",
+    "stats.mentorships", "stats.messages", "stats.applications"
+])
+
+
 @bp.get("/users")
 @jwt_required()
 def list_all_users():
@@ -28,50 +59,156 @@ def list_all_users():
     if error:
         return error
     
-    engine = get_engine()
     try:
-        with engine.connect() as conn:
-            result = conn.execute(text("""
-                SELECT 
-                    u.id, u.email, u.name, u.role, u.created_at,
-                    u.graduation_year, u.major, u.company, u.position,
-                    (SELECT COUNT(*) FROM stories WHERE author_id = u.id) as story_count,
-                    (SELECT COUNT(*) FROM opportunities WHERE posted_by = u.id) as opportunity_count,
-                    (SELECT COUNT(*) FROM scholarships WHERE posted_by = u.id) as scholarship_count,
-                    (SELECT COUNT(*) FROM mentorship_requests WHERE student_id = u.id OR mentor_id = u.id) as mentorship_count,
-                    (SELECT COUNT(*) FROM messages WHERE sender_id = u.id OR receiver_id = u.id) as message_count,
-                    (SELECT COUNT(*) FROM applications WHERE applicant_id = u.id) as application_count
-                FROM users u
-                ORDER BY u.created_at DESC
-            """))
-            
-            users = []
-            for row in result:
-                users.append({
-                    "id": row.id,
-                    "email": row.email,
-                    "name": row.name,
-                    "role": row.role,
-                    "created_at": row.created_at.isoformat() if row.created_at else None,
-                    "graduation_year": row.graduation_year,
-                    "major": row.major,
-                    "company": row.company,
-                    "position": row.position,
-                    "stats": {
-                        "stories": row.story_count,
-                        "opportunities": row.opportunity_count,
-                        "scholarships": row.scholarship_count,
-                        "mentorships": row.mentorship_count,
-                        "messages": row.message_count,
-                        "applications": row.application_count
-                    }
-                })
-            
-            return jsonify(users), 200
+        if wants_columnar():
+            return json_columns(LIST_ALL_USERS, ALL_USERS_ROW)
+        return json_rows(LIST_ALL_USERS, ALL_USERS_ROW)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+# (counter, statement) pairs run by purge_user, in order. Every statement
+# deletes at most :batch_size rows. Applications on the user's postings are
+# removed before the postings themselves so the FK cascade stays bounded.
+PURGE_STEPS = [
+    ("applications", statement("admin.purge_step_1", """
+        DELETE FROM applications WHERE applicant_id = :user_id LIMIT :batch_size
+    """)),
+    ("applications", statement("admin.purge_step_2", """
+        DELETE FROM applications
+        WHERE opportunity_id IN (SELECT id FROM opportunities WHERE posted_by = :user_id)
+        LIMIT :batch_size
+    """)),
+    ("applications", statement("admin.purge_step_3", """
+        DELETE FROM applications
+        WHERE scholarship_id IN (SELECT id FROM scholarships WHERE posted_by = :user_id)
+        LIMIT :batch_size
+    """)),
+    ("messages", statement("admin.purge_step_4", """
+        DELETE FROM messages WHERE sender_id = :user_id LIMIT :batch_size
+    """)),
+    ("messages", statement("admin.purge_step_5", """
+        DELETE FROM messages WHERE receiver_id = :user_id LIMIT :batch_size
+    """)),
+    ("mentorship_requests", statement("admin.purge_step_6", """
+        DELETE FROM mentorship_requests WHERE student_id = :user_id LIMIT :batch_size
+    """)),
+    ("mentorship_requests", statement("admin.purge_step_7", """
+        DELETE FROM mentorship_requests WHERE mentor_id = :user_id LIMIT :batch_size
+    """)),
+    ("stories", statement("admin.purge_step_8", """
+        DELETE FROM stories WHERE author_id = :user_id LIMIT :batch_size
+    """)),
+    ("opportunities", statement("admin.purge_step_9", """
+        DELETE FROM opportunities WHERE posted_by = :user_id LIMIT :batch_size
+    """)),
+    ("scholarships", statement("admin.purge_step_10", """
+        DELETE FROM scholarships WHERE posted_by = :user_id LIMIT :batch_size
+    """)),
+]
+
+
+# Recorded before the purge deletes anything, so /changes feeds report the
+# rows as deleted (see app/changes.py). A unique (resource, item_id) key
+# keeps a re-run purge from reporting them twice.
+RECORD_PURGE_TOMBSTONES = [
+    statement("admin.tombstone_user", """
+        INSERT IGNORE INTO tombstones (resource, item_id) VALUES ('users', :user_id)
+    """),
+    statement("admin.tombstone_stories", """
+        INSERT IGNORE INTO tombstones (resource, item_id)
+        SELECT 'stories', id FROM stories WHERE author_id = :user_id
+    """),
+    statement("admin.tombstone_opportunities", """
+        INSERT IGNORE INTO tombstones (resource, item_id)
+        SELECT 'opportunities', id FROM opportunities WHERE posted_by = :user_id
+    """),
+    statement("admin.tombstone_scholarships", """
+        INSERT IGNORE INTO tombstones (resource, item_id)
+        SELECT 'scholarships', id FROM scholarships WHERE posted_by = :user_id
+    """),
+    statement("admin.tombstone_mentorship", """
+        INSERT IGNORE INTO tombstones (resource, item_id)
+        SELECT 'mentorship', id FROM mentorship_requests
+        WHERE student_id = :user_id OR mentor_id = :user_id
+    """),
+]
+
+# Hand back the mentor slots the user's open requests (as a student) hold,
+# and close those requests so a re-run of an interrupted purge does not
+# release them twice
+RELEASE_PURGED_MENTOR_SLOTS = [
+    statement("admin.release_mentor_slots", """
+        UPDATE users u
+        JOIN (
+            SELECT mentor_id, COUNT(*) AS open_requests FROM mentorship_requests
+            WHERE student_id = :user_id AND status IN ('pending', 'accepted')
+            GROUP BY mentor_id
+        ) mr ON mr.mentor_id = u.id
+        SET u.mentor_open_requests = GREATEST(CAST(u.mentor_open_requests AS SIGNED) - mr.open_requests, 0)
+    """),
+    statement("admin.close_open_mentorships", """
+        UPDATE mentorship_requests SET status = 'rejected'
+        WHERE student_id = :user_id AND status IN ('pending', 'accepted')
+    """),
+]
+
+DELETE_USER = statement("admin.delete_user", """
+    DELETE FROM users WHERE id = :user_id
+""")
+
+
+def purge_user(engine, user_id, batch_size):
+    """Delete a user and everything they own in bounded batches.
+
+    Returns the number of rows deleted per table. The users row goes last,
+    so an interrupted purge can simply be run again.
+    """
+    deleted_items = {
+        "stories": 0,
+        "opportunities": 0,
+        "scholarships": 0,
+        "mentorship_requests": 0,
+        "messages": 0,
+        "applications": 0
+    }
+
+    with engine.begin() as conn:
+        for query in RECORD_PURGE_TOMBSTONES + RELEASE_PURGED_MENTOR_SLOTS:
+            conn.execute(query, {"user_id": user_id})
+
+    for counter, query in PURGE_STEPS:
+        while True:
+            with engine.begin() as conn:
+                deleted = conn.execute(query, {"user_id": user_id, "batch_size": batch_size}).rowcount
+            deleted_items[counter] += deleted
+            if deleted < batch_size:
+                break
+
+    with engine.begin() as conn:
+        conn.execute(DELETE_USER, {"user_id": user_id})
+
+    return deleted_items
+
+
+@job("purge_user")
+def purge_user_job(payload):
+    deleted_items = purge_user(get_engine(), payload["user_id"], get_config()["KICK_DELETE_BATCH_SIZE"])
+    deleted_items["user"] = payload["user"]
+    response_cache.invalidate()
+    note_write("users", "opportunities", "stories", "scholarships", "mentorship", f"user:{payload['user_id']}")
+    directory.expire()
+    return {
+        "message": f"User {payload['user']['name']} ({payload['user']['email']}) has been kicked successfully",
+        "deleted": deleted_items
+    }
+
+
+GET_KICK_TARGET = statement("admin.get_kick_target", """
+    SELECT id, email, name, role FROM users WHERE id = :user_id
+""")
+
+
 @bp.delete("/users/<int:user_id>")
 @jwt_required()
 def kick_user(user_id):
@@ -82,8 +219,13 @@ def kick_user(user_id):
     - Scholarships posted by the user
     - Mentorship requests (as student or mentor)
     - Messages sent or received
-    - Applications submitted
+    - Applications submitted (and applications received on their postings)
     - Finally, delete the user account
+
+    The purge runs as a background job that deletes each table in batches
+    of KICK_DELETE_BATCH_SIZE rows, one short transaction per batch. The
+    response carries the job id; GET /api/admin/jobs/<id> returns the
+    deleted counts once it has finished.
     """
     current_user = get_current_user()
     error = require_admin(current_user)
@@ -94,79 +236,88 @@ def kick_user(user_id):
     try:
         with engine.connect() as conn:
             # Check if user exists
-            user_result = conn.execute(text("""
-                SELECT id, email, name, role FROM users WHERE id = :user_id
-            """), {"user_id": user_id})
+            user_result = conn.execute(GET_KICK_TARGET, {"user_id": user_id})
             
             user = user_result.fetchone()
             if not user:
                 return jsonify({"error": "User not found"}), 404
+
+        # Their tokens stop working now, not when the purge gets to the account
+        revocation.revoke_user(user_id)
+        job_id = enqueue("purge_user", {
+            "user_id": user_id,
+            "user": {"id": user.id, "email": user.email, "name": user.name, "role": user.role}
+        }, idempotency_key=f"purge_user:{user_id}")
+
+        return jsonify({
+            "message": f"User {user.name} ({user.email}) is being kicked",
+            "job_id": job_id
+        }), 202
             
-            # Track what we're deleting
-            deleted_items = {
-                "user": {"id": user.id, "email": user.email, "name": user.name, "role": user.role},
-                "stories": 0,
-                "opportunities": 0,
-                "scholarships": 0,
-                "mentorship_requests": 0,
-                "messages": 0,
-                "applications": 0
-            }
-            
-            # Delete stories authored by user
-            result = conn.execute(text("""
-                DELETE FROM stories WHERE author_id = :user_id
-            """), {"user_id": user_id})
-            deleted_items["stories"] = result.rowcount
-            
-            # Delete opportunities posted by user
-            result = conn.execute(text("""
-                DELETE FROM opportunities WHERE posted_by = :user_id
-            """), {"user_id": user_id})
-            deleted_items["opportunities"] = result.rowcount
-            
-            # Delete scholarships posted by user
-            result = conn.execute(text("""
-                DELETE FROM scholarships WHERE posted_by = :user_id
-            """), {"user_id": user_id})
-            deleted_items["scholarships"] = result.rowcount
-            
-            # Delete mentorship requests (as student or mentor)
-            result = conn.execute(text("""
-                DELETE FROM mentorship_requests 
-                WHERE student_id = :user_id OR mentor_id = :user_id
-            """), {"user_id": user_id})
-            deleted_items["mentorship_requests"] = result.rowcount
-            
-            # Delete messages (sent or received)
-            result = conn.execute(text("""
-                DELETE FROM messages 
-                WHERE sender_id = :user_id OR receiver_id = :user_id
-            """), {"user_id": user_id})
-            deleted_items["messages"] = result.rowcount
-            
-            # Delete applications
-            result = conn.execute(text("""
-                DELETE FROM applications WHERE applicant_id = :user_id
-            """), {"user_id": user_id})
-            deleted_items["applications"] = result.rowcount
-            
-            # Finally, delete the user
-            conn.execute(text("""
-                DELETE FROM users WHERE id = :user_id
-            """), {"user_id": user_id})
-            
-            conn.commit()
-            
-            return jsonify({
-                "message": f"User {user.name} ({user.email}) has been kicked successfully",
-                "deleted": deleted_items
-            }), 200
-            
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+@bp.get("/jobs/<int:job_id>")
+@jwt_required()
+def get_job_status(job_id):
+    """Get the status (and result, once finished) of a background job"""
+    current_user = get_current_user()
+    error = require_admin(current_user)
+    if error:
+        return error
+
+    try:
+        job_data = get_job(job_id)
+        if not job_data:
+            return jsonify({"error": "Job not found"}), 404
+
+        return jsonify(job_data), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@bp.post("/skills/backfill")
+@jwt_required()
+def backfill_skills():
+    """
+    Re-index every user's skills and every opportunity's requirements into
+    the skills taxonomy (after migrate_skills.sql, or after adding aliases).
+    Runs as a backfill_skills job; the response carries its id.
+    """
+    current_user = get_current_user()
+    error = require_admin(current_user)
+    if error:
+        return error
+
+    try:
+        job_id = enqueue("backfill_skills", {})
+        return jsonify({"message": "Skills backfill queued", "job_id": job_id}), 202
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+LIST_STUDENTS_WITH_STATS = statement("admin.list_students_with_stats", """
+    SELECT 
+        u.id, u.email, u.name, u.created_at,
+        u.graduation_year, u.major, u.bio, u.skills,
+        (SELECT COUNT(*) FROM stories WHERE author_id = u.id) as story_count,
+        (SELECT COUNT(*) FROM mentorship_requests WHERE student_id = u.id) as mentorship_count,
+        (SELECT COUNT(*) FROM messages WHERE sender_id = u.id OR receiver_id = u.id) as message_count,
+        (SELECT COUNT(*) FROM applications WHERE applicant_id = u.id) as application_count
+    FROM users u
+    WHERE u.role = 'student'
+    ORDER BY u.created_at DESC
+""")
+
+STUDENT_WITH_STATS_ROW = RowEncoder([
+    "id", "email", "name", ("created_at", iso),
+    "graduation_year", "major", "bio", "skills",
+    "stats.stories", "stats.mentorships", "stats.messages",
+    "stats.applications"
+])
+
+
 @bp.get("/students")
 @jwt_required()
 def list_students():
@@ -176,46 +327,37 @@ def list_students():
     if error:
         return error
     
-    engine = get_engine()
     try:
-        with engine.connect() as conn:
-            result = conn.execute(text("""
-                SELECT 
-                    u.id, u.email, u.name, u.created_at,
-                    u.graduation_year, u.major, u.bio, u.skills,
-                    (SELECT COUNT(*) FROM stories WHERE author_id = u.id) as story_count,
-                    (SELECT COUNT(*) FROM mentorship_requests WHERE student_id = u.id) as mentorship_count,
-                    (SELECT COUNT(*) FROM messages WHERE sender_id = u.id OR receiver_id = u.id) as message_count,
-                    (SELECT COUNT(*) FROM applications WHERE applicant_id = u.id) as application_count
-                FROM users u
-                WHERE u.role = 'student'
-                ORDER BY u.created_at DESC
-            """))
-            
-            students = []
-            for row in result:
-                students.append({
-                    "id": row.id,
-                    "email": row.email,
-                    "name": row.name,
-                    "created_at": row.created_at.isoformat() if row.created_at else None,
-                    "graduation_year": row.graduation_year,
-                    "major": row.major,
-                    "bio": row.bio,
-                    "skills": row.skills,
-                    "stats": {
-                        "stories": row.story_count,
-                        "mentorships": row.mentorship_count,
-                        "messages": row.message_count,
-                        "applications": row.application_count
-                    }
-                })
-            
-            return jsonify(students), 200
+        if wants_columnar():
+            return json_columns(LIST_STUDENTS_WITH_STATS, STUDENT_WITH_STATS_ROW)
+        return json_rows(LIST_STUDENTS_WITH_STATS, STUDENT_WITH_STATS_ROW)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+LIST_ALUMNI_WITH_STATS = statement("admin.list_alumni_with_stats", """
+    SELECT 
+        u.id, u.email, u.name, u.created_at,
+        u.graduation_year, u.major, u.company, u.position, u.bio, u.skills,
+        (SELECT COUNT(*) FROM stories WHERE author_id = u.id) as story_count,
+        (SELECT COUNT(*) FROM opportunities WHERE posted_by = u.id) as opportunity_count,
+        (SELECT COUNT(*) FROM scholarships WHERE posted_by = u.id) as scholarship_count,
+        (SELECT COUNT(*) FROM mentorship_requests WHERE mentor_id = u.id) as mentorship_count,
+        (SELECT COUNT(*) FROM messages WHERE sender_id = u.id OR receiver_id = u.id) as message_count
+    FROM users u
+    WHERE u.role = 'alumni'
+    ORDER BY u.created_at DESC
+""")
+
+ALUMNI_WITH_STATS_ROW = RowEncoder([
+    "id", "email", "name", ("created_at", iso),
+    "graduation_year", "major", "company", "position",
+    "bio", "skills",
+    "stats.stories", "stats.opportunities", "stats.scholarships",
+    "stats.mentorships", "stats.messages"
+])
+
+
 @bp.get("/alumni")
 @jwt_required()
 def list_alumni():
@@ -225,90 +367,209 @@ def list_alumni():
     if error:
         return error
     
-    engine = get_engine()
     try:
-        with engine.connect() as conn:
-            result = conn.execute(text("""
-                SELECT 
-                    u.id, u.email, u.name, u.created_at,
-                    u.graduation_year, u.major, u.company, u.position, u.bio, u.skills,
-                    (SELECT COUNT(*) FROM stories WHERE author_id = u.id) as story_count,
-                    (SELECT COUNT(*) FROM opportunities WHERE posted_by = u.id) as opportunity_count,
-                    (SELECT COUNT(*) FROM scholarships WHERE posted_by = u.id) as scholarship_count,
-                    (SELECT COUNT(*) FROM mentorship_requests WHERE mentor_id = u.id) as mentorship_count,
-                    (SELECT COUNT(*) FROM messages WHERE sender_id = u.id OR receiver_id = u.id) as message_count
-                FROM users u
-                WHERE u.role = 'alumni'
-                ORDER BY u.created_at DESC
-            """))
-            
-            alumni = []
-            for row in result:
-                alumni.append({
-                    "id": row.id,
-                    "email": row.email,
-                    "name": row.name,
-                    "created_at": row.created_at.isoformat() if row.created_at else None,
-                    "graduation_year": row.graduation_year,
-                    "major": row.major,
-                    "company": row.company,
-                    "position": row.position,
-                    "bio": row.bio,
-                    "skills": row.skills,
-                    "stats": {
-                        "stories": row.story_count,
-                        "opportunities": row.opportunity_count,
-                        "scholarships": row.scholarship_count,
-                        "mentorships": row.mentorship_count,
-                        "messages": row.message_count
-                    }
-                })
-            
-            return jsonify(alumni), 200
+        if wants_columnar():
+            return json_columns(LIST_ALUMNI_WITH_STATS, ALUMNI_WITH_STATS_ROW)
+        return json_rows(LIST_ALUMNI_WITH_STATS, ALUMNI_WITH_STATS_ROW)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+COUNT_USERS_BY_ROLE = statement("admin.count_users_by_role", """
+    SELECT role, COUNT(*) as count FROM users GROUP BY role
+""")
+
+COUNT_TOTALS = statement("admin.count_totals", """
+    SELECT
+        (SELECT COUNT(*) FROM stories) as total_stories,
+        (SELECT COUNT(*) FROM opportunities) as total_opportunities,
+        (SELECT COUNT(*) FROM scholarships) as total_scholarships,
+        (SELECT COUNT(*) FROM mentorship_requests) as total_mentorship_requests,
+        (SELECT COUNT(*) FROM messages) as total_messages,
+        (SELECT COUNT(*) FROM applications) as total_applications
+""")
+
+
+def compute_platform_stats(conn):
+    """Count every entity on the platform"""
+    stats = {}
+
+    # User counts by role
+    result = conn.execute(COUNT_USERS_BY_ROLE)
+    stats["users_by_role"] = {row.role: row.count for row in result}
+
+    # Total counts, in one round-trip
+    totals = conn.execute(COUNT_TOTALS).fetchone()
+    stats.update(totals._asdict())
+
+    return stats
+
+
+@job("platform_stats")
+def platform_stats_job(payload):
+    with read_connection() as conn:
+        return compute_platform_stats(conn)
+
+
 @bp.get("/stats")
 @jwt_required()
 def get_platform_stats():
-    """Get overall platform statistics"""
+    """
+    Get overall platform statistics.
+
+    Serves the snapshot from the last platform_stats job and queues a
+    refresh once it is older than STATS_MAX_AGE seconds. Only the very first
+    request, before any snapshot exists, counts on the request path.
+    """
     current_user = get_current_user()
     error = require_admin(current_user)
     if error:
         return error
     
-    engine = get_engine()
     try:
-        with engine.connect() as conn:
-            # Get counts for each entity
-            stats = {}
-            
-            # User counts by role
-            result = conn.execute(text("""
-                SELECT role, COUNT(*) as count FROM users GROUP BY role
-            """))
-            stats["users_by_role"] = {row.role: row.count for row in result}
-            
-            # Total counts
-            result = conn.execute(text("SELECT COUNT(*) as count FROM stories"))
-            stats["total_stories"] = result.fetchone().count
-            
-            result = conn.execute(text("SELECT COUNT(*) as count FROM opportunities"))
-            stats["total_opportunities"] = result.fetchone().count
-            
-            result = conn.execute(text("SELECT COUNT(*) as count FROM scholarships"))
-            stats["total_scholarships"] = result.fetchone().count
-            
-            result = conn.execute(text("SELECT COUNT(*) as count FROM mentorship_requests"))
-            stats["total_mentorship_requests"] = result.fetchone().count
-            
-            result = conn.execute(text("SELECT COUNT(*) as count FROM messages"))
-            stats["total_messages"] = result.fetchone().count
-            
-            result = conn.execute(text("SELECT COUNT(*) as count FROM applications"))
-            stats["total_applications"] = result.fetchone().count
-            
-            return jsonify(stats), 200
+        max_age = get_config()["STATS_MAX_AGE"]
+        stats, age = latest_result("platform_stats")
+
+        if stats is None or age > max_age:
+            # One refresh per max_age window, however many admins are looking
+            enqueue("platform_stats", idempotency_key=f"platform_stats:{int(time.time() // max_age)}")
+
+        if stats is None:
+            with read_connection() as conn:
+                stats = compute_platform_stats(conn)
+
+        return jsonify(stats), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@bp.get("/analytics")
+@jwt_required()
+def get_analytics():
+    """
+    Daily time series for dashboard charts, read from the rollups kept by
+    the rollup_analytics job (app/analytics.py).
+
+    Query params: metrics (comma separated, default all), from / to (ISO
+    dates, default the last ANALYTICS_DEFAULT_DAYS days) and bucket (day,
+    week or month). Counts lag the sources by up to ROLLUP_INTERVAL.
+    """
+    current_user = get_current_user()
+    error = require_admin(current_user)
+    if error:
+        return error
+
+    cfg = get_config()
+    metrics = [m for m in request.args.get("metrics", "").split(",") if m] or list(analytics.METRICS)
+    unknown = [m for m in metrics if m not in analytics.METRICS]
+    if unknown:
+        return jsonify({"error": f"Unknown metrics: {', '.join(unknown)}"}), 400
+    bucket = request.args.get("bucket", "day")
+    if bucket not in analytics.BUCKETS:
+        return jsonify({"error": f"Bucket must be one of: {', '.join(analytics.BUCKETS)}"}), 400
+    try:
+        end = date.fromisoformat(request.args["to"]) if request.args.get("to") else date.today()
+        start = (date.fromisoformat(request.args["from"]) if request.args.get("from")
+                 else end - timedelta(days=cfg["ANALYTICS_DEFAULT_DAYS"] - 1))
+    except ValueError:
+        return jsonify({"error": "Invalid from or to date"}), 400
+    if start > end:
+        return jsonify({"error": "from must not be after to"}), 400
+    if (end - start).days >= cfg["ANALYTICS_MAX_DAYS"]:
+        return jsonify({"error": f"Range is limited to {cfg['ANALYTICS_MAX_DAYS']} days"}), 400
+
+    try:
+        with read_connection() as conn:
+            return jsonify(analytics.time_series(conn, metrics, start, end, bucket)), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+def engagement_window():
+    """(days, k) of an engagement query; ValueError if malformed or too long"""
+    cfg = get_config()
+    days = int(request.args.get("days", 7))
+    k = int(request.args.get("k", cfg["SKETCH_TOP_K"]))
+    if not 1 <= days <= cfg["SKETCH_MAX_DAYS"] or not 1 <= k <= sketches.TopK.CANDIDATES:
+        raise ValueError(f"days must be 1-{cfg['SKETCH_MAX_DAYS']} and k 1-{sketches.TopK.CANDIDATES}")
+    return days, k
+
+
+@bp.get("/engagement/active-messagers")
+@jwt_required()
+def get_active_messagers():
+    """Approximate number of distinct users who sent a message in the last ?days= days"""
+    current_user = get_current_user()
+    error = require_admin(current_user)
+    if error:
+        return error
+
+    try:
+        days, _ = engagement_window()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        sketch = sketches.window("active_messagers", days)
+        return jsonify({"days": days, "active_messagers": sketch.estimate()}), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@bp.get("/engagement/top-companies")
+@jwt_required()
+def get_top_companies():
+    """Companies that posted the most opportunities in the last ?days= days (approximate)"""
+    current_user = get_current_user()
+    error = require_admin(current_user)
+    if error:
+        return error
+
+    try:
+        days, k = engagement_window()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        top = sketches.window("posting_companies", days).top(k)
+        return jsonify({
+            "days": days,
+            "companies": [{"company": company, "postings": count} for company, count in top]
+        }), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+LIST_MENTOR_NAMES = statement("admin.list_mentor_names", """
+    SELECT id, name FROM users WHERE id IN :ids
+""", bindparam("ids", expanding=True))
+
+
+@bp.get("/engagement/top-mentors")
+@jwt_required()
+def get_top_mentors():
+    """Mentors who received the most mentorship requests in the last ?days= days (approximate)"""
+    current_user = get_current_user()
+    error = require_admin(current_user)
+    if error:
+        return error
+
+    try:
+        days, k = engagement_window()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        top = sketches.window("requested_mentors", days).top(k)
+        names = {}
+        if top:
+            with read_connection("users") as conn:
+                rows = conn.execute(LIST_MENTOR_NAMES, {"ids": [int(mentor_id) for mentor_id, _ in top]})
+                names = {row.id: row.name for row in rows}
+        return jsonify({
+            "days": days,
+            "mentors": [{"mentor_id": int(mentor_id), "name": names.get(int(mentor_id)), "requests": count}
+                        for mentor_id, count in top]
+        }), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
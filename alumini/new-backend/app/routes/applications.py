@@ -1,29 +1,35 @@
 from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from ..models import get_engine
-from sqlalchemy import text
+from ..models import get_engine, note_write, read_connection
+from ..config import get_config
+from sqlalchemy import bindparam
+from ..statements import statement
+from .scholarships import submit_application
 
 bp = Blueprint("applications", __name__)
 
 
+LIST_APPLICATIONS = statement("applications.list_applications", """
+    SELECT a.id, a.type, a.status, a.cover_letter, a.created_at,
+           o.title as opportunity_title, o.company as opportunity_company,
+           s.title as scholarship_title, s.amount as scholarship_amount
+    FROM applications a
+    LEFT JOIN opportunities o ON a.opportunity_id = o.id
+    LEFT JOIN scholarships s ON a.scholarship_id = s.id
+    WHERE a.applicant_id = :applicant_id
+    ORDER BY a.created_at DESC
+""")
+
+
 @bp.get("/")
 @jwt_required()
 def list_applications():
-    current_user = get_jwt_identity()
+    applicant_id = int(get_jwt_identity())
     engine = get_engine()
     
     try:
         with engine.connect() as conn:
-            result = conn.execute(text("""
-                SELECT a.id, a.type, a.status, a.cover_letter, a.created_at,
-                       o.title as opportunity_title, o.company as opportunity_company,
-                       s.title as scholarship_title, s.amount as scholarship_amount
-                FROM applications a
-                LEFT JOIN opportunities o ON a.opportunity_id = o.id
-                LEFT JOIN scholarships s ON a.scholarship_id = s.id
-                WHERE a.applicant_id = :applicant_id
-                ORDER BY a.created_at DESC
-            """), {"applicant_id": current_user["id"]})
+            result = conn.execute(LIST_APPLICATIONS, {"applicant_id": applicant_id})
             
             applications = []
             for row in result:
@@ -44,66 +50,120 @@ def list_applications():
         return jsonify({"error": str(e)}), 500
 
 
+# Skill coverage comes from the taxonomy join tables (app/skills.py): the
+# percentage (0-100) of the posting's required skills the applicant has
+SKILL_MATCH = """
+    COALESCE(ROUND(100 *
+        (SELECT COUNT(*) FROM opportunity_skills os
+         JOIN user_skills us ON us.user_id = u.id AND us.skill_id = os.skill_id
+         WHERE os.opportunity_id = o.id)
+        / NULLIF((SELECT COUNT(*) FROM opportunity_skills os WHERE os.opportunity_id = o.id), 0)), 0)
+"""
+
+APPLY_JOB = statement("applications.apply_job", f"""
+    INSERT IGNORE INTO applications (
+        applicant_id, opportunity_id, type, cover_letter, idempotency_key, match_score
+    )
+    SELECT u.id, o.id, 'job', :cover_letter, :idempotency_key, {SKILL_MATCH}
+    FROM opportunities o JOIN users u ON u.id = :applicant_id
+    WHERE o.id = :opportunity_id AND o.is_active = TRUE
+""")
+
+# Only run when APPLY_JOB inserted nothing, to say why
+EXPLAIN_REJECTED_JOB_APPLICATION = statement("applications.explain_rejected_job_application", """
+    SELECT o.is_active, a.id AS application_id, a.idempotency_key
+    FROM opportunities o
+    LEFT JOIN applications a ON a.applicant_id = :applicant_id AND a.opportunity_id = o.id
+    WHERE o.id = :opportunity_id
+""")
+
+
 @bp.post("/")
 @jwt_required()
 def create_application():
-    current_user = get_jwt_identity()
+    """
+    Submit an application. A job application is one INSERT ... SELECT that
+    checks the opportunity is open and fixes the skill match score the
+    poster's review queue sorts by; a scholarship application goes through
+    the same statement as /api/scholarships/<id>/apply, eligibility and
+    deadline included. Unique keys on (applicant_id, opportunity_id) and
+    (applicant_id, scholarship_id) reject duplicates; a retry carrying the
+    Idempotency-Key of the stored application gets the original 201.
+    """
+    applicant_id = int(get_jwt_identity())
     data = request.get_json()
     
     application_type = data.get("type")
     opportunity_id = data.get("opportunity_id")
     scholarship_id = data.get("scholarship_id")
     cover_letter = data.get("cover_letter")
+    idempotency_key = request.headers.get("Idempotency-Key")
     
     if not application_type or not cover_letter:
         return jsonify({"error": "Type and cover letter are required"}), 400
     
+    if application_type not in ("job", "scholarship"):
+        return jsonify({"error": "Type must be job or scholarship"}), 400
+    
     if application_type == "job" and not opportunity_id:
         return jsonify({"error": "Opportunity ID required for job applications"}), 400
     
     if application_type == "scholarship" and not scholarship_id:
         return jsonify({"error": "Scholarship ID required for scholarship applications"}), 400
     
-    engine = get_engine()
     try:
-        with engine.connect() as conn:
-            result = conn.execute(text("""
-                INSERT INTO applications (applicant_id, opportunity_id, scholarship_id, type, cover_letter)
-                VALUES (:applicant_id, :opportunity_id, :scholarship_id, :type, :cover_letter)
-            """), {
-                "applicant_id": current_user["id"],
-                "opportunity_id": opportunity_id,
-                "scholarship_id": scholarship_id,
-                "type": application_type,
-                "cover_letter": cover_letter
-            })
+        if application_type == "scholarship":
+            return submit_application(applicant_id, scholarship_id, cover_letter,
+                                      data.get("document_urls", []), idempotency_key)
+        
+        params = {"applicant_id": applicant_id, "opportunity_id": opportunity_id}
+        with get_engine().connect() as conn:
+            result = conn.execute(APPLY_JOB, dict(
+                params,
+                cover_letter=cover_letter,
+                idempotency_key=idempotency_key
+            ))
             conn.commit()
             
-            return jsonify({
-                "message": "Application submitted successfully",
-                "id": result.lastrowid
-            }), 201
+            if result.rowcount:
+                note_write("applications")
+                return jsonify({
+                    "message": "Application submitted successfully",
+                    "id": result.lastrowid
+                }), 201
+            
+            row = conn.execute(EXPLAIN_REJECTED_JOB_APPLICATION, params).fetchone()
+            if not row or not row.is_active:
+                return jsonify({"error": "Opportunity not found or inactive"}), 404
+            if not row.application_id:
+                return jsonify({"error": "User not found"}), 404
+            if idempotency_key and row.idempotency_key == idempotency_key:
+                return jsonify({"message": "Application submitted successfully", "id": row.application_id}), 201
+            return jsonify({"error": "You have already applied for this opportunity"}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+GET_APPLICATION = statement("applications.get_application", """
+    SELECT a.id, a.type, a.status, a.cover_letter, a.created_at,
+           o.title as opportunity_title, o.company as opportunity_company,
+           s.title as scholarship_title, s.amount as scholarship_amount
+    FROM applications a
+    LEFT JOIN opportunities o ON a.opportunity_id = o.id
+    LEFT JOIN scholarships s ON a.scholarship_id = s.id
+    WHERE a.id = :application_id AND a.applicant_id = :applicant_id
+""")
+
+
 @bp.get("/<int:application_id>")
 @jwt_required()
 def get_application(application_id):
-    current_user = get_jwt_identity()
+    applicant_id = int(get_jwt_identity())
     engine = get_engine()
     
     try:
         with engine.connect() as conn:
-            result = conn.execute(text("""
-                SELECT a.id, a.type, a.status, a.cover_letter, a.created_at,
-                       o.title as opportunity_title, o.company as opportunity_company,
-                       s.title as scholarship_title, s.amount as scholarship_amount
-                FROM applications a
-                LEFT JOIN opportunities o ON a.opportunity_id = o.id
-                LEFT JOIN scholarships s ON a.scholarship_id = s.id
-                WHERE a.id = :application_id AND a.applicant_id = :applicant_id
-            """), {"application_id": application_id, "applicant_id": current_user["id"]})
+            result = conn.execute(GET_APPLICATION, {"application_id": application_id, "applicant_id": applicant_id})
             
             application = result.fetchone()
             if not application:
@@ -122,3 +182,202 @@ def get_application(application_id):
             }), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
+
+
+# Posting kind in the review URLs -> (table, applications column)
+POSTINGS = {
+    "opportunity": ("opportunities", "opportunity_id"),
+    "scholarship": ("scholarships", "scholarship_id"),
+}
+
+# sort -> (keyset condition after the cursor row, ORDER BY). Application ids
+# grow with created_at, so "newest"/"oldest" order by id alone.
+REVIEW_SORTS = {
+    "score": ("(a.match_score, a.id) < (:after_score, :after_id)", "a.match_score DESC, a.id DESC"),
+    "newest": ("a.id < :after_id", "a.id DESC"),
+    "oldest": ("a.id > :after_id", "a.id ASC"),
+}
+
+GET_POSTING_OWNER = {
+    kind: statement(f"applications.get_{kind}_owner", f"""
+        SELECT posted_by FROM {table} WHERE id = :posting_id
+    """)
+    for kind, (table, _) in POSTINGS.items()
+}
+
+COUNT_RECEIVED_BY_STATUS = {
+    kind: statement(f"applications.count_received_{kind}_by_status", f"""
+        SELECT status, COUNT(*) AS count FROM applications
+        WHERE {column} = :posting_id
+        GROUP BY status
+    """)
+    for kind, (_, column) in POSTINGS.items()
+}
+
+# Unused filters are bound as NULL; PyMySQL inlines the parameters, so MySQL
+# folds "NULL IS NULL OR ..." away and can still range-scan
+# idx_applications_<posting>_review (posting, status, match_score, id).
+LIST_RECEIVED = {
+    (kind, sort): statement(f"applications.list_received_{kind}_by_{sort}", f"""
+        SELECT a.id, a.status, a.match_score, a.cover_letter, a.resume_url,
+               a.document_urls, a.created_at,
+               u.id AS applicant_id, u.name AS applicant_name, u.email AS applicant_email,
+               u.graduation_year, u.major, u.skills, u.cgpa
+        FROM applications a
+        JOIN users u ON u.id = a.applicant_id
+        WHERE a.{column} = :posting_id
+          AND (:status IS NULL OR a.status = :status)
+          AND (:after_id IS NULL OR {after})
+        ORDER BY {order}
+        LIMIT :limit
+    """)
+    for kind, (_, column) in POSTINGS.items()
+    for sort, (after, order) in REVIEW_SORTS.items()
+}
+
+APPLICATION_STATUSES = ("submitted", "under_review", "accepted", "rejected")
+
+
+def parse_cursor(cursor, sort):
+    """Split a next_cursor ("<id>", or "<score>:<id>" for sort=score) into (score, id)"""
+    if not cursor:
+        return None, None
+    parts = cursor.split(":")
+    if len(parts) != (2 if sort == "score" else 1) or not all(part.isdigit() for part in parts):
+        raise ValueError("Invalid cursor")
+    return (int(parts[0]) if sort == "score" else None), int(parts[-1])
+
+
+@bp.get("/received/<any(opportunity, scholarship):kind>/<int:posting_id>")
+@jwt_required()
+def list_received(kind, posting_id):
+    """
+    Review queue of one posting for the alumnus who posted it (or the admin).
+
+    Query params: status, sort (score | newest | oldest, default score),
+    limit and cursor (the previous page's next_cursor). Pages are keyset
+    paginated, so deep pages cost the same as the first one.
+    """
+    user_id = int(get_jwt_identity())
+    cfg = get_config()
+    status = request.args.get("status") or None
+    sort = request.args.get("sort", "score")
+    if status is not None and status not in APPLICATION_STATUSES:
+        return jsonify({"error": f"Status must be one of: {', '.join(APPLICATION_STATUSES)}"}), 400
+    if sort not in REVIEW_SORTS:
+        return jsonify({"error": f"Sort must be one of: {', '.join(REVIEW_SORTS)}"}), 400
+    try:
+        after_score, after_id = parse_cursor(request.args.get("cursor"), sort)
+        limit = min(max(int(request.args.get("limit", cfg["REVIEW_PAGE_SIZE"])), 1), cfg["REVIEW_MAX_PAGE_SIZE"])
+    except ValueError:
+        return jsonify({"error": "Invalid cursor or limit"}), 400
+    
+    try:
+        with read_connection("applications") as conn:
+            owner = conn.execute(GET_POSTING_OWNER[kind], {"posting_id": posting_id}).fetchone()
+            if not owner:
+                return jsonify({"error": f"{kind.capitalize()} not found"}), 404
+            if user_id != -1 and owner.posted_by != user_id:
+                return jsonify({"error": "You can only review applications to your own postings"}), 403
+            
+            rows = conn.execute(LIST_RECEIVED[(kind, sort)], {
+                "posting_id": posting_id,
+                "status": status,
+                "after_score": after_score,
+                "after_id": after_id,
+                "limit": limit + 1
+            }).fetchall()
+            counts = dict.fromkeys(APPLICATION_STATUSES, 0)
+            counts.update(conn.execute(COUNT_RECEIVED_BY_STATUS[kind], {"posting_id": posting_id}).fetchall())
+        
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = f"{last.match_score}:{last.id}" if sort == "score" else str(last.id)
+        
+        return jsonify({
+            "applications": [{
+                "id": row.id,
+                "status": row.status,
+                "match_score": row.match_score,
+                "cover_letter": row.cover_letter,
+                "resume_url": row.resume_url,
+                "document_urls": row.document_urls,
+                "created_at": row.created_at.isoformat() if row.created_at else None,
+                "applicant": {
+                    "id": row.applicant_id,
+                    "name": row.applicant_name,
+                    "email": row.applicant_email,
+                    "graduation_year": row.graduation_year,
+                    "major": row.major,
+                    "skills": row.skills,
+                    "cgpa": float(row.cgpa) if row.cgpa else None
+                }
+            } for row in rows],
+            "counts": counts,
+            "next_cursor": next_cursor
+        }), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+# Target status -> statuses it may be reached from
+STATUS_TRANSITIONS = {
+    "under_review": ("submitted",),
+    "accepted": ("submitted", "under_review"),
+    "rejected": ("submitted", "under_review"),
+}
+
+UPDATE_RECEIVED_STATUS = statement("applications.update_received_status", """
+    UPDATE applications a
+    LEFT JOIN opportunities o ON o.id = a.opportunity_id
+    LEFT JOIN scholarships s ON s.id = a.scholarship_id
+    SET a.status = :status
+    WHERE a.id IN :ids
+      AND a.status IN :from_statuses
+      AND (:poster_id = -1 OR o.posted_by = :poster_id OR s.posted_by = :poster_id)
+""", bindparam("ids", expanding=True), bindparam("from_statuses", expanding=True))
+
+
+@bp.patch("/received/status")
+@jwt_required()
+def update_received_status():
+    """
+    Move a batch of applications to a new status in one UPDATE.
+
+    Body: {"ids": [...], "status": "under_review" | "accepted" | "rejected"}.
+    Only applications to the caller's own postings that are in a status
+    allowed to move there are changed; the rest are reported as skipped.
+    """
+    poster_id = int(get_jwt_identity())
+    data = request.get_json() or {}
+    status = data.get("status")
+    ids = data.get("ids") or []
+    
+    if status not in STATUS_TRANSITIONS:
+        return jsonify({"error": f"Status must be one of: {', '.join(STATUS_TRANSITIONS)}"}), 400
+    if not isinstance(ids, list) or not all(isinstance(i, int) for i in ids) or not ids:
+        return jsonify({"error": "ids must be a non-empty list of application IDs"}), 400
+    if len(ids) > get_config()["REVIEW_MAX_BATCH"]:
+        return jsonify({"error": f"At most {get_config()['REVIEW_MAX_BATCH']} applications per update"}), 400
+    
+    ids = sorted(set(ids))
+    engine = get_engine()
+    try:
+        with engine.begin() as conn:
+            result = conn.execute(UPDATE_RECEIVED_STATUS, {
+                "ids": ids,
+                "status": status,
+                "from_statuses": list(STATUS_TRANSITIONS[status]),
+                "poster_id": poster_id
+            })
+        note_write("applications")
+        
+        return jsonify({
+            "message": f"Applications moved to {status}",
+            "updated": result.rowcount,
+            "skipped": len(ids) - result.rowcount
+        }), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
@@ -1,13 +1,24 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, get_jwt_identity, get_jwt
 import bcrypt
-from ..models import get_engine
-from sqlalchemy import text
+import uuid
+from ..models import get_engine, note_write
+from ..statements import statement
 from ..config import get_config
+from ..cache import response_cache
+from .. import directory, revocation
 
 bp = Blueprint("auth", __name__)
 
 
+FIND_USER_BY_EMAIL = statement("auth.find_user_by_email", "SELECT id FROM users WHERE email = :email")
+
+INSERT_USER = statement("auth.insert_user", """
+    INSERT INTO users (email, password_hash, name, role) 
+    VALUES (:email, :password_hash, :name, :role)
+""")
+
+
 @bp.post("/register")
 def register():
     data = request.get_json()
@@ -23,33 +34,65 @@ def register():
         return jsonify({"error": "Cannot register admin via API"}), 403
 
     # Hash password
-    password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(get_config()["BCRYPT_ROUNDS"])).decode('utf-8')
 
     engine = get_engine()
     try:
         with engine.connect() as conn:
             # Check if user exists
-            result = conn.execute(text("SELECT id FROM users WHERE email = :email"), {"email": email})
+            result = conn.execute(FIND_USER_BY_EMAIL, {"email": email})
             if result.fetchone():
                 return jsonify({"error": "User already exists"}), 400
 
             # Insert new user
-            conn.execute(text("""
-                INSERT INTO users (email, password_hash, name, role) 
-                VALUES (:email, :password_hash, :name, :role)
-            """), {
+            conn.execute(INSERT_USER, {
                 "email": email,
                 "password_hash": password_hash,
                 "name": name,
                 "role": role
             })
             conn.commit()
+            response_cache.invalidate("/api/users")
+            note_write("users")
+            directory.expire()
 
             return jsonify({"message": "User registered successfully"}), 201
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+def issue_tokens(user_id, role, family=None):
+    """
+    A short-lived access token and a long-lived refresh token. Both carry
+    the user's `role` (checked by admin routes) and the `family` of the
+    login they descend from, so one revocation ends every token rotated
+    from it (see revocation.py).
+    """
+    claims = {"role": role, "family": family or uuid.uuid4().hex}
+    return {
+        "access_token": create_access_token(identity=str(user_id), additional_claims=claims),
+        "refresh_token": create_refresh_token(identity=str(user_id), additional_claims=claims)
+    }
+
+
+GET_LOGIN_USER = statement("auth.get_login_user", """
+    SELECT id, email, password_hash, name, role FROM users WHERE email = :email
+""")
+
+UPDATE_PASSWORD_HASH = statement("auth.update_password_hash", """
+    UPDATE users SET password_hash = :password_hash WHERE id = :user_id
+""")
+
+
+def upgrade_password_hash(conn, user, password, rounds):
+    """Re-hash a password stored at a lower bcrypt cost (bulk imports use one)"""
+    if int(user.password_hash.split("$")[2]) >= rounds:
+        return
+    password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8')
+    conn.execute(UPDATE_PASSWORD_HASH, {"password_hash": password_hash, "user_id": user.id})
+    conn.commit()
+
+
 @bp.post("/login")
 def login():
     data = request.get_json()
@@ -65,19 +108,16 @@ def login():
         if password != cfg.get("ADMIN_PASSWORD"):
             return jsonify({"error": "Invalid credentials"}), 401
         
-        access_token = create_access_token(identity=str(-1))
         user_data = {"id": -1, "email": email, "name": "Administrator", "role": "admin"}
         return jsonify({
-            "access_token": access_token,
+            **issue_tokens(-1, "admin"),
             "user": user_data
         }), 200
 
     engine = get_engine()
     try:
         with engine.connect() as conn:
-            result = conn.execute(text("""
-                SELECT id, email, password_hash, name, role FROM users WHERE email = :email
-            """), {"email": email})
+            result = conn.execute(GET_LOGIN_USER, {"email": email})
             
             user = result.fetchone()
             if not user:
@@ -86,12 +126,11 @@ def login():
             # Verify password
             if not bcrypt.checkpw(password.encode('utf-8'), user.password_hash.encode('utf-8')):
                 return jsonify({"error": "Invalid credentials"}), 401
+            upgrade_password_hash(conn, user, password, cfg["BCRYPT_ROUNDS"])
             
-            # Create JWT token with user ID as identity
-            access_token = create_access_token(identity=str(user.id))
-            
+            # Create JWT tokens with user ID as identity
             return jsonify({
-                "access_token": access_token,
+                **issue_tokens(user.id, user.role),
                 "user": {
                     "id": user.id,
                     "email": user.email,
@@ -103,6 +142,68 @@ def login():
         return jsonify({"error": str(e)}), 500
 
 
+GET_PROFILE = statement("auth.get_profile", """
+    SELECT id, email, name, role FROM users WHERE id = :user_id
+""")
+
+
+def get_profile(user_id):
+    """
+    The profile returned with fresh tokens, cached in response_cache for
+    PROFILE_CACHE_SECONDS (profile updates clear it). None if the user is gone.
+    """
+    cfg = get_config()
+    if user_id == -1:
+        return {"id": -1, "email": cfg["ADMIN_EMAIL"], "name": "Administrator", "role": "admin"}
+
+    key = f"auth:profile:{user_id}"
+    profile = response_cache.get(key)
+    if profile is None:
+        with get_engine().connect() as conn:
+            user = conn.execute(GET_PROFILE, {"user_id": user_id}).fetchone()
+        if not user:
+            return None
+        profile = {"id": user.id, "email": user.email, "name": user.name, "role": user.role}
+        response_cache.set(key, profile, cfg["PROFILE_CACHE_SECONDS"])
+    return profile
+
+
+@bp.post("/refresh")
+@jwt_required(refresh=True)
+def refresh():
+    """
+    Trade a refresh token for a new access + refresh pair, without a
+    password check. The presented refresh token is rotated out; using it
+    again, even on another worker, revokes every token of the login it came
+    from.
+    """
+    claims = get_jwt()
+    try:
+        profile = get_profile(int(claims["sub"]))
+        if not profile:
+            return jsonify({"error": "User not found"}), 401
+
+        if not revocation.rotate(claims):
+            return jsonify({"error": "Token has been revoked"}), 401
+        return jsonify({
+            **issue_tokens(profile["id"], profile["role"], claims.get("family")),
+            "user": profile
+        }), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@bp.post("/logout")
+@jwt_required()
+def logout():
+    """Revoke the session the request was made with, refresh tokens included"""
+    try:
+        revocation.revoke_session(get_jwt())
+        return jsonify({"message": "Logged out"}), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
 @bp.get("/me")
 @jwt_required()
 def get_current_user():
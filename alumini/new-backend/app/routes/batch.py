@@ -0,0 +1,102 @@
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from flask import Blueprint, current_app, jsonify, request
+from werkzeug.routing import RequestRedirect
+from ..cache import CACHEABLE_ENDPOINTS, response_cache
+from ..config import get_config
+from ..ratelimit import client_key, get_limiter, retry_seconds
+
+bp = Blueprint("batch", __name__)
+
+_executor = ThreadPoolExecutor(max_workers=get_config()["BATCH_WORKERS"], thread_name_prefix="batch")
+
+
+# Caller headers a sub-request sees: its token, and its cookies (the
+# read-your-writes cookie of models.note_write among them)
+FORWARDED_HEADERS = ("Authorization", "Cookie")
+
+
+def run_part(app, path, headers, remote_addr, redirects=1):
+    """
+    Dispatch one GET sub-request to its view and return {"status", "body"}.
+    `headers` (FORWARDED_HEADERS) and `remote_addr` are the caller's.
+    """
+    if not isinstance(path, str) or not path.startswith("/api/"):
+        return {"status": 400, "body": {"error": "Path must start with /api/"}}
+
+    with app.test_request_context(path, method="GET", headers=headers,
+                                  environ_base={"REMOTE_ADDR": remote_addr}):
+        if isinstance(request.routing_exception, RequestRedirect) and redirects:
+            # e.g. /api/opportunities -> /api/opportunities/
+            target = urlsplit(request.routing_exception.new_url)
+            new_path = target.path + (f"?{target.query}" if target.query else "")
+            return run_part(app, new_path, headers, remote_addr, redirects - 1)
+        if request.routing_exception is not None:
+            return {"status": getattr(request.routing_exception, "code", 404), "body": {"error": "Not found"}}
+
+        endpoint = request.url_rule.endpoint
+        if endpoint.startswith("batch."):
+            return {"status": 400, "body": {"error": "Batch requests cannot be nested"}}
+
+        # Each part spends from its own endpoint's bucket, as a direct call would
+        retry_after = get_limiter().check(endpoint, client_key())
+        if retry_after:
+            seconds = retry_seconds(retry_after)
+            return {"status": 429, "body": {"error": f"Too many requests, retry in {seconds} seconds"},
+                    "retry_after": seconds}
+
+        cache_key = request.full_path.rstrip("?")
+        cacheable = endpoint in CACHEABLE_ENDPOINTS
+        if cacheable:
+            cached = response_cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        try:
+            try:
+                rv = app.view_functions[endpoint](**request.view_args)
+            except Exception as e:
+                # Lets flask_jwt_extended and HTTPException handlers build the response
+                rv = app.handle_user_exception(e)
+            response = app.make_response(rv)
+        except Exception as e:
+            return {"status": 500, "body": {"error": str(e)}}
+
+        part = {"status": response.status_code, "body": response.get_json(silent=True)}
+        # Releases anything held by a streamed body (e.g. json_rows' connection)
+        response.close()
+        if cacheable and response.status_code == 200:
+            response_cache.set(cache_key, part, get_config()["BATCH_CACHE_TTL"])
+        return part
+
+
+@bp.post("/batch")
+def batch():
+    """
+    Run several read-only sub-requests in one round-trip.
+
+    Body: {"requests": {"<name>": "/api/...", ...}}. Parts are dispatched
+    concurrently to their GET views (sharing the pooled engine) with the
+    caller's Authorization and Cookie headers and address, and the response maps each name to
+    {"status": ..., "body": ...}. Each part counts against its endpoint's
+    rate limit; a part over it gets status 429 and "retry_after" seconds.
+    Responses of public list endpoints are cached per part.
+    """
+    data = request.get_json(silent=True) or {}
+    parts = data.get("requests")
+    cfg = get_config()
+
+    if not isinstance(parts, dict) or not parts:
+        return jsonify({"error": "requests must be an object of name -> path"}), 400
+    if len(parts) > cfg["BATCH_MAX_PARTS"]:
+        return jsonify({"error": f"At most {cfg['BATCH_MAX_PARTS']} requests per batch"}), 400
+
+    app = current_app._get_current_object()
+    headers = {name: request.headers[name] for name in FORWARDED_HEADERS if name in request.headers}
+    futures = {
+        name: _executor.submit(run_part, app, path, headers, request.remote_addr)
+        for name, path in parts.items()
+    }
+
+    return jsonify({name: future.result() for name, future in futures.items()}), 200
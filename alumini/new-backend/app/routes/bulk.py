@@ -0,0 +1,364 @@
+import csv
+import io
+import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import bcrypt
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+from flask_jwt_extended import jwt_required
+from sqlalchemy import bindparam
+from ..config import get_config
+from .. import feed
+from ..jobs import enqueue
+from ..models import get_engine, note_write, read_connection
+from ..statements import statement
+from .admin import get_current_user, require_admin
+
+bp = Blueprint("bulk", __name__)
+
+
+USER_COLUMNS = [
+    "email", "name", "role", "graduation_year", "major", "company", "position",
+    "bio", "skills", "cgpa", "reservation_category", "is_lateral_entry"
+]
+
+OPPORTUNITY_COLUMNS = [
+    "title", "company", "description", "requirements", "location",
+    "salary_range", "type", "posted_by_email"
+]
+
+OPPORTUNITY_TYPES = ["full-time", "part-time", "internship", "contract"]
+
+
+def iter_records(stream, fmt):
+    """Yield (line_number, record) from a CSV or NDJSON upload without reading it all into memory"""
+    lines = io.TextIOWrapper(stream, encoding="utf-8", newline="")
+    if fmt == "csv":
+        reader = csv.DictReader(lines)
+        for record in reader:
+            yield reader.line_num, record
+    else:
+        for line_number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield line_number, json.loads(line)
+            except ValueError as e:
+                yield line_number, e
+
+
+FORMATS = ("csv", "ndjson")
+
+
+def upload_format():
+    """Pick csv or ndjson from ?format= or the Content-Type header"""
+    fmt = request.args.get("format")
+    if fmt:
+        return fmt.lower()
+    if "csv" in (request.content_type or ""):
+        return "csv"
+    return "ndjson"
+
+
+def blank_to_none(value):
+    if isinstance(value, str):
+        value = value.strip()
+    return None if value == "" else value
+
+
+def parse_bool(value):
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ("1", "true", "yes", "y")
+
+
+def validate_user(record):
+    """Return (params, password) for a user row, or raise ValueError"""
+    email = blank_to_none(record.get("email"))
+    name = blank_to_none(record.get("name"))
+    password = blank_to_none(record.get("password"))
+    role = blank_to_none(record.get("role")) or "student"
+
+    if not email or not password or not name:
+        raise ValueError("Email, password, and name are required")
+    if role not in ("student", "alumni"):
+        raise ValueError(f"Invalid role '{role}'")
+
+    graduation_year = blank_to_none(record.get("graduation_year"))
+    cgpa = blank_to_none(record.get("cgpa"))
+    is_lateral_entry = blank_to_none(record.get("is_lateral_entry"))
+
+    params = {column: blank_to_none(record.get(column)) for column in USER_COLUMNS}
+    params["role"] = role
+    params["graduation_year"] = int(graduation_year) if graduation_year is not None else None
+    params["cgpa"] = float(cgpa) if cgpa is not None else None
+    params["is_lateral_entry"] = parse_bool(is_lateral_entry) if is_lateral_entry is not None else False
+    return params, password
+
+
+def validate_opportunity(record):
+    """Return params for an opportunity row, or raise ValueError"""
+    params = {column: blank_to_none(record.get(column)) for column in OPPORTUNITY_COLUMNS}
+    if not params["title"] or not params["company"] or not params["type"]:
+        raise ValueError("Title, company, and type are required")
+    if params["type"] not in OPPORTUNITY_TYPES:
+        raise ValueError(f"Invalid type '{params['type']}'")
+    return params
+
+
+def hash_password(password, rounds):
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8')
+
+
+def batched(records, size):
+    batch = []
+    for item in records:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def valid_rows(records, validate, errors):
+    """Yield (line_number, validated) and collect per-row errors as they stream past"""
+    for line_number, record in records:
+        if isinstance(record, Exception):
+            errors.append({"line": line_number, "error": f"Invalid JSON: {record}"})
+            continue
+        if not isinstance(record, dict):
+            errors.append({"line": line_number, "error": "Expected an object per row"})
+            continue
+        try:
+            yield line_number, validate(record)
+        except (ValueError, TypeError) as e:
+            errors.append({"line": line_number, "error": str(e)})
+
+
+FIND_EXISTING_USERS = statement("bulk.find_existing_users", """
+    SELECT email FROM users WHERE email IN :emails
+""", bindparam("emails", expanding=True))
+
+# An account registered while the import runs is left as it is
+INSERT_USERS = statement("bulk.insert_users", """
+    INSERT INTO users (email, password_hash, name, role, graduation_year, major,
+                       company, position, bio, skills, cgpa,
+                       reservation_category, is_lateral_entry)
+    VALUES (:email, :password_hash, :name, :role, :graduation_year, :major,
+            :company, :position, :bio, :skills, :cgpa,
+            :reservation_category, :is_lateral_entry)
+    ON DUPLICATE KEY UPDATE email = email
+""")
+
+
+@bp.post("/import/users")
+@jwt_required()
+def import_users():
+    """
+    Create users from a CSV or NDJSON upload.
+
+    Rows are validated as they stream in. Emails that already have an
+    account are reported under `existing` and left untouched, credentials
+    included. Passwords of the new rows are hashed in a thread pool (bcrypt
+    releases the GIL) at BULK_BCRYPT_ROUNDS, and upgraded to BCRYPT_ROUNDS
+    at the user's first login; each batch is written with one multi-row
+    INSERT. The imported skills are indexed afterwards by a backfill_skills
+    job over the rows updated since the import started.
+    """
+    current_user = get_current_user()
+    error = require_admin(current_user)
+    if error:
+        return error
+
+    cfg = get_config()
+    errors = []
+    existing = []
+    seen = set()
+    processed = 0
+    engine = get_engine()
+    started = datetime.now() - timedelta(seconds=cfg["SYNC_OVERLAP_SECONDS"])
+    try:
+        rows = valid_rows(iter_records(request.stream, upload_format()), validate_user, errors)
+        with ThreadPoolExecutor(max_workers=cfg["BULK_HASH_WORKERS"]) as pool:
+            for batch in batched(rows, cfg["BULK_BATCH_SIZE"]):
+                with engine.connect() as conn:
+                    result = conn.execute(FIND_EXISTING_USERS, {"emails": [user["email"] for _, (user, _) in batch]})
+                    # Emails compare case-insensitively, as the unique key does
+                    seen.update(row.email.lower() for row in result)
+
+                new = []
+                for line_number, (user, password) in batch:
+                    email = user["email"].lower()
+                    if email in seen:
+                        existing.append({"line": line_number, "email": user["email"]})
+                        continue
+                    seen.add(email)
+                    new.append((user, password))
+                if not new:
+                    continue
+
+                hashes = pool.map(hash_password, [password for _, password in new],
+                                  [cfg["BULK_BCRYPT_ROUNDS"]] * len(new))
+                params = [dict(user, password_hash=password_hash)
+                          for (user, _), password_hash in zip(new, hashes)]
+
+                with engine.begin() as conn:
+                    conn.execute(INSERT_USERS, params)
+                processed += len(params)
+
+        note_write("users")
+        skills_job_id = enqueue("backfill_skills", {"since": started.isoformat(), "resources": ["users"]})
+        return jsonify({
+            "processed": processed, "existing": existing, "errors": errors, "skills_job_id": skills_job_id
+        }), 200
+    except Exception as e:
+        return jsonify({"error": str(e), "processed": processed, "existing": existing, "errors": errors}), 500
+
+
+FIND_POSTERS = statement("bulk.find_posters", """
+    SELECT id, email FROM users WHERE email IN :emails
+""", bindparam("emails", expanding=True))
+
+INSERT_OPPORTUNITIES = statement("bulk.insert_opportunities", """
+    INSERT INTO opportunities (title, company, description, requirements,
+                               location, salary_range, type, posted_by)
+    VALUES (:title, :company, :description, :requirements,
+            :location, :salary_range, :type, :posted_by)
+""")
+
+
+@bp.post("/import/opportunities")
+@jwt_required()
+def import_opportunities():
+    """
+    Create opportunities from a CSV or NDJSON upload.
+
+    `posted_by_email` is resolved to a user id with one lookup per batch;
+    each batch is written with a single multi-row INSERT. The newest ones
+    then go into the home feed, and requirements are linked to skills
+    afterwards by a backfill_skills job.
+    """
+    current_user = get_current_user()
+    error = require_admin(current_user)
+    if error:
+        return error
+
+    cfg = get_config()
+    errors = []
+    processed = 0
+    engine = get_engine()
+    started = datetime.now() - timedelta(seconds=cfg["SYNC_OVERLAP_SECONDS"])
+    try:
+        rows = valid_rows(iter_records(request.stream, upload_format()), validate_opportunity, errors)
+        for batch in batched(rows, cfg["BULK_BATCH_SIZE"]):
+            with engine.begin() as conn:
+                emails = {opportunity["posted_by_email"] for _, opportunity in batch if opportunity["posted_by_email"]}
+                posters = {}
+                if emails:
+                    result = conn.execute(FIND_POSTERS, {"emails": list(emails)})
+                    posters = {row.email: row.id for row in result}
+
+                params = []
+                for line_number, opportunity in batch:
+                    email = opportunity.pop("posted_by_email")
+                    if email and email not in posters:
+                        errors.append({"line": line_number, "error": f"Unknown poster '{email}'"})
+                        continue
+                    params.append(dict(opportunity, posted_by=posters.get(email)))
+
+                if params:
+                    conn.execute(INSERT_OPPORTUNITIES, params)
+            processed += len(params)
+
+        with engine.begin() as conn:
+            feed.add_recent_opportunities(conn, started)
+        note_write("opportunities")
+        skills_job_id = enqueue("backfill_skills", {"since": started.isoformat(), "resources": ["opportunities"]})
+        return jsonify({"processed": processed, "errors": errors, "skills_job_id": skills_job_id}), 200
+    except Exception as e:
+        return jsonify({"error": str(e), "processed": processed, "errors": errors}), 500
+
+
+def export_format():
+    """csv (the default) or ndjson from ?format=; None for anything else"""
+    fmt = request.args.get("format", "csv").lower()
+    return fmt if fmt in FORMATS else None
+
+
+def stream_export(query, columns, fmt, params=None):
+    """Stream rows of `query` as CSV or NDJSON straight from a server-side cursor"""
+    def generate():
+        with read_connection() as conn:
+            result = conn.execution_options(stream_results=True, yield_per=1000).execute(query, params or {})
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            if fmt == "csv":
+                writer.writerow(columns)
+
+            for partition in result.partitions():
+                for row in partition:
+                    if fmt == "csv":
+                        writer.writerow(row)
+                    else:
+                        buffer.write(json.dumps(dict(zip(columns, row)), default=str))
+                        buffer.write("\n")
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            yield buffer.getvalue()
+
+    mimetype = "text/csv" if fmt == "csv" else "application/x-ndjson"
+    return Response(stream_with_context(generate()), mimetype=mimetype)
+
+
+EXPORT_USERS = statement("bulk.export_users", f"""
+    SELECT {", ".join(USER_COLUMNS)}
+    FROM users
+    WHERE :role IS NULL OR role = :role
+    ORDER BY id
+""")
+
+
+@bp.get("/export/users")
+@jwt_required()
+def export_users():
+    """Stream all users (optionally ?role=) as CSV or NDJSON"""
+    current_user = get_current_user()
+    error = require_admin(current_user)
+    if error:
+        return error
+
+    fmt = export_format()
+    if fmt is None:
+        return jsonify({"error": "format must be csv or ndjson"}), 400
+
+    role = request.args.get("role")
+    return stream_export(EXPORT_USERS, USER_COLUMNS, fmt, {"role": role})
+
+
+EXPORT_OPPORTUNITIES = statement("bulk.export_opportunities", """
+    SELECT o.title, o.company, o.description, o.requirements, o.location,
+           o.salary_range, o.type, u.email as posted_by_email
+    FROM opportunities o
+    LEFT JOIN users u ON o.posted_by = u.id
+    WHERE o.is_active = TRUE
+    ORDER BY o.id
+""")
+
+
+@bp.get("/export/opportunities")
+@jwt_required()
+def export_opportunities():
+    """Stream all active opportunities as CSV or NDJSON"""
+    current_user = get_current_user()
+    error = require_admin(current_user)
+    if error:
+        return error
+
+    fmt = export_format()
+    if fmt is None:
+        return jsonify({"error": "format must be csv or ndjson"}), 400
+
+    return stream_export(EXPORT_OPPORTUNITIES, OPPORTUNITY_COLUMNS, fmt)
@@ -0,0 +1,62 @@
+from flask import Blueprint, jsonify, request
+from ..models import read_connection
+from ..jobs import latest_result
+from ..statements import statement
+
+bp = Blueprint("feed", __name__)
+
+
+GET_FEED = statement("feed.get_feed", """
+    (SELECT item_type, item_id, title, subtitle, tag, summary, author_name,
+            is_featured, created_at
+     FROM home_feed WHERE item_type = 'opportunity'
+     ORDER BY created_at DESC LIMIT :limit)
+    UNION ALL
+    (SELECT item_type, item_id, title, subtitle, tag, summary, author_name,
+            is_featured, created_at
+     FROM home_feed WHERE item_type = 'story'
+     ORDER BY is_featured DESC, created_at DESC LIMIT :limit)
+    UNION ALL
+    (SELECT item_type, item_id, title, subtitle, tag, summary, author_name,
+            is_featured, created_at
+     FROM home_feed WHERE item_type = 'scholarship'
+     ORDER BY created_at DESC LIMIT :limit)
+""")
+
+
+@bp.get("/")
+def get_feed():
+    """
+    Home page feed: newest opportunities, stories (featured first) and
+    scholarships, read from the denormalised home_feed table in one query.
+    `counts` comes from the latest platform stats snapshot, when there is one.
+    """
+    limit = min(request.args.get("limit", 10, type=int), 50)
+    try:
+        with read_connection("opportunities", "stories", "scholarships") as conn:
+            result = conn.execute(GET_FEED, {"limit": limit})
+
+            feed = {"opportunities": [], "stories": [], "scholarships": []}
+            sections = {"opportunity": "opportunities", "story": "stories", "scholarship": "scholarships"}
+            for row in result:
+                feed[sections[row.item_type]].append({
+                    "id": row.item_id,
+                    "title": row.title,
+                    "subtitle": row.subtitle,
+                    "tag": row.tag,
+                    "summary": row.summary,
+                    "author_name": row.author_name,
+                    "is_featured": row.is_featured,
+                    "created_at": row.created_at.isoformat() if row.created_at else None
+                })
+
+        stats, _ = latest_result("platform_stats")
+        feed["counts"] = {
+            "opportunities": stats["total_opportunities"],
+            "stories": stats["total_stories"],
+            "scholarships": stats["total_scholarships"]
+        } if stats else None
+
+        return jsonify(feed), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
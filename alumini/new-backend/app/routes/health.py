@@ -1,16 +1,64 @@
 from flask import Blueprint, jsonify
-from ..models import ping_db
+from ..config import get_config
+from .. import models, probes
 
 
 bp = Blueprint("health", __name__)
 
 
+@bp.get("/health/live")
+def live():
+    """Liveness: the process is serving requests. No I/O."""
+    return jsonify({"status": "ok"})
+
+
+def readiness():
+    """
+    (ready, reason, snapshot) from the background checker's last probe, or
+    from probing now when the checker is disabled (HEALTH_PROBE_INTERVAL=0).
+    Not ready until the startup warm-up (DB_WARM_UP) has tried every engine.
+    """
+    cfg = get_config()
+    if cfg["DB_WARM_UP"] and not models.is_warmed_up():
+        return False, "starting", None
+    if cfg["HEALTH_PROBE_INTERVAL"] <= 0:
+        probes.run_probes()
+    snapshot = probes.latest()
+    if snapshot is None:
+        return False, "starting", None
+    if cfg["HEALTH_PROBE_INTERVAL"] > 0 and snapshot["age_seconds"] > 3 * cfg["HEALTH_PROBE_INTERVAL"]:
+        return False, "probe is stale", snapshot
+    if not snapshot["db"]["ok"]:
+        return False, "database unreachable", snapshot
+    pool = snapshot["db"]["pool"]
+    if pool and pool["saturation"] is not None and pool["saturation"] >= cfg["HEALTH_MAX_POOL_SATURATION"]:
+        return False, "connection pool saturated", snapshot
+    return True, None, snapshot
+
+
+def public(snapshot):
+    """Whether each database is ok, without hosts or driver errors (those are logged)"""
+    return {
+        "checked_at": snapshot["checked_at"],
+        "age_seconds": snapshot["age_seconds"],
+        "db": {"ok": snapshot["db"]["ok"]},
+        "replicas": [{"ok": replica["ok"]} for replica in snapshot["replicas"]],
+    }
+
+
+@bp.get("/health/ready")
+def ready():
+    """Readiness: database reachable and pool not saturated, as of the last probe"""
+    is_ready, reason, snapshot = readiness()
+    body = {"status": "ready" if is_ready else "not_ready", "reason": reason}
+    if snapshot is not None:
+        body.update(public(snapshot))
+    return jsonify(body), 200 if is_ready else 503
+
+
 @bp.get("/health")
 def health():
-    try:
-        ping_db()
+    is_ready, reason, _ = readiness()
+    if is_ready:
         return jsonify({"status": "ok", "db": "ok"})
-    except Exception as exc:  # pragma: no cover
-        return jsonify({"status": "degraded", "error": str(exc)}), 500
-
-
+    return jsonify({"status": "degraded", "error": reason}), 503
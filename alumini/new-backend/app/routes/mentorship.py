@@ -1,84 +1,298 @@
 from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from ..models import get_engine
-from sqlalchemy import text
+from ..models import get_engine, note_write, read_connection
+from ..auth_helpers import get_current_user
+from ..cache import response_cache
+from ..changes import changes_response
+from ..config import get_config
+from ..jobs import job
+from .. import sketches
+from ..statements import statement
+from sqlalchemy import bindparam
 
 bp = Blueprint("mentorship", __name__)
 
 
+# Requests that hold one of the mentor's slots (users.mentor_open_requests)
+OPEN_STATUSES = ("pending", "accepted")
+MENTORSHIP_STATUSES = ("pending", "accepted", "rejected", "completed")
+
+# The caller's requests, as student or as mentor; the admin (-1) sees all
+LIST_MENTORSHIPS = statement("mentorship.list_mentorships", """
+    SELECT mr.id, mr.subject, mr.message, mr.status, mr.created_at,
+           s.name as student_name, m.name as mentor_name,
+           s.email as student_email, m.email as mentor_email
+    FROM mentorship_requests mr
+    LEFT JOIN users s ON mr.student_id = s.id
+    LEFT JOIN users m ON mr.mentor_id = m.id
+    WHERE :user_id = -1 OR mr.student_id = :user_id OR mr.mentor_id = :user_id
+    ORDER BY mr.created_at DESC
+""")
+
+
+def serialize_mentorship(row):
+    return {
+        "id": row.id,
+        "subject": row.subject,
+        "message": row.message,
+        "status": row.status,
+        "student_name": row.student_name,
+        "mentor_name": row.mentor_name,
+        "student_email": row.student_email,
+        "mentor_email": row.mentor_email,
+        "created_at": row.created_at.isoformat() if row.created_at else None
+    }
+
+
 @bp.get("/")
+@jwt_required()
 def list_mentorships():
-    engine = get_engine()
     try:
-        with engine.connect() as conn:
-            result = conn.execute(text("""
-                SELECT mr.id, mr.subject, mr.message, mr.status, mr.created_at,
-                       s.name as student_name, m.name as mentor_name,
-                       s.email as student_email, m.email as mentor_email
-                FROM mentorship_requests mr
-                LEFT JOIN users s ON mr.student_id = s.id
-                LEFT JOIN users m ON mr.mentor_id = m.id
-                ORDER BY mr.created_at DESC
-            """))
-            
+        with read_connection("mentorship") as conn:
+            result = conn.execute(LIST_MENTORSHIPS, {"user_id": int(get_jwt_identity())})
+
             mentorships = []
             for row in result:
-                mentorships.append({
-                    "id": row.id,
-                    "subject": row.subject,
-                    "message": row.message,
-                    "status": row.status,
-                    "student_name": row.student_name,
-                    "mentor_name": row.mentor_name,
-                    "student_email": row.student_email,
-                    "mentor_email": row.mentor_email,
-                    "created_at": row.created_at.isoformat() if row.created_at else None
-                })
-            
+                mentorships.append(serialize_mentorship(row))
+
             return jsonify(mentorships), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+LIST_CHANGED_MENTORSHIPS = statement("mentorship.list_changed_mentorships", """
+    SELECT mr.id, mr.subject, mr.message, mr.status, mr.created_at,
+           mr.updated_at, TRUE as is_listed,
+           s.name as student_name, m.name as mentor_name,
+           s.email as student_email, m.email as mentor_email
+    FROM mentorship_requests mr
+    LEFT JOIN users s ON mr.student_id = s.id
+    LEFT JOIN users m ON mr.mentor_id = m.id
+    WHERE mr.updated_at >= :since
+      AND (:user_id = -1 OR mr.student_id = :user_id OR mr.mentor_id = :user_id)
+""")
+
+
+@bp.get("/changes")
+@jwt_required()
+def list_changed_mentorships():
+    try:
+        return changes_response("mentorship", LIST_CHANGED_MENTORSHIPS, serialize_mentorship, "mentorship",
+                                params={"user_id": int(get_jwt_identity())})
+    except ValueError:
+        return jsonify({"error": "Invalid since"}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+# box -> column that must be the caller. Both read
+# idx_mentorship_<column>_status (<column>, status; the id comes with it)
+MAILBOXES = {
+    "inbox": "mentor_id",
+    "outbox": "student_id",
+}
+
+LIST_MAILBOX = {
+    box: statement(f"mentorship.list_{box}", f"""
+        SELECT mr.id, mr.subject, mr.message, mr.status, mr.created_at,
+               s.name as student_name, m.name as mentor_name,
+               s.email as student_email, m.email as mentor_email
+        FROM mentorship_requests mr
+        LEFT JOIN users s ON mr.student_id = s.id
+        LEFT JOIN users m ON mr.mentor_id = m.id
+        WHERE mr.{column} = :user_id
+          AND (:status IS NULL OR mr.status = :status)
+          AND (:after_id IS NULL OR mr.id < :after_id)
+        ORDER BY mr.id DESC
+        LIMIT :limit
+    """)
+    for box, column in MAILBOXES.items()
+}
+
+COUNT_MAILBOX_BY_STATUS = {
+    box: statement(f"mentorship.count_{box}_by_status", f"""
+        SELECT status, COUNT(*) AS count FROM mentorship_requests
+        WHERE {column} = :user_id
+        GROUP BY status
+    """)
+    for box, column in MAILBOXES.items()
+}
+
+
+@bp.get("/<any(inbox, outbox):box>")
+@jwt_required()
+def list_mailbox(box):
+    """
+    The caller's mentorship requests: received as mentor (inbox) or sent as
+    student (outbox). Query params: status, limit and cursor (the previous
+    page's next_cursor); pages are keyset paginated on the request id.
+    """
+    user_id = int(get_jwt_identity())
+    cfg = get_config()
+    status = request.args.get("status") or None
+    cursor = request.args.get("cursor")
+    if status is not None and status not in MENTORSHIP_STATUSES:
+        return jsonify({"error": f"Status must be one of: {', '.join(MENTORSHIP_STATUSES)}"}), 400
+    if cursor and not cursor.isdigit():
+        return jsonify({"error": "Invalid cursor"}), 400
+    try:
+        limit = min(max(int(request.args.get("limit", cfg["MENTORSHIP_PAGE_SIZE"])), 1),
+                    cfg["MENTORSHIP_MAX_PAGE_SIZE"])
+    except ValueError:
+        return jsonify({"error": "Invalid limit"}), 400
+
+    try:
+        with read_connection("mentorship") as conn:
+            rows = conn.execute(LIST_MAILBOX[box], {
+                "user_id": user_id,
+                "status": status,
+                "after_id": int(cursor) if cursor else None,
+                "limit": limit + 1
+            }).fetchall()
+            counts = dict.fromkeys(MENTORSHIP_STATUSES, 0)
+            counts.update(conn.execute(COUNT_MAILBOX_BY_STATUS[box], {"user_id": user_id}).fetchall())
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = str(rows[-1].id)
+
+        return jsonify({
+            "requests": [serialize_mentorship(row) for row in rows],
+            "counts": counts,
+            "next_cursor": next_cursor
+        }), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+# Reads idx_users_mentor_free_slots (role, mentor_free_slots): the mentors
+# with the most free slots come first, without touching mentorship_requests
+LIST_AVAILABLE_MENTORS = statement("mentorship.list_available_mentors", """
+    SELECT id, name, company, position, major, skills,
+           mentor_capacity, mentor_open_requests, mentor_free_slots
+    FROM users
+    WHERE role = 'alumni' AND mentor_free_slots > 0
+      AND id <> :exclude_id
+    ORDER BY mentor_free_slots DESC, id
+    LIMIT :limit
+""")
+
+
+def serialize_mentor(row):
+    return {
+        "id": row.id,
+        "name": row.name,
+        "company": row.company,
+        "position": row.position,
+        "major": row.major,
+        "skills": row.skills,
+        "capacity": row.mentor_capacity,
+        "open_requests": row.mentor_open_requests,
+        "free_slots": row.mentor_free_slots
+    }
+
+
+def suggest_mentors(conn, exclude_id=0, limit=None):
+    rows = conn.execute(LIST_AVAILABLE_MENTORS, {
+        "exclude_id": exclude_id,
+        "limit": limit or get_config()["MENTOR_SUGGESTIONS"]
+    })
+    return [serialize_mentor(row) for row in rows]
+
+
+@bp.get("/mentors/available")
+def list_available_mentors():
+    """Alumni with free mentee slots, most free first (`exclude` drops one id)"""
+    try:
+        exclude_id = int(request.args.get("exclude", 0))
+        limit = min(max(int(request.args.get("limit", get_config()["MENTOR_SUGGESTIONS"])), 1),
+                    get_config()["MENTORSHIP_MAX_PAGE_SIZE"])
+    except ValueError:
+        return jsonify({"error": "Invalid exclude or limit"}), 400
+    try:
+        with read_connection("users") as conn:
+            return jsonify(suggest_mentors(conn, exclude_id, limit)), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+GET_MENTOR = statement("mentorship.get_mentor", """
+    SELECT id, name FROM users WHERE id = :mentor_id AND role = 'alumni'
+""")
+
+# Takes one of the mentor's slots; no row changes when they are full. The row
+# lock it takes serialises concurrent requests to the same mentor.
+RESERVE_MENTOR_SLOT = statement("mentorship.reserve_mentor_slot", """
+    UPDATE users SET mentor_open_requests = mentor_open_requests + 1
+    WHERE id = :mentor_id AND role = 'alumni'
+      AND mentor_open_requests < mentor_capacity
+""")
+
+GET_OPEN_REQUEST = statement("mentorship.get_open_request", """
+    SELECT id FROM mentorship_requests
+    WHERE student_id = :student_id AND mentor_id = :mentor_id
+      AND status IN ('pending', 'accepted')
+    LIMIT 1
+""")
+
+INSERT_MENTORSHIP_REQUEST = statement("mentorship.insert_mentorship_request", """
+    INSERT INTO mentorship_requests (student_id, mentor_id, subject, message)
+    VALUES (:student_id, :mentor_id, :subject, :message)
+""")
+
+
 @bp.post("/request")
 @jwt_required()
 def request_mentorship():
-    current_user = get_jwt_identity()
+    current_user = get_current_user()
+    if not current_user:
+        return jsonify({"error": "User not found"}), 404
     data = request.get_json()
-    
+
     if current_user["role"] != "student":
         return jsonify({"error": "Only students can request mentorship"}), 403
-    
+
     mentor_id = data.get("mentor_id")
     subject = data.get("subject")
     message = data.get("message")
-    
+
     if not mentor_id or not subject:
         return jsonify({"error": "Mentor ID and subject are required"}), 400
-    
+
     engine = get_engine()
     try:
         with engine.connect() as conn:
             # Check if mentor exists and is alumni
-            mentor_result = conn.execute(text("""
-                SELECT id, name FROM users WHERE id = :mentor_id AND role = 'alumni'
-            """), {"mentor_id": mentor_id})
-            
+            mentor_result = conn.execute(GET_MENTOR, {"mentor_id": mentor_id})
+
             mentor = mentor_result.fetchone()
             if not mentor:
                 return jsonify({"error": "Mentor not found"}), 404
-            
+
+            if conn.execute(RESERVE_MENTOR_SLOT, {"mentor_id": mentor_id}).rowcount == 0:
+                conn.rollback()
+                return jsonify({
+                    "error": f"{mentor.name} has no free mentorship slots",
+                    "suggestions": suggest_mentors(conn, exclude_id=mentor.id)
+                }), 409
+
+            if conn.execute(GET_OPEN_REQUEST, {"student_id": current_user["id"], "mentor_id": mentor_id}).fetchone():
+                conn.rollback()
+                return jsonify({"error": f"You already have an open request with {mentor.name}"}), 409
+
             # Create mentorship request
-            result = conn.execute(text("""
-                INSERT INTO mentorship_requests (student_id, mentor_id, subject, message)
-                VALUES (:student_id, :mentor_id, :subject, :message)
-            """), {
+            result = conn.execute(INSERT_MENTORSHIP_REQUEST, {
                 "student_id": current_user["id"],
                 "mentor_id": mentor_id,
                 "subject": subject,
                 "message": message
             })
             conn.commit()
+            response_cache.invalidate("/api/mentorship")
+            response_cache.invalidate("/api/users/alumni")
+            note_write("mentorship", "users")
+            sketches.record("requested_mentors", mentor.id)
             
             return jsonify({
                 "message": "Mentorship request sent successfully",
@@ -89,39 +303,119 @@ def request_mentorship():
         return jsonify({"error": str(e)}), 500
 
 
+# Target status -> statuses it may be reached from
+MENTORSHIP_TRANSITIONS = {
+    "accepted": ("pending",),
+    "rejected": ("pending", "accepted"),
+    "completed": ("accepted",),
+}
+
+UPDATE_MENTORSHIP_STATUS = statement("mentorship.update_mentorship_status", """
+    UPDATE mentorship_requests SET status = :status
+    WHERE id = :request_id AND mentor_id = :mentor_id AND status IN :from_statuses
+""", bindparam("from_statuses", expanding=True))
+
+RELEASE_MENTOR_SLOT = statement("mentorship.release_mentor_slot", """
+    UPDATE users SET mentor_open_requests = mentor_open_requests - 1
+    WHERE id = :mentor_id AND mentor_open_requests > 0
+""")
+
+GET_MENTORSHIP_MENTOR = statement("mentorship.get_mentorship_mentor", """
+    SELECT mentor_id, status FROM mentorship_requests WHERE id = :request_id
+""")
+
+
 @bp.put("/<int:request_id>/status")
 @jwt_required()
 def update_mentorship_status(request_id):
-    current_user = get_jwt_identity()
+    mentor_id = int(get_jwt_identity())
     data = request.get_json()
     new_status = data.get("status")
-    
-    if new_status not in ["accepted", "rejected", "completed"]:
+
+    if new_status not in MENTORSHIP_TRANSITIONS:
         return jsonify({"error": "Invalid status"}), 400
-    
+
     engine = get_engine()
     try:
-        with engine.connect() as conn:
-            # Check if user is the mentor for this request
-            result = conn.execute(text("""
-                SELECT mentor_id FROM mentorship_requests WHERE id = :request_id
-            """), {"request_id": request_id})
-            
-            request_data = result.fetchone()
-            if not request_data:
-                return jsonify({"error": "Mentorship request not found"}), 404
-            
-            if request_data.mentor_id != current_user["id"]:
-                return jsonify({"error": "Unauthorized"}), 403
-            
-            # Update status
-            conn.execute(text("""
-                UPDATE mentorship_requests SET status = :status WHERE id = :request_id
-            """), {"status": new_status, "request_id": request_id})
-            conn.commit()
-            
-            return jsonify({"message": f"Mentorship request {new_status} successfully"}), 200
+        with engine.begin() as conn:
+            updated = conn.execute(UPDATE_MENTORSHIP_STATUS, {
+                "status": new_status,
+                "request_id": request_id,
+                "mentor_id": mentor_id,
+                "from_statuses": list(MENTORSHIP_TRANSITIONS[new_status])
+            }).rowcount
+            if updated == 0:
+                request_data = conn.execute(GET_MENTORSHIP_MENTOR, {"request_id": request_id}).fetchone()
+                if not request_data:
+                    return jsonify({"error": "Mentorship request not found"}), 404
+                if request_data.mentor_id != mentor_id:
+                    return jsonify({"error": "Unauthorized"}), 403
+                return jsonify({"error": f"Cannot move a {request_data.status} request to {new_status}"}), 409
+
+            # Every allowed transition starts open; leaving OPEN_STATUSES frees the slot
+            if new_status not in OPEN_STATUSES:
+                conn.execute(RELEASE_MENTOR_SLOT, {"mentor_id": mentor_id})
+        response_cache.invalidate("/api/mentorship")
+        response_cache.invalidate("/api/users/alumni")
+        note_write("mentorship", "users")
+
+        return jsonify({"message": f"Mentorship request {new_status} successfully"}), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+UPDATE_MENTOR_CAPACITY = statement("mentorship.update_mentor_capacity", """
+    UPDATE users SET mentor_capacity = :capacity WHERE id = :user_id AND role = 'alumni'
+""")
+
+
+@bp.put("/capacity")
+@jwt_required()
+def update_mentor_capacity():
+    """Set how many open mentees (pending + accepted) the calling alumnus takes"""
+    max_capacity = get_config()["MENTOR_MAX_CAPACITY"]
+    capacity = (request.get_json() or {}).get("capacity")
+    if not isinstance(capacity, int) or not 0 <= capacity <= max_capacity:
+        return jsonify({"error": f"capacity must be an integer from 0 to {max_capacity}"}), 400
+
+    engine = get_engine()
+    try:
+        with engine.begin() as conn:
+            updated = conn.execute(UPDATE_MENTOR_CAPACITY, {
+                "capacity": capacity,
+                "user_id": int(get_jwt_identity())
+            }).rowcount
+        # rowcount is the rows matched (client_flag FOUND_ROWS), so 0 means not an alumnus
+        if updated == 0:
+            return jsonify({"error": "Only alumni can mentor"}), 403
+        response_cache.invalidate("/api/users/alumni")
+        note_write("users")
+
+        return jsonify({"message": "Mentor capacity updated", "capacity": capacity}), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+# Safety net for the maintained counters: recomputes every mentor's open
+# requests from mentorship_requests (idx_mentorship_mentor_id_status)
+RECOUNT_MENTOR_LOAD = statement("mentorship.recount_mentor_load", """
+    UPDATE users u
+    LEFT JOIN (
+        SELECT mentor_id, COUNT(*) AS open_requests FROM mentorship_requests
+        WHERE status IN ('pending', 'accepted')
+        GROUP BY mentor_id
+    ) mr ON mr.mentor_id = u.id
+    SET u.mentor_open_requests = COALESCE(mr.open_requests, 0)
+    WHERE u.role = 'alumni'
+      AND u.mentor_open_requests <> COALESCE(mr.open_requests, 0)
+""")
+
+
+@job("recount_mentor_load", every=86400)
+def recount_mentor_load_job(payload):
+    with get_engine().begin() as conn:
+        fixed = conn.execute(RECOUNT_MENTOR_LOAD).rowcount
+    if fixed:
+        response_cache.invalidate("/api/users/alumni")
+        note_write("users")
+    return {"fixed": fixed}
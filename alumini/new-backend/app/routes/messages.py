@@ -1,51 +1,69 @@
 from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from ..models import get_engine
-from sqlalchemy import text
+from ..models import get_engine, note_write, read_connection
+from ..statements import statement
+from .. import sketches
 
 bp = Blueprint("messages", __name__)
 
 
+LIST_MESSAGES = statement("messages.list_messages", """
+    SELECT m.id, m.subject, m.content, m.is_read, m.created_at, m.sender_id,
+           s.name as sender_name, r.name as receiver_name
+    FROM messages m
+    LEFT JOIN users s ON m.sender_id = s.id
+    LEFT JOIN users r ON m.receiver_id = r.id
+    WHERE m.receiver_id = :user_id OR m.sender_id = :user_id
+    ORDER BY m.created_at DESC
+""")
+
+
+def serialize_message(row, user_id):
+    return {
+        "id": row.id,
+        "subject": row.subject,
+        "content": row.content,
+        "is_read": row.is_read,
+        "sender_name": row.sender_name,
+        "receiver_name": row.receiver_name,
+        "is_from_me": row.sender_id == user_id,
+        "created_at": row.created_at.isoformat() if row.created_at else None
+    }
+
+
 @bp.get("/")
 @jwt_required()
 def list_messages():
-    current_user = get_jwt_identity()
-    engine = get_engine()
+    # The JWT identity is the user id as a string (see auth.login)
+    user_id = int(get_jwt_identity())
     
     try:
-        with engine.connect() as conn:
-            result = conn.execute(text("""
-                SELECT m.id, m.subject, m.content, m.is_read, m.created_at,
-                       s.name as sender_name, r.name as receiver_name
-                FROM messages m
-                LEFT JOIN users s ON m.sender_id = s.id
-                LEFT JOIN users r ON m.receiver_id = r.id
-                WHERE m.receiver_id = :user_id OR m.sender_id = :user_id
-                ORDER BY m.created_at DESC
-            """), {"user_id": current_user["id"]})
+        with read_connection(f"user:{user_id}") as conn:
+            result = conn.execute(LIST_MESSAGES, {"user_id": user_id})
             
             messages = []
             for row in result:
-                messages.append({
-                    "id": row.id,
-                    "subject": row.subject,
-                    "content": row.content,
-                    "is_read": row.is_read,
-                    "sender_name": row.sender_name,
-                    "receiver_name": row.receiver_name,
-                    "is_from_me": row.sender_name == current_user["name"],
-                    "created_at": row.created_at.isoformat() if row.created_at else None
-                })
+                messages.append(serialize_message(row, user_id))
             
             return jsonify(messages), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+GET_RECEIVER = statement("messages.get_receiver", """
+    SELECT id, name FROM users WHERE id = :receiver_id
+""")
+
+INSERT_MESSAGE = statement("messages.insert_message", """
+    INSERT INTO messages (sender_id, receiver_id, subject, content)
+    VALUES (:sender_id, :receiver_id, :subject, :content)
+""")
+
+
 @bp.post("/")
 @jwt_required()
 def send_message():
-    current_user = get_jwt_identity()
+    sender_id = int(get_jwt_identity())
     data = request.get_json()
     
     receiver_id = data.get("receiver_id")
@@ -59,25 +77,22 @@ def send_message():
     try:
         with engine.connect() as conn:
             # Check if receiver exists
-            receiver_result = conn.execute(text("""
-                SELECT id, name FROM users WHERE id = :receiver_id
-            """), {"receiver_id": receiver_id})
+            receiver_result = conn.execute(GET_RECEIVER, {"receiver_id": receiver_id})
             
             receiver = receiver_result.fetchone()
             if not receiver:
                 return jsonify({"error": "Receiver not found"}), 404
             
             # Send message
-            result = conn.execute(text("""
-                INSERT INTO messages (sender_id, receiver_id, subject, content)
-                VALUES (:sender_id, :receiver_id, :subject, :content)
-            """), {
-                "sender_id": current_user["id"],
+            result = conn.execute(INSERT_MESSAGE, {
+                "sender_id": sender_id,
                 "receiver_id": receiver_id,
                 "subject": subject,
                 "content": content
             })
             conn.commit()
+            note_write(f"user:{sender_id}", f"user:{receiver_id}")
+            sketches.record("active_messagers", sender_id)
             
             return jsonify({
                 "message": "Message sent successfully",
@@ -88,6 +103,15 @@ def send_message():
         return jsonify({"error": str(e)}), 500
 
 
+GET_MESSAGE_RECEIVER = statement("messages.get_message_receiver", """
+    SELECT receiver_id FROM messages WHERE id = :message_id
+""")
+
+MARK_MESSAGE_READ = statement("messages.mark_message_read", """
+    UPDATE messages SET is_read = TRUE WHERE id = :message_id
+""")
+
+
 @bp.put("/<int:message_id>/read")
 @jwt_required()
 def mark_as_read(message_id):
@@ -97,9 +121,7 @@ def mark_as_read(message_id):
     try:
         with engine.connect() as conn:
             # Check if user is the receiver
-            result = conn.execute(text("""
-                SELECT receiver_id FROM messages WHERE id = :message_id
-            """), {"message_id": message_id})
+            result = conn.execute(GET_MESSAGE_RECEIVER, {"message_id": message_id})
             
             message = result.fetchone()
             if not message:
@@ -109,9 +131,7 @@ def mark_as_read(message_id):
                 return jsonify({"error": "Unauthorized"}), 403
             
             # Mark as read
-            conn.execute(text("""
-                UPDATE messages SET is_read = TRUE WHERE id = :message_id
-            """), {"message_id": message_id})
+            conn.execute(MARK_MESSAGE_READ, {"message_id": message_id})
             conn.commit()
             
             return jsonify({"message": "Message marked as read"}), 200
@@ -1,47 +1,86 @@
 from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required
-from ..models import get_engine
+from ..models import get_engine, note_write, read_connection
 from ..auth_helpers import get_current_user
-from sqlalchemy import text
+from ..cache import response_cache
+from ..changes import changes_response
+from .. import feed, sketches, skills
+from ..statements import statement
 
 bp = Blueprint("opportunities", __name__)
 
 
+LIST_OPPORTUNITIES = statement("opportunities.list_opportunities", """
+    SELECT o.id, o.title, o.company, o.description, o.requirements, 
+           o.location, o.salary_range, o.type, o.created_at,
+           u.name as posted_by_name
+    FROM opportunities o
+    LEFT JOIN users u ON o.posted_by = u.id
+    WHERE o.is_active = TRUE
+    ORDER BY o.created_at DESC
+""")
+
+
+def serialize_opportunity(row):
+    return {
+        "id": row.id,
+        "title": row.title,
+        "company": row.company,
+        "description": row.description,
+        "requirements": row.requirements,
+        "location": row.location,
+        "salary_range": row.salary_range,
+        "type": row.type,
+        "posted_by_name": row.posted_by_name,
+        "created_at": row.created_at.isoformat() if row.created_at else None
+    }
+
+
 @bp.get("/")
 def list_opportunities():
-    engine = get_engine()
     try:
-        with engine.connect() as conn:
-            result = conn.execute(text("""
-                SELECT o.id, o.title, o.company, o.description, o.requirements, 
-                       o.location, o.salary_range, o.type, o.created_at,
-                       u.name as posted_by_name
-                FROM opportunities o
-                LEFT JOIN users u ON o.posted_by = u.id
-                WHERE o.is_active = TRUE
-                ORDER BY o.created_at DESC
-            """))
+        with read_connection("opportunities") as conn:
+            result = conn.execute(LIST_OPPORTUNITIES)
             
             opportunities = []
             for row in result:
-                opportunities.append({
-                    "id": row.id,
-                    "title": row.title,
-                    "company": row.company,
-                    "description": row.description,
-                    "requirements": row.requirements,
-                    "location": row.location,
-                    "salary_range": row.salary_range,
-                    "type": row.type,
-                    "posted_by_name": row.posted_by_name,
-                    "created_at": row.created_at.isoformat() if row.created_at else None
-                })
+                opportunities.append(serialize_opportunity(row))
             
             return jsonify(opportunities), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+LIST_CHANGED_OPPORTUNITIES = statement("opportunities.list_changed_opportunities", """
+    SELECT o.id, o.title, o.company, o.description, o.requirements,
+           o.location, o.salary_range, o.type, o.created_at,
+           o.updated_at, o.is_active as is_listed,
+           u.name as posted_by_name
+    FROM opportunities o
+    LEFT JOIN users u ON o.posted_by = u.id
+    WHERE o.updated_at >= :since
+""")
+
+
+@bp.get("/changes")
+def list_changed_opportunities():
+    try:
+        return changes_response("opportunities", LIST_CHANGED_OPPORTUNITIES, serialize_opportunity,
+                                "opportunities")
+    except ValueError:
+        return jsonify({"error": "Invalid since"}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+INSERT_OPPORTUNITY = statement("opportunities.insert_opportunity", """
+    INSERT INTO opportunities (title, company, description, requirements, 
+                            location, salary_range, type, posted_by)
+    VALUES (:title, :company, :description, :requirements, 
+           :location, :salary_range, :type, :posted_by)
+""")
+
+
 @bp.post("/")
 @jwt_required()
 def create_opportunity():
@@ -57,12 +96,7 @@ def create_opportunity():
     engine = get_engine()
     try:
         with engine.connect() as conn:
-            result = conn.execute(text("""
-                INSERT INTO opportunities (title, company, description, requirements, 
-                                        location, salary_range, type, posted_by)
-                VALUES (:title, :company, :description, :requirements, 
-                       :location, :salary_range, :type, :posted_by)
-            """), {
+            result = conn.execute(INSERT_OPPORTUNITY, {
                 "title": data["title"],
                 "company": data["company"],
                 "description": data.get("description"),
@@ -72,26 +106,35 @@ def create_opportunity():
                 "type": data["type"],
                 "posted_by": current_user["id"]
             })
+            feed.add_item(conn, "opportunity", result.lastrowid, data["title"],
+                          current_user["id"], current_user["name"],
+                          subtitle=data["company"], tag=data["type"], summary=data.get("description"))
+            skills.set_skills(conn, "opportunity", result.lastrowid, data.get("requirements"))
             conn.commit()
+            response_cache.invalidate("/api/opportunities")
+            note_write("opportunities")
+            sketches.record("posting_companies", " ".join(data["company"].split()))
             
             return jsonify({"message": "Opportunity created successfully", "id": result.lastrowid}), 201
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+GET_OPPORTUNITY = statement("opportunities.get_opportunity", """
+    SELECT o.id, o.title, o.company, o.description, o.requirements, 
+           o.location, o.salary_range, o.type, o.created_at,
+           u.name as posted_by_name, u.email as posted_by_email
+    FROM opportunities o
+    LEFT JOIN users u ON o.posted_by = u.id
+    WHERE o.id = :opportunity_id AND o.is_active = TRUE
+""")
+
+
 @bp.get("/<int:opportunity_id>")
 def get_opportunity(opportunity_id):
-    engine = get_engine()
     try:
-        with engine.connect() as conn:
-            result = conn.execute(text("""
-                SELECT o.id, o.title, o.company, o.description, o.requirements, 
-                       o.location, o.salary_range, o.type, o.created_at,
-                       u.name as posted_by_name, u.email as posted_by_email
-                FROM opportunities o
-                LEFT JOIN users u ON o.posted_by = u.id
-                WHERE o.id = :opportunity_id AND o.is_active = TRUE
-            """), {"opportunity_id": opportunity_id})
+        with read_connection("opportunities") as conn:
+            result = conn.execute(GET_OPPORTUNITY, {"opportunity_id": opportunity_id})
             
             opportunity = result.fetchone()
             if not opportunity:
@@ -1,103 +1,107 @@
 from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from ..models import get_engine
+from ..models import get_engine, note_write, read_connection
 from ..auth_helpers import get_current_user
-from sqlalchemy import text
+from ..cache import response_cache
+from ..changes import changes_response
+from .. import feed
+from ..statements import statement
+from ..config import get_config
+from ..jobs import job
+from sqlalchemy import bindparam
 import json
 
 bp = Blueprint("scholarships", __name__)
 
 
+# Eligibility of user `u` for scholarship `s`, as one SQL predicate so it can
+# be folded into the apply INSERT. A criterion left empty on either side
+# does not exclude anyone; malformed JSON lists are ignored.
+ELIGIBLE = """
+    (s.min_cgpa IS NULL OR s.min_cgpa = 0 OR u.cgpa IS NULL OR u.cgpa >= s.min_cgpa)
+    AND (COALESCE(s.reservation_category, '') IN ('', 'All')
+         OR COALESCE(u.reservation_category, '') = ''
+         OR u.reservation_category = s.reservation_category)
+    AND (s.lateral_entry_allowed OR NOT COALESCE(u.is_lateral_entry, FALSE))
+    AND (CASE WHEN JSON_VALID(s.eligible_years) AND JSON_LENGTH(s.eligible_years) > 0
+                   AND u.graduation_year IS NOT NULL
+              THEN JSON_CONTAINS(s.eligible_years, JSON_QUOTE(CAST(u.graduation_year AS CHAR)))
+              ELSE TRUE END)
+    AND (CASE WHEN JSON_VALID(s.eligible_majors) AND JSON_LENGTH(s.eligible_majors) > 0
+                   AND COALESCE(u.major, '') <> ''
+              THEN JSON_CONTAINS(s.eligible_majors, JSON_QUOTE(u.major))
+              ELSE TRUE END)
+"""
+
+# Rank of applicant `u` in the scholarship's review queue (applications.match_score):
+# eligible students score 50-100 by CGPA, everyone else 0
+SCHOLARSHIP_SCORE = f"""
+    CASE WHEN {ELIGIBLE} THEN 50 + ROUND(5 * LEAST(COALESCE(u.cgpa, 0), 10)) ELSE 0 END
+"""
+
+CHECK_ELIGIBILITY = statement("scholarships.check_eligibility", f"""
+    SELECT {ELIGIBLE} AS eligible
+    FROM scholarships s JOIN users u ON u.id = :user_id
+    WHERE s.id = :scholarship_id
+""")
+
+
 def check_eligibility(conn, user_id, scholarship):
     """Check if a student is eligible for a scholarship"""
     try:
-        user_result = conn.execute(text("""
-            SELECT cgpa, reservation_category, is_lateral_entry, graduation_year, major
-            FROM users WHERE id = :user_id
-        """), {"user_id": user_id})
-        user = user_result.fetchone()
-        
-        if not user:
-            return False
-        
-        # Check CGPA
-        if scholarship.min_cgpa and user.cgpa and user.cgpa < scholarship.min_cgpa:
-            return False
-        
-        # Check reservation category
-        if scholarship.reservation_category and scholarship.reservation_category != "All":
-            if user.reservation_category and scholarship.reservation_category != user.reservation_category:
-                return False
-        
-        # Check lateral entry
-        if not scholarship.lateral_entry_allowed and user.is_lateral_entry:
-            return False
-        
-        # Check eligible years
-        if scholarship.eligible_years:
-            try:
-                eligible_years = json.loads(scholarship.eligible_years) if isinstance(scholarship.eligible_years, str) else scholarship.eligible_years
-                if eligible_years and user.graduation_year and str(user.graduation_year) not in eligible_years:
-                    return False
-            except:
-                pass
-        
-        # Check eligible majors
-        if scholarship.eligible_majors:
-            try:
-                eligible_majors = json.loads(scholarship.eligible_majors) if isinstance(scholarship.eligible_majors, str) else scholarship.eligible_majors
-                if eligible_majors and user.major and user.major not in eligible_majors:
-                    return False
-            except:
-                pass
-        
-        return True
+        row = conn.execute(CHECK_ELIGIBILITY, {"user_id": user_id, "scholarship_id": scholarship.id}).fetchone()
+        return bool(row and row.eligible)
     except Exception as e:
         print(f"Eligibility check error: {e}")
         return False
 
 
+LIST_SCHOLARSHIPS = statement("scholarships.list_scholarships", """
+    SELECT s.id, s.title, s.description, s.amount, s.deadline, 
+           s.requirements, s.min_cgpa, s.reservation_category,
+           s.lateral_entry_allowed, s.eligible_years, s.eligible_majors,
+           s.other_criteria, s.posted_by, s.created_at, s.updated_at,
+           u.name as posted_by_name
+    FROM scholarships s
+    LEFT JOIN users u ON s.posted_by = u.id
+    WHERE s.is_active = TRUE
+      AND (s.deadline >= CURDATE() OR s.deadline IS NULL)
+    ORDER BY s.deadline ASC
+""")
+
+
+def serialize_scholarship(row):
+    return {
+        "id": row.id,
+        "title": row.title,
+        "description": row.description,
+        "amount": float(row.amount) if row.amount else None,
+        "deadline": row.deadline.isoformat() if row.deadline else None,
+        "requirements": row.requirements,
+        "min_cgpa": float(row.min_cgpa) if row.min_cgpa else None,
+        "reservation_category": row.reservation_category,
+        "lateral_entry_allowed": row.lateral_entry_allowed,
+        "eligible_years": json.loads(row.eligible_years) if row.eligible_years else [],
+        "eligible_majors": json.loads(row.eligible_majors) if row.eligible_majors else [],
+        "other_criteria": row.other_criteria,
+        "posted_by": row.posted_by,
+        "posted_by_name": row.posted_by_name,
+        "created_at": row.created_at.isoformat() if row.created_at else None,
+        "updated_at": row.updated_at.isoformat() if row.updated_at else None,
+        "is_eligible": True  # Will be checked on apply
+    }
+
+
 @bp.route("/", methods=["GET"])
 def list_scholarships():
     try:
-        engine = get_engine()
         
-        with engine.connect() as conn:
-            result = conn.execute(text("""
-                SELECT s.id, s.title, s.description, s.amount, s.deadline, 
-                       s.requirements, s.min_cgpa, s.reservation_category,
-                       s.lateral_entry_allowed, s.eligible_years, s.eligible_majors,
-                       s.other_criteria, s.posted_by, s.created_at, s.updated_at,
-                       u.name as posted_by_name
-                FROM scholarships s
-                LEFT JOIN users u ON s.posted_by = u.id
-                WHERE s.is_active = TRUE
-                ORDER BY s.deadline ASC
-            """))
+        with read_connection("scholarships") as conn:
+            result = conn.execute(LIST_SCHOLARSHIPS)
             
             scholarships = []
             for row in result:
-                scholarship = {
-                    "id": row.id,
-                    "title": row.title,
-                    "description": row.description,
-                    "amount": float(row.amount) if row.amount else None,
-                    "deadline": row.deadline.isoformat() if row.deadline else None,
-                    "requirements": row.requirements,
-                    "min_cgpa": float(row.min_cgpa) if row.min_cgpa else None,
-                    "reservation_category": row.reservation_category,
-                    "lateral_entry_allowed": row.lateral_entry_allowed,
-                    "eligible_years": json.loads(row.eligible_years) if row.eligible_years else [],
-                    "eligible_majors": json.loads(row.eligible_majors) if row.eligible_majors else [],
-                    "other_criteria": row.other_criteria,
-                    "posted_by": row.posted_by,
-                    "posted_by_name": row.posted_by_name,
-                    "created_at": row.created_at.isoformat() if row.created_at else None,
-                    "updated_at": row.updated_at.isoformat() if row.updated_at else None,
-                    "is_eligible": True  # Will be checked on apply
-                }
-                
-                scholarships.append(scholarship)
+                scholarships.append(serialize_scholarship(row))
             
             return jsonify(scholarships), 200
     except Exception as e:
@@ -105,6 +109,46 @@ def list_scholarships():
         return jsonify({"error": str(e)}), 500
 
 
+# A deadline passing does not touch updated_at, so clients also drop rows
+# whose deadline is behind them
+LIST_CHANGED_SCHOLARSHIPS = statement("scholarships.list_changed_scholarships", """
+    SELECT s.id, s.title, s.description, s.amount, s.deadline,
+           s.requirements, s.min_cgpa, s.reservation_category,
+           s.lateral_entry_allowed, s.eligible_years, s.eligible_majors,
+           s.other_criteria, s.posted_by, s.created_at, s.updated_at,
+           (s.is_active AND (s.deadline >= CURDATE() OR s.deadline IS NULL)) as is_listed,
+           u.name as posted_by_name
+    FROM scholarships s
+    LEFT JOIN users u ON s.posted_by = u.id
+    WHERE s.updated_at >= :since
+""")
+
+
+@bp.get("/changes")
+def list_changed_scholarships():
+    try:
+        return changes_response("scholarships", LIST_CHANGED_SCHOLARSHIPS, serialize_scholarship,
+                                "scholarships")
+    except ValueError:
+        return jsonify({"error": "Invalid since"}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+INSERT_SCHOLARSHIP = statement("scholarships.insert_scholarship", """
+    INSERT INTO scholarships (
+        title, description, amount, deadline, requirements,
+        min_cgpa, reservation_category, lateral_entry_allowed,
+        eligible_years, eligible_majors, other_criteria, posted_by
+    )
+    VALUES (
+        :title, :description, :amount, :deadline, :requirements,
+        :min_cgpa, :reservation_category, :lateral_entry_allowed,
+        :eligible_years, :eligible_majors, :other_criteria, :posted_by
+    )
+""")
+
+
 @bp.route("/", methods=["POST"])
 @jwt_required()
 def create_scholarship():
@@ -127,18 +171,7 @@ def create_scholarship():
         
         engine = get_engine()
         with engine.connect() as conn:
-            result = conn.execute(text("""
-                INSERT INTO scholarships (
-                    title, description, amount, deadline, requirements,
-                    min_cgpa, reservation_category, lateral_entry_allowed,
-                    eligible_years, eligible_majors, other_criteria, posted_by
-                )
-                VALUES (
-                    :title, :description, :amount, :deadline, :requirements,
-                    :min_cgpa, :reservation_category, :lateral_entry_allowed,
-                    :eligible_years, :eligible_majors, :other_criteria, :posted_by
-                )
-            """), {
+            result = conn.execute(INSERT_SCHOLARSHIP, {
                 "title": data["title"],
                 "description": data.get("description"),
                 "amount": data.get("amount"),
@@ -152,7 +185,13 @@ def create_scholarship():
                 "other_criteria": data.get("other_criteria"),
                 "posted_by": current_user["id"]
             })
+            feed.add_item(conn, "scholarship", result.lastrowid, data["title"],
+                          current_user["id"], current_user["name"],
+                          subtitle=data.get("amount"), tag=data.get("deadline"),
+                          summary=data.get("description"))
             conn.commit()
+            response_cache.invalidate("/api/scholarships")
+            note_write("scholarships")
             
             return jsonify({"message": "Scholarship created successfully", "id": result.lastrowid}), 201
     except Exception as e:
@@ -160,20 +199,25 @@ def create_scholarship():
         return jsonify({"error": str(e)}), 500
 
 
+GET_SCHOLARSHIP = statement("scholarships.get_scholarship", """
+    SELECT s.*, u.name as posted_by_name, u.email as posted_by_email
+    FROM scholarships s
+    LEFT JOIN users u ON s.posted_by = u.id
+    WHERE s.id = :scholarship_id AND s.is_active = TRUE
+""")
+
+
 @bp.route("/<int:scholarship_id>", methods=["GET"])
 @jwt_required()
 def get_scholarship(scholarship_id):
     try:
-        current_user = get_jwt_identity()
+        current_user = get_current_user()
+        if not current_user:
+            return jsonify({"error": "User not found"}), 404
         engine = get_engine()
         
         with engine.connect() as conn:
-            result = conn.execute(text("""
-                SELECT s.*, u.name as posted_by_name, u.email as posted_by_email
-                FROM scholarships s
-                LEFT JOIN users u ON s.posted_by = u.id
-                WHERE s.id = :scholarship_id AND s.is_active = TRUE
-            """), {"scholarship_id": scholarship_id})
+            result = conn.execute(GET_SCHOLARSHIP, {"scholarship_id": scholarship_id})
             
             row = result.fetchone()
             if not row:
@@ -199,8 +243,8 @@ def get_scholarship(scholarship_id):
                 "updated_at": row.updated_at.isoformat() if row.updated_at else None
             }
             
-            if current_user.get("role") == "student":
-                scholarship["is_eligible"] = check_eligibility(conn, current_user.get("id"), row)
+            if current_user["role"] == "student":
+                scholarship["is_eligible"] = check_eligibility(conn, current_user["id"], row)
             
             return jsonify(scholarship), 200
     except Exception as e:
@@ -208,11 +252,34 @@ def get_scholarship(scholarship_id):
         return jsonify({"error": str(e)}), 500
 
 
+GET_SCHOLARSHIP_OWNER = statement("scholarships.get_scholarship_owner", """
+    SELECT posted_by FROM scholarships WHERE id = :id
+""")
+
+UPDATE_SCHOLARSHIP = statement("scholarships.update_scholarship", """
+    UPDATE scholarships SET
+        title = :title,
+        description = :description,
+        amount = :amount,
+        deadline = :deadline,
+        requirements = :requirements,
+        min_cgpa = :min_cgpa,
+        reservation_category = :reservation_category,
+        lateral_entry_allowed = :lateral_entry_allowed,
+        eligible_years = :eligible_years,
+        eligible_majors = :eligible_majors,
+        other_criteria = :other_criteria
+    WHERE id = :id
+""")
+
+
 @bp.route("/<int:scholarship_id>", methods=["PUT"])
 @jwt_required()
 def update_scholarship(scholarship_id):
     try:
-        current_user = get_jwt_identity()
+        current_user = get_current_user()
+        if not current_user:
+            return jsonify({"error": "User not found"}), 404
         data = request.get_json()
         
         if current_user.get("role") != "alumni":
@@ -221,9 +288,7 @@ def update_scholarship(scholarship_id):
         engine = get_engine()
         with engine.connect() as conn:
             # Check if user owns this scholarship
-            check = conn.execute(text("""
-                SELECT posted_by FROM scholarships WHERE id = :id
-            """), {"id": scholarship_id})
+            check = conn.execute(GET_SCHOLARSHIP_OWNER, {"id": scholarship_id})
             scholarship = check.fetchone()
             
             if not scholarship:
@@ -232,21 +297,7 @@ def update_scholarship(scholarship_id):
             if scholarship.posted_by != current_user.get("id"):
                 return jsonify({"error": "You can only update your own scholarships"}), 403
             
-            conn.execute(text("""
-                UPDATE scholarships SET
-                    title = :title,
-                    description = :description,
-                    amount = :amount,
-                    deadline = :deadline,
-                    requirements = :requirements,
-                    min_cgpa = :min_cgpa,
-                    reservation_category = :reservation_category,
-                    lateral_entry_allowed = :lateral_entry_allowed,
-                    eligible_years = :eligible_years,
-                    eligible_majors = :eligible_majors,
-                    other_criteria = :other_criteria
-                WHERE id = :id
-            """), {
+            conn.execute(UPDATE_SCHOLARSHIP, {
                 "id": scholarship_id,
                 "title": data["title"],
                 "description": data.get("description"),
@@ -260,7 +311,13 @@ def update_scholarship(scholarship_id):
                 "eligible_majors": json.dumps(data.get("eligible_majors", [])),
                 "other_criteria": data.get("other_criteria")
             })
+            feed.add_item(conn, "scholarship", scholarship_id, data["title"],
+                          current_user.get("id"), current_user.get("name"),
+                          subtitle=data.get("amount"), tag=data.get("deadline"),
+                          summary=data.get("description"))
             conn.commit()
+            response_cache.invalidate("/api/scholarships")
+            note_write("scholarships")
             
             return jsonify({"message": "Scholarship updated successfully"}), 200
     except Exception as e:
@@ -268,18 +325,23 @@ def update_scholarship(scholarship_id):
         return jsonify({"error": str(e)}), 500
 
 
+DEACTIVATE_SCHOLARSHIP = statement("scholarships.deactivate_scholarship", """
+    UPDATE scholarships SET is_active = FALSE WHERE id = :id
+""")
+
+
 @bp.route("/<int:scholarship_id>", methods=["DELETE"])
 @jwt_required()
 def delete_scholarship(scholarship_id):
     try:
-        current_user = get_jwt_identity()
+        current_user = get_current_user()
+        if not current_user:
+            return jsonify({"error": "User not found"}), 404
         engine = get_engine()
         
         with engine.connect() as conn:
             # Check if user owns this scholarship or is admin
-            check = conn.execute(text("""
-                SELECT posted_by FROM scholarships WHERE id = :id
-            """), {"id": scholarship_id})
+            check = conn.execute(GET_SCHOLARSHIP_OWNER, {"id": scholarship_id})
             scholarship = check.fetchone()
             
             if not scholarship:
@@ -292,10 +354,11 @@ def delete_scholarship(scholarship_id):
             if current_user.get("role") not in ["alumni", "admin"]:
                 return jsonify({"error": "Unauthorized"}), 403
             
-            conn.execute(text("""
-                UPDATE scholarships SET is_active = FALSE WHERE id = :id
-            """), {"id": scholarship_id})
+            conn.execute(DEACTIVATE_SCHOLARSHIP, {"id": scholarship_id})
+            feed.remove_item(conn, "scholarship", scholarship_id)
             conn.commit()
+            response_cache.invalidate("/api/scholarships")
+            note_write("scholarships")
             
             return jsonify({"message": "Scholarship deleted successfully"}), 200
     except Exception as e:
@@ -303,55 +366,112 @@ def delete_scholarship(scholarship_id):
         return jsonify({"error": str(e)}), 500
 
 
+APPLY_SCHOLARSHIP = statement("scholarships.apply_scholarship", f"""
+    INSERT IGNORE INTO applications (
+        applicant_id, scholarship_id, type, cover_letter, document_urls, idempotency_key, match_score
+    )
+    SELECT u.id, s.id, 'scholarship', :cover_letter, :document_urls, :idempotency_key,
+           {SCHOLARSHIP_SCORE}
+    FROM scholarships s JOIN users u ON u.id = :applicant_id
+    WHERE s.id = :scholarship_id
+      AND s.is_active = TRUE
+      AND (s.deadline >= CURDATE() OR s.deadline IS NULL)
+      AND u.role = 'student'
+      AND {ELIGIBLE}
+""")
+
+# Only run when APPLY_SCHOLARSHIP inserted nothing, to say why
+EXPLAIN_REJECTED_APPLICATION = statement("scholarships.explain_rejected_application", f"""
+    SELECT s.is_active, s.deadline < CURDATE() AS is_closed, u.role,
+           {ELIGIBLE} AS eligible,
+           a.id AS application_id, a.idempotency_key
+    FROM scholarships s
+    LEFT JOIN users u ON u.id = :applicant_id
+    LEFT JOIN applications a ON a.applicant_id = u.id AND a.scholarship_id = s.id
+    WHERE s.id = :scholarship_id
+""")
+
+
+def submit_application(applicant_id, scholarship_id, cover_letter, document_urls, idempotency_key):
+    """
+    Apply for a scholarship in a single INSERT ... SELECT that also checks the
+    scholarship is open and the student eligible. A unique key on
+    (applicant_id, scholarship_id) rules out duplicates; a retry carrying the
+    same Idempotency-Key as the stored application gets the original 201.
+    Returns a (response, status) pair.
+    """
+    params = {"applicant_id": applicant_id, "scholarship_id": scholarship_id}
+    with get_engine().connect() as conn:
+        result = conn.execute(APPLY_SCHOLARSHIP, dict(
+            params,
+            cover_letter=cover_letter,
+            document_urls=json.dumps(document_urls),
+            idempotency_key=idempotency_key
+        ))
+        conn.commit()
+        
+        if result.rowcount:
+            note_write("applications")
+            return jsonify({"message": "Application submitted successfully", "id": result.lastrowid}), 201
+        
+        row = conn.execute(EXPLAIN_REJECTED_APPLICATION, params).fetchone()
+        if not row or not row.is_active:
+            return jsonify({"error": "Scholarship not found or inactive"}), 404
+        if row.role != "student":
+            return jsonify({"error": "Only students can apply for scholarships"}), 403
+        if row.application_id:
+            if idempotency_key and row.idempotency_key == idempotency_key:
+                return jsonify({"message": "Application submitted successfully", "id": row.application_id}), 201
+            return jsonify({"error": "You have already applied for this scholarship"}), 400
+        if row.is_closed:
+            return jsonify({"error": "The deadline for this scholarship has passed"}), 400
+        return jsonify({"error": "You are not eligible for this scholarship"}), 403
+
+
 @bp.route("/<int:scholarship_id>/apply", methods=["POST"])
 @jwt_required()
 def apply_scholarship(scholarship_id):
+    """Apply for a scholarship (see submit_application)"""
     try:
-        current_user = get_jwt_identity()
-        data = request.get_json()
-        
-        if current_user.get("role") != "student":
-            return jsonify({"error": "Only students can apply for scholarships"}), 403
-        
-        engine = get_engine()
-        with engine.connect() as conn:
-            # Check if scholarship exists and is active
-            scholarship_check = conn.execute(text("""
-                SELECT * FROM scholarships WHERE id = :id AND is_active = TRUE
-            """), {"id": scholarship_id})
-            scholarship = scholarship_check.fetchone()
-            
-            if not scholarship:
-                return jsonify({"error": "Scholarship not found or inactive"}), 404
-            
-            # Check eligibility
-            if not check_eligibility(conn, current_user.get("id"), scholarship):
-                return jsonify({"error": "You are not eligible for this scholarship"}), 403
-            
-            # Check if already applied
-            existing = conn.execute(text("""
-                SELECT id FROM applications 
-                WHERE applicant_id = :user_id AND scholarship_id = :scholarship_id
-            """), {"user_id": current_user.get("id"), "scholarship_id": scholarship_id})
-            
-            if existing.fetchone():
-                return jsonify({"error": "You have already applied for this scholarship"}), 400
-            
-            # Create application
-            conn.execute(text("""
-                INSERT INTO applications (
-                    applicant_id, scholarship_id, type, cover_letter, document_urls
-                )
-                VALUES (:applicant_id, :scholarship_id, 'scholarship', :cover_letter, :document_urls)
-            """), {
-                "applicant_id": current_user.get("id"),
-                "scholarship_id": scholarship_id,
-                "cover_letter": data.get("cover_letter"),
-                "document_urls": json.dumps(data.get("document_urls", []))
-            })
-            conn.commit()
-            
-            return jsonify({"message": "Application submitted successfully"}), 201
+        data = request.get_json() or {}
+        return submit_application(int(get_jwt_identity()), scholarship_id, data.get("cover_letter"),
+                                  data.get("document_urls", []), request.headers.get("Idempotency-Key"))
     except Exception as e:
         print(f"Error applying for scholarship: {e}")
         return jsonify({"error": str(e)}), 500
+
+
+FIND_EXPIRED_SCHOLARSHIPS = statement("scholarships.find_expired_scholarships", """
+    SELECT id FROM scholarships
+    WHERE is_active = TRUE AND deadline < CURDATE()
+    LIMIT :batch_size
+    FOR UPDATE SKIP LOCKED
+""")
+
+DEACTIVATE_SCHOLARSHIPS = statement("scholarships.deactivate_scholarships", """
+    UPDATE scholarships SET is_active = FALSE WHERE id IN :ids
+""", bindparam("ids", expanding=True))
+
+
+@job("expire_scholarships", every=get_config()["SCHOLARSHIP_SWEEP_INTERVAL"])
+def expire_scholarships_job(payload):
+    """
+    Deactivate scholarships whose deadline has passed, in batches, and drop
+    them from the home feed, so the open list only ever holds live rows.
+    """
+    batch_size = get_config()["SCHOLARSHIP_SWEEP_BATCH_SIZE"]
+    expired = 0
+    while True:
+        with get_engine().begin() as conn:
+            ids = [row.id for row in conn.execute(FIND_EXPIRED_SCHOLARSHIPS, {"batch_size": batch_size})]
+            if ids:
+                conn.execute(DEACTIVATE_SCHOLARSHIPS, {"ids": ids})
+                feed.remove_items(conn, "scholarship", ids)
+        expired += len(ids)
+        if len(ids) < batch_size:
+            break
+
+    if expired:
+        response_cache.invalidate("/api/scholarships")
+        note_write("scholarships")
+    return {"expired": expired}
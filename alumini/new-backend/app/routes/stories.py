@@ -1,43 +1,78 @@
 from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required
-from ..models import get_engine
+from ..models import get_engine, note_write, read_connection
 from ..auth_helpers import get_current_user
-from sqlalchemy import text
+from ..cache import response_cache
+from ..changes import changes_response
+from .. import feed
+from ..statements import statement
 
 bp = Blueprint("stories", __name__)
 
 
+LIST_STORIES = statement("stories.list_stories", """
+    SELECT s.id, s.title, s.content, s.category, s.is_featured, s.created_at,
+           u.name as author_name, u.role as author_role
+    FROM stories s
+    LEFT JOIN users u ON s.author_id = u.id
+    ORDER BY s.is_featured DESC, s.created_at DESC
+""")
+
+
+def serialize_story(row):
+    return {
+        "id": row.id,
+        "title": row.title,
+        "content": row.content,
+        "category": row.category,
+        "is_featured": row.is_featured,
+        "author_name": row.author_name,
+        "author_role": row.author_role,
+        "created_at": row.created_at.isoformat() if row.created_at else None
+    }
+
+
 @bp.get("/")
 def list_stories():
-    engine = get_engine()
     try:
-        with engine.connect() as conn:
-            result = conn.execute(text("""
-                SELECT s.id, s.title, s.content, s.category, s.is_featured, s.created_at,
-                       u.name as author_name, u.role as author_role
-                FROM stories s
-                LEFT JOIN users u ON s.author_id = u.id
-                ORDER BY s.is_featured DESC, s.created_at DESC
-            """))
+        with read_connection("stories") as conn:
+            result = conn.execute(LIST_STORIES)
             
             stories = []
             for row in result:
-                stories.append({
-                    "id": row.id,
-                    "title": row.title,
-                    "content": row.content,
-                    "category": row.category,
-                    "is_featured": row.is_featured,
-                    "author_name": row.author_name,
-                    "author_role": row.author_role,
-                    "created_at": row.created_at.isoformat() if row.created_at else None
-                })
+                stories.append(serialize_story(row))
             
             return jsonify(stories), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+LIST_CHANGED_STORIES = statement("stories.list_changed_stories", """
+    SELECT s.id, s.title, s.content, s.category, s.is_featured, s.created_at,
+           s.updated_at, TRUE as is_listed,
+           u.name as author_name, u.role as author_role
+    FROM stories s
+    LEFT JOIN users u ON s.author_id = u.id
+    WHERE s.updated_at >= :since
+""")
+
+
+@bp.get("/changes")
+def list_changed_stories():
+    try:
+        return changes_response("stories", LIST_CHANGED_STORIES, serialize_story, "stories")
+    except ValueError:
+        return jsonify({"error": "Invalid since"}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+INSERT_STORY = statement("stories.insert_story", """
+    INSERT INTO stories (author_id, title, content, category)
+    VALUES (:author_id, :title, :content, :category)
+""")
+
+
 @bp.post("/")
 @jwt_required()
 def create_story():
@@ -57,16 +92,18 @@ def create_story():
     engine = get_engine()
     try:
         with engine.connect() as conn:
-            result = conn.execute(text("""
-                INSERT INTO stories (author_id, title, content, category)
-                VALUES (:author_id, :title, :content, :category)
-            """), {
+            result = conn.execute(INSERT_STORY, {
                 "author_id": current_user["id"],
                 "title": title,
                 "content": content,
                 "category": category
             })
+            feed.add_item(conn, "story", result.lastrowid, title,
+                          current_user["id"], current_user["name"],
+                          subtitle=category, summary=content)
             conn.commit()
+            response_cache.invalidate("/api/stories")
+            note_write("stories")
             
             return jsonify({
                 "message": "Story created successfully",
@@ -76,18 +113,20 @@ def create_story():
         return jsonify({"error": str(e)}), 500
 
 
+GET_STORY = statement("stories.get_story", """
+    SELECT s.id, s.title, s.content, s.category, s.is_featured, s.created_at,
+           u.name as author_name, u.role as author_role, u.bio as author_bio
+    FROM stories s
+    LEFT JOIN users u ON s.author_id = u.id
+    WHERE s.id = :story_id
+""")
+
+
 @bp.get("/<int:story_id>")
 def get_story(story_id):
-    engine = get_engine()
     try:
-        with engine.connect() as conn:
-            result = conn.execute(text("""
-                SELECT s.id, s.title, s.content, s.category, s.is_featured, s.created_at,
-                       u.name as author_name, u.role as author_role, u.bio as author_bio
-                FROM stories s
-                LEFT JOIN users u ON s.author_id = u.id
-                WHERE s.id = :story_id
-            """), {"story_id": story_id})
+        with read_connection("stories") as conn:
+            result = conn.execute(GET_STORY, {"story_id": story_id})
             
             story = result.fetchone()
             if not story:
@@ -1,138 +1,260 @@
 from flask import Blueprint, jsonify, request
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from ..models import get_engine
-from sqlalchemy import text
+from flask_jwt_extended import jwt_required
+from ..models import get_engine, note_write, read_connection
+from ..auth_helpers import get_current_user
+from ..cache import response_cache
+from ..config import get_config
+from .. import directory, feed, skills
+from ..statements import statement
+from ..rows import RowEncoder, json_rows
 
 bp = Blueprint("users", __name__)
 
 
+LIST_USERS = statement("users.list_users", """
+    SELECT id, name, role, graduation_year, major, company, position, bio, skills
+    FROM users ORDER BY name
+""")
+
+USER_ROW = RowEncoder([
+    "id", "name", "role", "graduation_year", "major",
+    "company", "position", "bio", "skills"
+])
+
+
 @bp.get("/")
 def list_users():
-    engine = get_engine()
     try:
-        with engine.connect() as conn:
-            result = conn.execute(text("""
-                SELECT id, name, role, graduation_year, major, company, position, bio, skills
-                FROM users ORDER BY name
-            """))
-            
-            users = []
-            for row in result:
-                users.append({
-                    "id": row.id,
-                    "name": row.name,
-                    "role": row.role,
-                    "graduation_year": row.graduation_year,
-                    "major": row.major,
-                    "company": row.company,
-                    "position": row.position,
-                    "bio": row.bio,
-                    "skills": row.skills
-                })
-            
-            return jsonify(users), 200
+        return json_rows(LIST_USERS, USER_ROW, "users")
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+LIST_ALUMNI = statement("users.list_alumni", """
+    SELECT id, name, graduation_year, major, company, position, bio, skills,
+           mentor_capacity, mentor_open_requests
+    FROM users WHERE role = 'alumni' ORDER BY name
+""")
+
+ALUMNI_ROW = RowEncoder([
+    "id", "name", "graduation_year", "major",
+    "company", "position", "bio", "skills",
+    "mentor_capacity", "mentor_open_requests"
+])
+
+
 @bp.get("/alumni")
 def list_alumni():
-    engine = get_engine()
     try:
-        with engine.connect() as conn:
-            result = conn.execute(text("""
-                SELECT id, name, graduation_year, major, company, position, bio, skills
-                FROM users WHERE role = 'alumni' ORDER BY name
-            """))
-            
-            alumni = []
-            for row in result:
-                alumni.append({
-                    "id": row.id,
-                    "name": row.name,
-                    "graduation_year": row.graduation_year,
-                    "major": row.major,
-                    "company": row.company,
-                    "position": row.position,
-                    "bio": row.bio,
-                    "skills": row.skills
-                })
-            
-            return jsonify(alumni), 200
+        return json_rows(LIST_ALUMNI, ALUMNI_ROW, "users")
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@bp.get("/directory")
+def alumni_directory():
+    """
+    Faceted alumni directory, served from the in-memory index in
+    app/directory.py.
+
+    Filters: graduation_year, major, company, position and skills, each
+    repeatable (?major=CS&major=EE matches either); different filters must
+    all match. Paged with limit and offset. Returns {"total", "alumni",
+    "facets"} with the live count of every shown facet value.
+    """
+    cfg = get_config()
+    try:
+        limit = min(max(int(request.args.get("limit", cfg["DIRECTORY_PAGE_SIZE"])), 1),
+                    cfg["DIRECTORY_MAX_PAGE_SIZE"])
+        offset = max(int(request.args.get("offset", 0)), 0)
+        filters = {facet: request.args.getlist(facet) for facet in directory.FACETS}
+        for year in filters["graduation_year"]:
+            int(year)
+    except ValueError:
+        return jsonify({"error": "Invalid graduation_year, limit or offset"}), 400
+
+    try:
+        index = directory.get_index()
+        return jsonify(index.search(filters, offset, limit, cfg["DIRECTORY_FACET_VALUES"])), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+SUGGEST_SKILLS = statement("users.suggest_skills", """
+    SELECT s.id, s.name, COUNT(us.user_id) AS users
+    FROM (
+        SELECT skill_id FROM skill_aliases
+        WHERE alias LIKE :prefix
+        GROUP BY skill_id
+        ORDER BY MIN(alias)
+        LIMIT :limit
+    ) a
+    JOIN skills s ON s.id = a.skill_id
+    LEFT JOIN user_skills us ON us.skill_id = s.id
+    GROUP BY s.id, s.name
+    ORDER BY users DESC, s.name
+""")
+
+
+@bp.get("/skills")
+def suggest_skills():
+    """Skills with a name or alias starting with ?q=, and how many users list each"""
+    prefix = skills.slug(request.args.get("q", ""))
+    if not prefix:
+        return jsonify({"error": "q is required"}), 400
+    # Slugs keep only word characters and "+#.-", of which "_" is a LIKE wildcard
+    prefix = prefix.replace("_", "\\_")
+    try:
+        with read_connection("users") as conn:
+            rows = conn.execute(SUGGEST_SKILLS, {
+                "prefix": prefix + "%",
+                "limit": get_config()["SKILL_SUGGESTIONS"]
+            })
+            return jsonify([{"id": row.id, "name": row.name, "users": row.users} for row in rows]), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+LIST_SKILL_USERS = statement("users.list_skill_users", """
+    SELECT u.id, u.name, u.role, u.graduation_year, u.major, u.company, u.position
+    FROM user_skills us
+    JOIN users u ON u.id = us.user_id
+    WHERE us.skill_id = :skill_id
+      AND (:after_id IS NULL OR us.user_id > :after_id)
+      AND (:role IS NULL OR u.role = :role)
+    ORDER BY us.user_id
+    LIMIT :limit
+""")
+
+
+@bp.get("/skills/<path:name>")
+def list_skill_users(name):
+    """
+    Who knows a skill: `name` may be the skill or any alias ("js"). Query
+    params: role (student / alumni), limit and cursor (the previous page's
+    next_cursor); pages walk the (skill_id, user_id) index in user id order.
+    """
+    cfg = get_config()
+    role = request.args.get("role") or None
+    cursor = request.args.get("cursor")
+    if role is not None and role not in ("student", "alumni"):
+        return jsonify({"error": "Role must be student or alumni"}), 400
+    if cursor and not cursor.isdigit():
+        return jsonify({"error": "Invalid cursor"}), 400
+    try:
+        limit = min(max(int(request.args.get("limit", cfg["SKILL_PAGE_SIZE"])), 1),
+                    cfg["SKILL_MAX_PAGE_SIZE"])
+    except ValueError:
+        return jsonify({"error": "Invalid limit"}), 400
+
+    try:
+        with read_connection("users") as conn:
+            skill = skills.find_skill(conn, name)
+            if not skill:
+                return jsonify({"error": "Skill not found"}), 404
+            rows = conn.execute(LIST_SKILL_USERS, {
+                "skill_id": skill.id,
+                "after_id": int(cursor) if cursor else None,
+                "role": role,
+                "limit": limit + 1
+            }).fetchall()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = str(rows[-1].id)
+
+        return jsonify({
+            "skill": {"id": skill.id, "name": skill.name},
+            "users": [{
+                "id": row.id,
+                "name": row.name,
+                "role": row.role,
+                "graduation_year": row.graduation_year,
+                "major": row.major,
+                "company": row.company,
+                "position": row.position
+            } for row in rows],
+            "next_cursor": next_cursor
+        }), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+LIST_STUDENTS = statement("users.list_students", """
+    SELECT id, name, graduation_year, major, bio, skills
+    FROM users WHERE role = 'student' ORDER BY name
+""")
+
+STUDENT_ROW = RowEncoder([
+    "id", "name", "graduation_year", "major",
+    "bio", "skills"
+])
+
+
 @bp.get("/students")
 def list_students():
-    engine = get_engine()
     try:
-        with engine.connect() as conn:
-            result = conn.execute(text("""
-                SELECT id, name, graduation_year, major, bio, skills
-                FROM users WHERE role = 'student' ORDER BY name
-            """))
-            
-            students = []
-            for row in result:
-                students.append({
-                    "id": row.id,
-                    "name": row.name,
-                    "graduation_year": row.graduation_year,
-                    "major": row.major,
-                    "bio": row.bio,
-                    "skills": row.skills
-                })
-            
-            return jsonify(students), 200
+        return json_rows(LIST_STUDENTS, STUDENT_ROW, "users")
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+GET_USER = statement("users.get_user", """
+    SELECT id, name, role, graduation_year, major, company, position, bio, skills
+    FROM users WHERE id = :user_id
+""")
+
+
+def serialize_user(user):
+    return {
+        "id": user.id,
+        "name": user.name,
+        "role": user.role,
+        "graduation_year": user.graduation_year,
+        "major": user.major,
+        "company": user.company,
+        "position": user.position,
+        "bio": user.bio,
+        "skills": user.skills
+    }
+
+
 @bp.get("/<int:user_id>")
 def get_user(user_id):
-    engine = get_engine()
     try:
-        with engine.connect() as conn:
-            result = conn.execute(text("""
-                SELECT id, name, role, graduation_year, major, company, position, bio, skills
-                FROM users WHERE id = :user_id
-            """), {"user_id": user_id})
+        with read_connection("users") as conn:
+            result = conn.execute(GET_USER, {"user_id": user_id})
             
             user = result.fetchone()
             if not user:
                 return jsonify({"error": "User not found"}), 404
             
-            return jsonify({
-                "id": user.id,
-                "name": user.name,
-                "role": user.role,
-                "graduation_year": user.graduation_year,
-                "major": user.major,
-                "company": user.company,
-                "position": user.position,
-                "bio": user.bio,
-                "skills": user.skills
-            }), 200
+            return jsonify(serialize_user(user)), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+UPDATE_PROFILE = statement("users.update_profile", """
+    UPDATE users SET 
+        name = :name, graduation_year = :graduation_year, major = :major,
+        company = :company, position = :position, bio = :bio, skills = :skills
+    WHERE id = :user_id
+""")
+
+
 @bp.put("/profile")
 @jwt_required()
 def update_profile():
-    current_user = get_jwt_identity()
+    current_user = get_current_user()
+    if not current_user:
+        return jsonify({"error": "User not found"}), 404
     data = request.get_json()
     
     engine = get_engine()
     try:
         with engine.connect() as conn:
-            conn.execute(text("""
-                UPDATE users SET 
-                    name = :name, graduation_year = :graduation_year, major = :major,
-                    company = :company, position = :position, bio = :bio, skills = :skills
-                WHERE id = :user_id
-            """), {
+            conn.execute(UPDATE_PROFILE, {
                 "user_id": current_user["id"],
                 "name": data.get("name", current_user["name"]),
                 "graduation_year": data.get("graduation_year"),
@@ -142,7 +264,13 @@ def update_profile():
                 "bio": data.get("bio"),
                 "skills": data.get("skills")
             })
+            skills.set_skills(conn, "user", current_user["id"], data.get("skills"))
+            feed.rename_author(conn, current_user["id"], data.get("name", current_user["name"]))
             conn.commit()
+            # Names are denormalised into every list response
+            response_cache.invalidate()
+            note_write("users", "opportunities", "stories", "scholarships", "mentorship")
+            directory.expire()
             
             return jsonify({"message": "Profile updated successfully"}), 200
     except Exception as e:
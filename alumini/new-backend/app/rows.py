@@ -0,0 +1,128 @@
+"""
+Streaming JSON for large result sets.
+
+List endpoints used to fetch every row, copy each into a dict and hand the
+whole list to jsonify(), so a 100k-user listing held the rows, the dicts and
+the encoded body in memory at once. `json_rows()` instead reads the cursor
+in partitions and writes each row straight into the JSON output through a
+RowEncoder, so only one partition is alive at a time and no per-row dict is
+ever built.
+"""
+import json
+import sys
+
+from flask import Response, request
+from .models import read_connection
+
+COLUMNAR_MIMETYPE = "application/vnd.alumni.columnar+json"
+
+
+def iso(value):
+    """Encode a date/datetime column as an ISO string (or null)"""
+    return '"%s"' % value.isoformat() if value else "null"
+
+
+class RowEncoder:
+    """
+    Encodes result tuples as JSON objects.
+
+    `fields` lists the JSON key of each column in order, or a (key, encode)
+    pair for columns that need more than json.dumps. A dotted key ("stats.stories") nests the value in a
+    sub-object; keys sharing a prefix must be adjacent. The key text is
+    rendered once up front, so encoding a row is just its values.
+    """
+
+    __slots__ = ("keys", "pieces", "encoders", "tail")
+
+    def __init__(self, fields):
+        fields = [(field, json.dumps) if isinstance(field, str) else field for field in fields]
+        pieces = []
+        open_path = []
+        for i, (key, _) in enumerate(fields):
+            *parent, leaf = key.split(".")
+            shared = 0
+            while shared < min(len(open_path), len(parent)) and open_path[shared] == parent[shared]:
+                shared += 1
+            piece = "}" * (len(open_path) - shared) + ("," if i else "{")
+            del open_path[shared:]
+            for name in parent[shared:]:
+                piece += json.dumps(name) + ":{"
+                open_path.append(name)
+            pieces.append(piece + json.dumps(leaf) + ":")
+
+        self.keys = [key for key, _ in fields]
+        self.pieces = pieces
+        self.encoders = [encode for _, encode in fields]
+        self.tail = "}" * (len(open_path) + 1)
+
+    def encode(self, row):
+        return "".join([
+            piece + encode(value)
+            for piece, encode, value in zip(self.pieces, self.encoders, row)
+        ]) + self.tail
+
+
+def json_rows(query, encoder, *keys, params=None, partition_size=1000):
+    """
+    Run `query` on a read connection (see models.read_connection for `keys`)
+    and stream its rows as a JSON array response.
+
+    The query runs before the response is returned, so SQL errors still
+    surface to the caller's error handling. The connection is released when
+    the response is closed.
+    """
+    reader = read_connection(*keys)
+    conn = reader.__enter__()
+    try:
+        result = conn.execution_options(stream_results=True, yield_per=partition_size).execute(
+            query, params or {}
+        )
+    except BaseException:
+        reader.__exit__(*sys.exc_info())
+        raise
+
+    def generate():
+        separator = "["
+        for partition in result.partitions(partition_size):
+            yield separator + ",".join([encoder.encode(row) for row in partition])
+            separator = ","
+        yield "]" if separator == "," else "[]"
+
+    response = Response(generate(), mimetype="application/json")
+    response.call_on_close(lambda: reader.__exit__(None, None, None))
+    return response
+
+
+def wants_columnar():
+    """True when the client asked for ?format=columnar or the columnar media type"""
+    if request.args.get("format") == "columnar":
+        return True
+    return request.accept_mimetypes.best == COLUMNAR_MIMETYPE
+
+
+def json_columns(query, encoder, *keys, params=None, partition_size=1000):
+    """
+    Run `query` and return its rows in columnar form:
+
+        {"columns": ["id", "name", "stats.stories", ...],
+         "values": [[1, 2, ...], ["Ann", "Bob", ...], [0, 3, ...]]}
+
+    Key names are sent once instead of once per row and nested objects are
+    flattened to their dotted keys. Each column is filled straight from the
+    cursor partitions and encoded as one JSON array.
+    """
+    columns = [[] for _ in encoder.keys]
+    with read_connection(*keys) as conn:
+        result = conn.execution_options(stream_results=True, yield_per=partition_size).execute(
+            query, params or {}
+        )
+        for partition in result.partitions(partition_size):
+            for column, values in zip(columns, zip(*partition)):
+                column.extend(values)
+
+    encoded = [
+        json.dumps(column) if encode is json.dumps else "[" + ",".join(map(encode, column)) + "]"
+        for encode, column in zip(encoder.encoders, columns)
+    ]
+    body = '{"columns":%s,"values":[%s]}' % (json.dumps(encoder.keys), ",".join(encoded))
+    return Response(body, mimetype=COLUMNAR_MIMETYPE)
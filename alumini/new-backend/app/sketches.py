@@ -0,0 +1,250 @@
+"""
+Engagement sketches: approximate distinct counts and top-k per day.
+
+Write paths record items into small fixed-size sketches instead of anyone
+running GROUP BY over `messages`, `opportunities` or
+`mentorship_requests`:
+
+    active_messagers      HyperLogLog of message senders
+    posting_companies     top-k of companies posting opportunities
+    requested_mentors     top-k of mentors receiving mentorship requests
+
+Each process accumulates deltas in memory and a flusher thread merges them
+into the `sketches` row of (name, day) every SKETCH_FLUSH_SECONDS, under
+the row lock, so any number of workers add up. Every sketch type merges
+with another of its kind: HyperLogLogs take the register-wise max, the
+Count-Min counters add up and the Space-Saving candidate lists are summed
+and trimmed. A window of days is answered by merging that many fixed-size
+rows, whatever the traffic.
+"""
+import atexit
+import hashlib
+import heapq
+import json
+import math
+import operator
+import struct
+import threading
+import time
+from array import array
+from datetime import date, timedelta
+
+from .config import get_config
+from .jobs import job
+from .models import get_engine, read_connection
+from .statements import statement
+
+
+def hash128(item):
+    """Two independent 64-bit hashes of an item, stable across processes"""
+    digest = hashlib.blake2b(str(item).encode("utf-8"), digest_size=16).digest()
+    return struct.unpack("<QQ", digest)
+
+
+class HyperLogLog:
+    """Distinct count with a standard error of 1.04 / sqrt(2 ** P) (1.6%)"""
+    P = 12
+    M = 1 << P
+    ALPHA = 0.7213 / (1 + 1.079 / M)
+    POWERS = [2.0 ** -rank for rank in range(65)]
+
+    def __init__(self, registers=None):
+        self.registers = bytearray(registers or self.M)
+
+    def add(self, item):
+        h, _ = hash128(item)
+        index = h >> (64 - self.P)
+        rest = h & ((1 << (64 - self.P)) - 1)
+        rank = (64 - self.P) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other):
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+    def estimate(self):
+        raw = self.ALPHA * self.M * self.M / sum(self.POWERS[rank] for rank in self.registers)
+        zeros = self.registers.count(0)
+        if raw <= 2.5 * self.M and zeros:
+            # Small range: linear counting is more accurate
+            return round(self.M * math.log(self.M / zeros))
+        return round(raw)
+
+    def to_bytes(self):
+        return bytes(self.registers)
+
+    @classmethod
+    def from_bytes(cls, data):
+        return cls(data) if data else cls()
+
+
+class TopK:
+    """
+    Heavy hitters: a Space-Saving list of CANDIDATES items with the largest
+    counts, each ranked by its Count-Min estimate (never under the true
+    count, over it by at most 2/WIDTH of the total with 98% confidence).
+    Items are kept as strings, which is what they read back as from JSON,
+    so a stored sketch and an in-memory delta name an item the same way.
+    """
+    WIDTH = 2048
+    DEPTH = 4
+    CANDIDATES = 200
+
+    def __init__(self, counters=None, candidates=None):
+        self.counters = counters if counters is not None else array("Q", bytes(8 * self.WIDTH * self.DEPTH))
+        self.candidates = candidates or {}
+
+    def _cells(self, item):
+        h1, h2 = hash128(item)
+        return [row * self.WIDTH + (h1 + row * h2) % self.WIDTH for row in range(self.DEPTH)]
+
+    def add(self, item, count=1):
+        item = str(item)
+        for cell in self._cells(item):
+            self.counters[cell] += count
+        candidates = self.candidates
+        if item in candidates or len(candidates) < self.CANDIDATES:
+            candidates[item] = candidates.get(item, 0) + count
+        else:
+            # Space-Saving: the newcomer takes over the smallest candidate's count
+            smallest = min(candidates, key=candidates.get)
+            candidates[item] = candidates.pop(smallest) + count
+
+    def count(self, item):
+        return min(self.counters[cell] for cell in self._cells(item))
+
+    def merge(self, other):
+        self.counters = array("Q", map(operator.add, self.counters, other.counters))
+        merged = dict(self.candidates)
+        for item, count in other.candidates.items():
+            merged[item] = merged.get(item, 0) + count
+        self.candidates = dict(heapq.nlargest(self.CANDIDATES, merged.items(), key=lambda pair: pair[1]))
+        return self
+
+    def top(self, k):
+        """[(item, estimated count)] of the k heaviest candidates"""
+        return heapq.nlargest(k, ((item, self.count(item)) for item in self.candidates),
+                              key=lambda pair: pair[1])
+
+    def to_bytes(self):
+        counters = self.counters.tobytes()
+        return struct.pack("<I", len(counters)) + counters + json.dumps(self.candidates).encode("utf-8")
+
+    @classmethod
+    def from_bytes(cls, data):
+        if not data:
+            return cls()
+        (size,) = struct.unpack_from("<I", data)
+        counters = array("Q")
+        counters.frombytes(data[4:4 + size])
+        return cls(counters, json.loads(data[4 + size:]))
+
+
+SKETCHES = {
+    "active_messagers": HyperLogLog,
+    "posting_companies": TopK,
+    "requested_mentors": TopK,
+}
+
+_lock = threading.Lock()
+_pending = {}
+_flusher = None
+
+
+def record(name, item):
+    """Count `item` in today's `name` sketch (after the write has committed)"""
+    if item is None or item == "":
+        return
+    key = (name, date.today())
+    with _lock:
+        sketch = _pending.get(key)
+        if sketch is None:
+            sketch = _pending[key] = SKETCHES[name]()
+        sketch.add(item)
+
+
+ENSURE_SKETCH = statement("sketches.ensure_sketch", """
+    INSERT IGNORE INTO sketches (name, day, data) VALUES (:name, :day, '')
+""")
+
+LOCK_SKETCH = statement("sketches.lock_sketch", """
+    SELECT data FROM sketches WHERE name = :name AND day = :day FOR UPDATE
+""")
+
+SAVE_SKETCH = statement("sketches.save_sketch", """
+    UPDATE sketches SET data = :data WHERE name = :name AND day = :day
+""")
+
+
+def flush():
+    """Merge this process's deltas into the stored sketches"""
+    global _pending
+    with _lock:
+        pending, _pending = _pending, {}
+    items = list(pending.items())
+    for position, ((name, day), delta) in enumerate(items):
+        try:
+            with get_engine().begin() as conn:
+                params = {"name": name, "day": day}
+                conn.execute(ENSURE_SKETCH, params)
+                stored = SKETCHES[name].from_bytes(conn.execute(LOCK_SKETCH, params).scalar())
+                conn.execute(SAVE_SKETCH, dict(params, data=stored.merge(delta).to_bytes()))
+        except Exception:
+            # Keep this and the remaining deltas for the next flush
+            with _lock:
+                for key, unsaved in items[position:]:
+                    current = _pending.get(key)
+                    _pending[key] = unsaved.merge(current) if current else unsaved
+            raise
+
+
+def _flush_loop(interval):
+    while True:
+        time.sleep(interval)
+        try:
+            flush()
+        except Exception as e:
+            print(f"Sketch flush error: {e}")
+
+
+def start_flusher(interval):
+    """Start the flusher thread (once per process); deltas are also flushed at exit"""
+    global _flusher
+    if _flusher is None:
+        _flusher = threading.Thread(target=_flush_loop, args=(interval,), name="sketch-flusher", daemon=True)
+        _flusher.start()
+        atexit.register(flush)
+
+
+LIST_SKETCHES = statement("sketches.list_sketches", """
+    SELECT data FROM sketches WHERE name = :name AND day > :since
+""")
+
+
+def window(name, days):
+    """`name` merged over the last `days` days, this process's unflushed deltas included"""
+    since = date.today() - timedelta(days=days)
+    merged = SKETCHES[name]()
+    with read_connection() as conn:
+        for row in conn.execute(LIST_SKETCHES, {"name": name, "since": since}):
+            merged.merge(SKETCHES[name].from_bytes(row.data))
+    with _lock:
+        local = [sketch for (key, day), sketch in _pending.items() if key == name and day > since]
+        for sketch in local:
+            merged.merge(sketch)
+    return merged
+
+
+DELETE_OLD_SKETCHES = statement("sketches.delete_old_sketches", """
+    DELETE FROM sketches WHERE day < CURDATE() - INTERVAL :retention_days DAY
+""")
+
+
+@job("purge_sketches", every=86400)
+def purge_sketches_job(payload):
+    with get_engine().begin() as conn:
+        deleted = conn.execute(DELETE_OLD_SKETCHES, {
+            "retention_days": get_config()["SKETCH_RETENTION_DAYS"]
+        }).rowcount
+    return {"deleted": deleted}
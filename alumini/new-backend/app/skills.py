@@ -0,0 +1,203 @@
+"""
+Skills taxonomy.
+
+`users.skills` and `opportunities.requirements` stay free text as typed;
+writers also run them through tokenize() and keep the canonical skill ids
+in `user_skills` / `opportunity_skills`, so matching and "who knows X"
+are indexed lookups instead of string parsing at query time.
+
+Every skill is reachable through `skill_aliases` by its own slug (the
+casefolded, whitespace-collapsed name) and by any alias ("js" ->
+JavaScript), so resolving a list of terms is one IN lookup. Terms a user
+lists that nobody has used before become new skills; requirements only
+link skills that already exist, as they are often prose ("CS
+fundamentals", "3.5+ GPA").
+"""
+import re
+from datetime import datetime
+
+from sqlalchemy import bindparam
+from .changes import EPOCH
+from .config import get_config
+from .jobs import job
+from .models import get_engine, note_write
+from .statements import statement
+
+
+SEPARATOR = re.compile(r"[,;|/\n•]+|\.\s+|\s+(?:and|&)\s+", re.IGNORECASE)
+
+# Words of a term; keeps the punctuation of "C++", "C#", ".NET", "Node.js"
+WORD = re.compile(r"\.?\w[\w+#]*(?:[.\-]\w[\w+#]*)*")
+
+# Lead-ins of requirement phrases ("strong experience with Python")
+FILLER = re.compile(
+    r"^(?:(?:strong|solid|basic|good|working|hands-on|proven)\s+)*"
+    r"(?:(?:experience|knowledge|proficiency|familiarity|skills?)\s+(?:with|in|of)\s+)?",
+    re.IGNORECASE
+)
+
+MAX_SKILL_LENGTH = 100
+MAX_SKILLS = 50
+
+
+def slug(term):
+    """Lookup key of a skill name or alias ("" if it has no words)"""
+    return " ".join(WORD.findall(FILLER.sub("", term.strip()).casefold()))
+
+
+def tokenize(text):
+    """[(slug, label)] of the distinct skills listed in `text`, in order"""
+    terms = {}
+    for label in SEPARATOR.split(text or ""):
+        label = FILLER.sub("", " ".join(label.split())).rstrip(".")
+        key = slug(label)
+        if key and len(key) <= MAX_SKILL_LENGTH:
+            terms.setdefault(key, label)
+    return list(terms.items())[:MAX_SKILLS]
+
+
+LOOKUP_ALIASES = statement("skills.lookup_aliases", """
+    SELECT alias, skill_id FROM skill_aliases WHERE alias IN :aliases
+""", bindparam("aliases", expanding=True))
+
+INSERT_SKILLS = statement("skills.insert_skills", """
+    INSERT IGNORE INTO skills (name, slug) VALUES (:name, :slug)
+""")
+
+INSERT_SELF_ALIASES = statement("skills.insert_self_aliases", """
+    INSERT IGNORE INTO skill_aliases (alias, skill_id)
+    SELECT slug, id FROM skills WHERE slug IN :slugs
+""", bindparam("slugs", expanding=True))
+
+
+def resolve(conn, text, create=False):
+    """Skill ids listed in `text`; with `create`, unknown terms become skills"""
+    terms = tokenize(text)
+    if not terms:
+        return set()
+    slugs = [key for key, _ in terms]
+    found = {row.alias: row.skill_id for row in conn.execute(LOOKUP_ALIASES, {"aliases": slugs})}
+
+    missing = [(key, label) for key, label in terms if key not in found]
+    if create and missing:
+        # INSERT IGNORE: a concurrent writer adding the same skill is harmless
+        conn.execute(INSERT_SKILLS, [{"name": label, "slug": key} for key, label in missing])
+        conn.execute(INSERT_SELF_ALIASES, {"slugs": [key for key, _ in missing]})
+        result = conn.execute(LOOKUP_ALIASES, {"aliases": [key for key, _ in missing]})
+        found.update((row.alias, row.skill_id) for row in result)
+
+    return {found[key] for key in slugs if key in found}
+
+
+OWNERS = {
+    # owner: (join table, owner column, create unknown skills)
+    "user": ("user_skills", "user_id", True),
+    "opportunity": ("opportunity_skills", "opportunity_id", False),
+}
+
+LIST_OWNER_SKILLS = {
+    owner: statement(f"skills.list_{table}", f"""
+        SELECT skill_id FROM {table} WHERE {column} = :owner_id
+    """)
+    for owner, (table, column, _) in OWNERS.items()
+}
+
+DELETE_OWNER_SKILLS = {
+    owner: statement(f"skills.delete_{table}", f"""
+        DELETE FROM {table} WHERE {column} = :owner_id AND skill_id IN :skill_ids
+    """, bindparam("skill_ids", expanding=True))
+    for owner, (table, column, _) in OWNERS.items()
+}
+
+INSERT_OWNER_SKILLS = {
+    owner: statement(f"skills.insert_{table}", f"""
+        INSERT IGNORE INTO {table} ({column}, skill_id) VALUES (:owner_id, :skill_id)
+    """)
+    for owner, (table, column, _) in OWNERS.items()
+}
+
+
+def set_skills(conn, owner, owner_id, text):
+    """
+    Point a user's or opportunity's skill rows at what `text` lists, in the
+    caller's transaction. Returns whether anything changed.
+    """
+    wanted = resolve(conn, text, create=OWNERS[owner][2])
+    current = {row.skill_id for row in conn.execute(LIST_OWNER_SKILLS[owner], {"owner_id": owner_id})}
+    removed, added = current - wanted, wanted - current
+    if removed:
+        conn.execute(DELETE_OWNER_SKILLS[owner], {"owner_id": owner_id, "skill_ids": list(removed)})
+    if added:
+        conn.execute(INSERT_OWNER_SKILLS[owner], [
+            {"owner_id": owner_id, "skill_id": skill_id} for skill_id in added
+        ])
+    return bool(removed or added)
+
+
+FIND_SKILL = statement("skills.find_skill", """
+    SELECT s.id, s.name FROM skill_aliases a
+    JOIN skills s ON s.id = a.skill_id
+    WHERE a.alias = :alias
+""")
+
+
+def find_skill(conn, name):
+    """(id, name) row of the skill `name` is an alias of, or None"""
+    key = slug(name)
+    return conn.execute(FIND_SKILL, {"alias": key}).fetchone() if key else None
+
+
+BACKFILL_SOURCES = {
+    # resource: (owner, rows after :after_id changed since :since)
+    resource: (owner, statement(f"skills.backfill_{resource}", f"""
+        SELECT id, {column} AS text FROM {resource}
+        WHERE id > :after_id AND updated_at >= :since
+        ORDER BY id
+        LIMIT :batch_size
+    """))
+    for resource, owner, column in (
+        ("users", "user", "skills"),
+        ("opportunities", "opportunity", "requirements"),
+    )
+}
+
+TOUCH_USERS = statement("skills.touch_users", """
+    UPDATE users SET updated_at = CURRENT_TIMESTAMP WHERE id IN :user_ids
+""", bindparam("user_ids", expanding=True))
+
+
+@job("backfill_skills")
+def backfill_skills_job(payload):
+    """
+    Re-tokenize users' skills and opportunities' requirements into the join
+    tables, SKILLS_BACKFILL_BATCH_SIZE rows per transaction.
+
+    Payload: `resources` (default both) and `since` (ISO timestamp, only
+    rows updated since then; default everything). Users whose skills
+    changed get their updated_at bumped, so /changes feeds and the
+    directory pick up the canonical names.
+    """
+    cfg = get_config()
+    since = datetime.fromisoformat(payload["since"]) if payload.get("since") else EPOCH
+    counts = {}
+    for resource in payload.get("resources") or list(BACKFILL_SOURCES):
+        owner, query = BACKFILL_SOURCES[resource]
+        after_id, scanned, changed = 0, 0, 0
+        while True:
+            with get_engine().begin() as conn:
+                rows = conn.execute(query, {
+                    "after_id": after_id,
+                    "since": since,
+                    "batch_size": cfg["SKILLS_BACKFILL_BATCH_SIZE"]
+                }).fetchall()
+                changed_ids = [row.id for row in rows if set_skills(conn, owner, row.id, row.text)]
+                if owner == "user" and changed_ids:
+                    conn.execute(TOUCH_USERS, {"user_ids": changed_ids})
+            scanned += len(rows)
+            changed += len(changed_ids)
+            if len(rows) < cfg["SKILLS_BACKFILL_BATCH_SIZE"]:
+                break
+            after_id = rows[-1].id
+        counts[resource] = {"scanned": scanned, "changed": changed}
+        note_write(resource)
+    return counts
@@ -0,0 +1,38 @@
+"""
+Registry of the SQL statements used by the app.
+
+Modules declare their queries once, at import, with `statement()`:
+
+    GET_STORY = statement("stories.get_story", \"\"\"
+        SELECT ... WHERE s.id = :story_id
+    \"\"\")
+
+and pass the returned object to `conn.execute()`. Building `text()` parses
+the SQL for bind parameters; doing it per request also hands SQLAlchemy a
+new object each time, which it has to re-key before it finds the compiled
+form in the engine's compiled cache. Registered statements skip both.
+
+PyMySQL has no server-side prepared statement protocol (it interpolates
+parameters client-side and sends the full SQL), so the compiled cache is as
+far as preparation goes with the current driver.
+"""
+from sqlalchemy import text
+
+
+_statements = {}
+
+
+def statement(name, sql, *bindparams):
+    """Build a text() statement once and register it under `name`"""
+    if name in _statements:
+        raise ValueError(f"Statement '{name}' is already registered")
+    stmt = text(sql)
+    if bindparams:
+        stmt = stmt.bindparams(*bindparams)
+    _statements[name] = stmt
+    return stmt
+
+
+def registered_statements():
+    """All registered statements by name (for tooling and benchmarks)"""
+    return dict(_statements)
@@ -0,0 +1,8 @@
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from app.async_app import create_asgi_app  # noqa: E402
+
+# Async serving mode: uvicorn asgi:app --host 0.0.0.0 --port 5000
+app = create_asgi_app()
@@ -0,0 +1,93 @@
+"""
+Dashboard time series: counting the source table versus reading rollups.
+
+Fills a temporary SQLite database with N applications spread over five
+years, rolls them up per day and status into `daily_rollups` (as the
+rollup_analytics job does), then times a daily, weekly and monthly chart
+of the whole range both ways: GROUP BY over the applications themselves,
+and analytics.time_series over the rollups. Checks both give the same
+counts.
+
+    cd new-backend && python benchmarks/bench_analytics.py [applications]
+"""
+import os
+import random
+import sqlite3
+import sys
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import create_engine, text  # noqa: E402
+from app.analytics import TOTAL, bucket_start, time_series  # noqa: E402
+
+STATUSES = ["submitted", "under_review", "accepted", "rejected"]
+START = date(2020, 1, 1)
+END = date(2024, 12, 31)
+
+SCHEMA = [
+    "CREATE TABLE applications (id INTEGER PRIMARY KEY, status TEXT, created_at TIMESTAMP)",
+    """CREATE TABLE daily_rollups (metric TEXT, day DATE, dimension TEXT, total INTEGER,
+                                   PRIMARY KEY (metric, day, dimension))""",
+]
+
+ROLL_UP = text("""
+    INSERT INTO daily_rollups (metric, day, dimension, total)
+    SELECT 'applications', DATE(created_at), status, COUNT(*) FROM applications
+    GROUP BY DATE(created_at), status
+""")
+
+COUNT_SOURCE = text("""
+    SELECT DATE(created_at) AS day, status, COUNT(*) AS total FROM applications
+    WHERE created_at >= :start AND created_at < :end
+    GROUP BY DATE(created_at), status
+""")
+
+
+def fill(conn, count, rng):
+    span = (END - START).days + 1
+    conn.execute(text("INSERT INTO applications (status, created_at) VALUES (:status, :created_at)"), [{
+        "status": rng.choice(STATUSES),
+        "created_at": datetime.combine(START, datetime.min.time())
+        + timedelta(seconds=rng.randrange(span * 86400))
+    } for _ in range(count)])
+    conn.execute(ROLL_UP)
+
+
+def from_source(conn, bucket):
+    totals = defaultdict(int)
+    for row in conn.execute(COUNT_SOURCE, {"start": START, "end": END + timedelta(days=1)}):
+        totals[bucket_start(date.fromisoformat(row.day), bucket)] += row.total
+    return totals
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    # PARSE_DECLTYPES reads the DATE column back as dates, as MySQL does
+    engine = create_engine("sqlite://", connect_args={"detect_types": sqlite3.PARSE_DECLTYPES})
+    with engine.begin() as conn:
+        for ddl in SCHEMA:
+            conn.execute(text(ddl))
+        fill(conn, count, random.Random(42))
+
+    print(f"{count} applications over {START} .. {END}\n")
+    print(f"{'bucket':<8}{'points':>8}{'source ms':>12}{'rollups ms':>12}")
+    with engine.connect() as conn:
+        for bucket in ("day", "week", "month"):
+            started = time.perf_counter()
+            expected = from_source(conn, bucket)
+            source_ms = (time.perf_counter() - started) * 1000
+
+            started = time.perf_counter()
+            series = time_series(conn, ["applications"], START, END, bucket)
+            rollup_ms = (time.perf_counter() - started) * 1000
+
+            got = dict(zip(series["labels"], series["metrics"]["applications"][TOTAL]))
+            assert all(got[day.isoformat()] == total for day, total in expected.items()), bucket
+            print(f"{bucket:<8}{len(series['labels']):>8}{source_ms:>12.1f}{rollup_ms:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Alumni directory facet index on a synthetic directory.
+
+Builds the in-memory index over N generated alumni (a few dozen years and
+majors, a long tail of companies and skills) and times facet queries:
+the first run of a filter combination, which intersects postings and
+counts every facet, and repeats and further pages of it, which are served
+from the per-combination results. Also checks each query against a plain
+scan of the rows.
+
+    cd new-backend && python benchmarks/bench_directory.py [alumni]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.directory import FacetIndex, facet_key  # noqa: E402
+
+QUERIES = [
+    {},
+    {"major": ["Computer Science"]},
+    {"major": ["Computer Science", "Electrical Engineering"], "skills": ["Python"]},
+    {"company": ["Company 4000"]},
+    # Many small company postings: a large match that stays a set
+    {"company": [f"Company {i}" for i in range(1000, 3000)]},
+    {"graduation_year": [2015], "position": ["Engineer"], "skills": ["Go", "Rust"]},
+    {"company": ["Company 3"], "skills": ["skill 17"]},
+]
+
+
+def make_rows(count, rng):
+    majors = ["Computer Science", "Electrical Engineering", "Mechanical Engineering", "Business", "Mathematics"]
+    majors += [f"Major {i}" for i in range(100)]
+    companies = [f"Company {i}" for i in range(5000)]
+    skills = ["Python", "Java", "Go", "SQL", "React", "Rust", "C++", "Machine Learning"]
+    skills += [f"skill {i}" for i in range(3000)]
+    rows = [{
+        "id": i + 1,
+        "name": f"Alumnus {rng.randrange(10 ** 6)}",
+        "graduation_year": rng.randrange(1990, 2026),
+        "major": rng.choice(majors),
+        # Half the alumni work at the 50 biggest employers
+        "company": rng.choice(companies[:50] if rng.random() < 0.5 else companies),
+        "position": rng.choice(["Engineer", "Manager", "Analyst", "Director", "Founder"]),
+        "bio": None,
+        "canonical_skills": sorted(set(rng.sample(skills[:8], 2) + rng.sample(skills, 1))),
+        "mentor_capacity": 3,
+        "mentor_open_requests": 0,
+    } for i in range(count)]
+    for row in rows:
+        row["skills"] = ", ".join(row["canonical_skills"])
+    return rows
+
+
+def scan(rows, filters):
+    """Ids matching `filters`, by checking every row"""
+    def values(row, facet):
+        raw = row["canonical_skills"] if facet == "skills" else [row[facet]]
+        return {facet_key(facet, value) for value in raw}
+    wanted = {facet: {facet_key(facet, value) for value in vals} for facet, vals in filters.items()}
+    return sum(1 for row in rows if all(wanted[facet] & values(row, facet) for facet in wanted))
+
+
+def describe(filters):
+    """The filters as printed, long value lists shortened"""
+    return str({facet: values if len(values) <= 4 else [values[0], "...", f"{len(values)} values"]
+                for facet, values in filters.items()})
+
+
+def micros(fn, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    rows = make_rows(count, random.Random(42))
+    index = FacetIndex()
+
+    start = time.perf_counter()
+    index.apply(rows)
+    index.search({}, limit=1)
+    print(f"built the index of {count} alumni in {time.perf_counter() - start:.2f} s\n")
+
+    print(f"{'filters':<84}{'matches':>9}{'first us':>10}{'again us':>10}{'page 5 us':>11}")
+    for filters in QUERIES:
+        first = micros(lambda: index.search(filters))
+        again = micros(lambda: index.search(filters), repeat=100)
+        page = micros(lambda: index.search(filters, offset=80, limit=20), repeat=100)
+        total = index.search(filters)["total"]
+        assert total == scan(rows, filters), filters
+        print(f"{describe(filters):<84}{total:>9}{first:>10.0f}{again:>10.1f}{page:>11.1f}")
+
+    update = dict(rows[0], company="Company 7", skills="Go, Python", canonical_skills=["Go", "Python"])
+    print(f"\nprofile update: {micros(lambda: index.apply([update])):.0f} us, "
+          f"then first query {micros(lambda: index.search(QUERIES[1])):.0f} us")
+
+
+if __name__ == "__main__":
+    main()
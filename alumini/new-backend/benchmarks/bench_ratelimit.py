@@ -0,0 +1,54 @@
+"""
+CPU cost of a rate-limit check.
+
+Times the in-memory token bucket on its own, the rule lookup plus bucket,
+and the whole before_request hook (client key included) for an anonymous
+request and for one carrying a JWT, in microseconds per check. A client's
+token is verified on its first request only, so the JWT figure is the
+steady state.
+
+    cd new-backend && python benchmarks/bench_ratelimit.py [iterations]
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault("JOB_WORKERS", "0")
+# One limit for everything, high enough that no check is refused while timing
+os.environ["RATE_LIMIT_DEFAULT"] = "1000000000/second"
+os.environ["RATE_LIMITS"] = ""
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from flask_jwt_extended import create_access_token  # noqa: E402
+from app import create_app  # noqa: E402
+from app.ratelimit import Limit, MemoryBuckets, check_rate_limit, get_limiter  # noqa: E402
+
+
+def cpu_per_call(fn, iterations):
+    start = time.process_time()
+    for _ in range(iterations):
+        fn()
+    return (time.process_time() - start) / iterations * 1e6
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    app = create_app()
+    with app.app_context():
+        token = create_access_token(identity="1")
+
+    buckets = MemoryBuckets()
+    limit = Limit("bench", "1000000000/second")
+    limiter = get_limiter()
+
+    print(f"{'check':<32}{'us':>8}")
+    print(f"{'bucket take':<32}{cpu_per_call(lambda: buckets.take('ip:127.0.0.1', limit), iterations):>8.2f}")
+    print(f"{'rule lookup + take':<32}"
+          f"{cpu_per_call(lambda: limiter.check('users.list_users', 'ip:127.0.0.1'), iterations):>8.2f}")
+    for name, headers in [("hook, anonymous", {}), ("hook, JWT", {"Authorization": f"Bearer {token}"})]:
+        with app.test_request_context("/api/users/", headers=headers):
+            print(f"{name:<32}{cpu_per_call(check_rate_limit, iterations // 10):>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Peak memory of list endpoints: dict-per-row + jsonify versus rows.json_rows.
+
+Fills a temporary SQLite database with N users, points the read replica at
+it and, under tracemalloc, builds the /api/users and /api/admin/users bodies
+both ways: the old path (fetch every Row, copy it into a dict, encode the
+whole list) and the streamed path (tuples encoded partition by partition).
+It also reports the size of the ?format=columnar admin body.
+
+    cd new-backend && python benchmarks/bench_rows.py [users]
+"""
+import json
+import os
+import sys
+import tempfile
+import tracemalloc
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "bench_rows.db")
+os.environ["DB_REPLICA_URIS"] = f"sqlite:///{DB_PATH}"
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import create_engine, text  # noqa: E402
+from app.rows import json_columns, json_rows  # noqa: E402
+from app.routes.admin import ALL_USERS_ROW, LIST_ALL_USERS  # noqa: E402
+from app.routes.users import LIST_USERS, USER_ROW  # noqa: E402
+
+
+SCHEMA = [
+    """CREATE TABLE users (
+        id INTEGER PRIMARY KEY, email TEXT, name TEXT, role TEXT, created_at TIMESTAMP,
+        graduation_year INTEGER, major TEXT, company TEXT, position TEXT, bio TEXT, skills TEXT)""",
+    "CREATE TABLE stories (author_id INTEGER)",
+    "CREATE TABLE opportunities (posted_by INTEGER)",
+    "CREATE TABLE scholarships (posted_by INTEGER)",
+    "CREATE TABLE mentorship_requests (student_id INTEGER, mentor_id INTEGER)",
+    "CREATE TABLE messages (sender_id INTEGER, receiver_id INTEGER)",
+    "CREATE TABLE applications (applicant_id INTEGER)",
+]
+
+
+def populate(count):
+    engine = create_engine(f"sqlite:///{DB_PATH}")
+    with engine.begin() as conn:
+        for sql in SCHEMA:
+            conn.execute(text(sql))
+        conn.execute(text("""
+            INSERT INTO users (email, name, role, graduation_year, major, company, position, bio, skills)
+            VALUES (:email, :name, :role, 2020, 'Computer Science', 'Acme', 'Engineer',
+                    'Likes building things.', 'python,sql,react')
+        """), [
+            {"email": f"user{i}@example.com", "name": f"User {i}", "role": "alumni" if i % 2 else "student"}
+            for i in range(count)
+        ])
+    engine.dispose()
+
+
+def dict_rows_users(conn):
+    return [{
+        "id": row.id, "name": row.name, "role": row.role,
+        "graduation_year": row.graduation_year, "major": row.major,
+        "company": row.company, "position": row.position,
+        "bio": row.bio, "skills": row.skills
+    } for row in conn.execute(LIST_USERS)]
+
+
+def dict_rows_all_users(conn):
+    return [{
+        "id": row.id, "email": row.email, "name": row.name, "role": row.role,
+        "created_at": row.created_at.isoformat() if row.created_at else None,
+        "graduation_year": row.graduation_year, "major": row.major,
+        "company": row.company, "position": row.position,
+        "stats": {
+            "stories": row.story_count, "opportunities": row.opportunity_count,
+            "scholarships": row.scholarship_count, "mentorships": row.mentorship_count,
+            "messages": row.message_count, "applications": row.application_count
+        }
+    } for row in conn.execute(LIST_ALL_USERS)]
+
+
+def peak(fn):
+    tracemalloc.start()
+    size = fn()
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, peak_bytes / 2**20
+
+
+def old_path(build):
+    def run():
+        engine = create_engine(f"sqlite:///{DB_PATH}")
+        with engine.connect() as conn:
+            body = json.dumps(build(conn))
+        engine.dispose()
+        return len(body)
+    return run
+
+
+def new_path(query, encoder):
+    def run():
+        response = json_rows(query, encoder)
+        size = sum(len(chunk) for chunk in response.response)
+        response.close()
+        return size
+    return run
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    populate(count)
+
+    print(f"{count} users")
+    print(f"{'endpoint':<20}{'dict rows MiB':>15}{'json_rows MiB':>15}{'body MiB':>10}")
+    for name, build, query, encoder in [
+        ("/api/users", dict_rows_users, LIST_USERS, USER_ROW),
+        ("/api/admin/users", dict_rows_all_users, LIST_ALL_USERS, ALL_USERS_ROW),
+    ]:
+        size, old_peak = peak(old_path(build))
+        _, new_peak = peak(new_path(query, encoder))
+        print(f"{name:<20}{old_peak:>15.1f}{new_peak:>15.1f}{size / 2**20:>10.1f}")
+
+    columnar = json_columns(LIST_ALL_USERS, ALL_USERS_ROW).get_data()
+    print(f"/api/admin/users?format=columnar body: {len(columnar) / 2**20:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
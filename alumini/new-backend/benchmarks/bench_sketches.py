@@ -0,0 +1,92 @@
+"""
+Engagement sketches against exact counts.
+
+Feeds synthetic traffic into one sketch per day, as the write paths do,
+then merges the days as the admin endpoints do:
+
+- active_messagers: N messages over a week from a pool of senders (a few
+  heavy users and a long tail), HyperLogLog estimate versus the exact
+  distinct count;
+- posting_companies: N postings over 30 days with Zipf-distributed
+  companies, top-k recall and count error versus an exact tally.
+
+Reports the cost of an add, of merging the window and of answering.
+
+    cd new-backend && python benchmarks/bench_sketches.py [events]
+"""
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.sketches import HyperLogLog, TopK  # noqa: E402
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def feed(cls, days):
+    """One sketch per day from [(day, item)]; returns (sketches, us per add)"""
+    sketches = {}
+    start = time.perf_counter()
+    count = 0
+    for day, item in days:
+        sketch = sketches.get(day)
+        if sketch is None:
+            sketch = sketches[day] = cls()
+        sketch.add(item)
+        count += 1
+    return list(sketches.values()), (time.perf_counter() - start) / count * 1e6
+
+
+def merged(cls, sketches):
+    """Round-trip each day through bytes, as stored, and merge them"""
+    window = cls()
+    for sketch in sketches:
+        window.merge(cls.from_bytes(sketch.to_bytes()))
+    return window
+
+
+def main():
+    events = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    rng = random.Random(42)
+
+    # Half the messages come from 100 heavy senders
+    senders = [(rng.randrange(7), rng.randrange(100) if rng.random() < 0.5 else rng.randrange(events))
+               for _ in range(events)]
+    days, add_us = feed(HyperLogLog, senders)
+    window, merge_s = timed(lambda: merged(HyperLogLog, days))
+    estimate, estimate_s = timed(window.estimate)
+    exact = len({sender for _, sender in senders})
+    print(f"active_messagers: {events} messages, {exact} distinct senders over 7 days")
+    print(f"  estimate {estimate} ({(estimate - exact) / exact:+.2%}), add {add_us:.1f} us, "
+          f"merge {merge_s * 1000:.1f} ms, estimate {estimate_s * 1000:.2f} ms, "
+          f"{len(days[0].to_bytes())} bytes a day\n")
+
+    companies = [f"Company {i}" for i in range(5000)]
+    weights = [1 / (rank + 1) for rank in range(len(companies))]
+    postings = [(rng.randrange(30), company)
+                for company in rng.choices(companies, weights, k=events)]
+    days, add_us = feed(TopK, postings)
+    window, merge_s = timed(lambda: merged(TopK, days))
+    top, top_s = timed(lambda: window.top(10))
+    exact = Counter(company for _, company in postings)
+    truth = [company for company, _ in exact.most_common(10)]
+    recall = len({company for company, _ in top} & set(truth)) / len(truth)
+    worst = max(count - exact[company] for company, count in top)
+    print(f"posting_companies: {events} postings of {len(companies)} companies over 30 days")
+    print(f"  top-10 recall {recall:.0%}, largest overcount {worst}, add {add_us:.1f} us, "
+          f"merge {merge_s * 1000:.1f} ms, top {top_s * 1000:.2f} ms, "
+          f"{len(days[0].to_bytes())} bytes a day")
+    for company, count in top[:5]:
+        print(f"    {company:<14}{count:>8}{exact[company]:>8}")
+
+
+if __name__ == "__main__":
+    main()
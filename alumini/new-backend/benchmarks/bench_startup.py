@@ -0,0 +1,69 @@
+"""
+Cold start of the app factory, with an import-time profile.
+
+Starts fresh interpreters that import the app and call create_app() (job
+workers off; the database warm-up runs in the background and is not waited
+for) and reports the median wall time. One extra run under -X importtime
+lists the modules that cost the most to import.
+
+Exits with status 1 when the median exceeds the budget, so CI can fail on a
+cold-start regression:
+
+    cd new-backend && python benchmarks/bench_startup.py [runs] [budget_ms]
+"""
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+STARTUP = """
+import time
+start = time.perf_counter()
+from app import create_app
+create_app()
+print((time.perf_counter() - start) * 1000)
+"""
+
+
+def run(*flags):
+    env = dict(os.environ, JOB_WORKERS="0")
+    return subprocess.run(
+        [sys.executable, *flags, "-c", STARTUP],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    )
+
+
+def import_profile(top):
+    """(cumulative ms, module) of the slowest top-level imports"""
+    entries = []
+    for line in run("-X", "importtime").stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        # Nested imports are indented; their time is already in their parent's
+        if len(name) - len(name.lstrip()) <= 3:
+            entries.append((int(cumulative) / 1000, name.strip()))
+    return sorted(entries, reverse=True)[:top]
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    budget_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 1000
+
+    print(f"{'import':<40}{'ms':>8}")
+    for cumulative_ms, name in import_profile(top=12):
+        print(f"{name:<40}{cumulative_ms:>8.1f}")
+
+    times = [float(run().stdout.strip().splitlines()[-1]) for _ in range(runs)]
+    median = statistics.median(times)
+    print(f"\ncreate_app cold start over {runs} runs: median {median:.0f} ms, "
+          f"min {min(times):.0f} ms, max {max(times):.0f} ms (budget {budget_ms:.0f} ms)")
+    if median > budget_ms:
+        print("Cold start is over budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
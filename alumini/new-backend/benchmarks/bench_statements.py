@@ -0,0 +1,67 @@
+"""
+Per-query CPU overhead of inline text() versus registered statements.
+
+Runs two registered queries against an in-memory SQLite copy of the tables
+they touch, once rebuilding text() on every call (the old inline style) and
+once reusing the registered object, and prints CPU microseconds per query.
+The database work is identical in both runs, so the difference is the
+statement construction and compiled-cache lookup overhead.
+
+    cd new-backend && python benchmarks/bench_statements.py [iterations]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import create_engine, text  # noqa: E402
+from app.routes.opportunities import LIST_OPPORTUNITIES  # noqa: E402
+from app.routes.users import GET_USER  # noqa: E402
+
+
+SCHEMA = [
+    """CREATE TABLE users (
+        id INTEGER PRIMARY KEY, name TEXT, role TEXT, graduation_year INTEGER,
+        major TEXT, company TEXT, position TEXT, bio TEXT, skills TEXT)""",
+    """CREATE TABLE opportunities (
+        id INTEGER PRIMARY KEY, title TEXT, company TEXT, description TEXT,
+        requirements TEXT, location TEXT, salary_range TEXT, type TEXT,
+        posted_by INTEGER, is_active BOOLEAN DEFAULT 1, created_at TIMESTAMP)""",
+    "INSERT INTO users (id, name, role) VALUES (1, 'Alumnus', 'alumni')",
+    """INSERT INTO opportunities (title, company, type, posted_by, created_at)
+       VALUES ('Engineer', 'Acme', 'job', 1, CURRENT_TIMESTAMP)""",
+]
+
+CASES = [
+    ("users.get_user", GET_USER, {"user_id": 1}),
+    ("opportunities.list_opportunities", LIST_OPPORTUNITIES, {}),
+]
+
+
+def cpu_per_query(conn, make_statement, params, iterations):
+    start = time.process_time()
+    for _ in range(iterations):
+        conn.execute(make_statement(), params).fetchall()
+    return (time.process_time() - start) / iterations * 1e6
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        for sql in SCHEMA:
+            conn.execute(text(sql))
+
+    with engine.connect() as conn:
+        print(f"{'statement':<36}{'inline us':>12}{'registered us':>16}{'saved':>8}")
+        for name, stmt, params in CASES:
+            # Warm the compiled cache so both runs measure steady state
+            conn.execute(stmt, params).fetchall()
+            inline = cpu_per_query(conn, lambda: text(stmt.text), params, iterations)
+            registered = cpu_per_query(conn, lambda: stmt, params, iterations)
+            print(f"{name:<36}{inline:>12.1f}{registered:>16.1f}{1 - registered / inline:>8.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Test fixtures. The app runs against SQLite files standing in for MySQL;
+`db()` rewrites the few MySQL-only bits of the statements under test.
+
+    cd new-backend && python -m pytest -q
+"""
+import os
+import re
+from datetime import datetime
+
+import bcrypt
+import pytest
+from sqlalchemy import create_engine, event, text
+
+# No background threads: each test drives the app itself
+os.environ.update({
+    "DB_WARM_UP": "0",
+    "HEALTH_PROBE_INTERVAL": "0",
+    "JOB_WORKERS": "0",
+    "SKETCH_FLUSH_SECONDS": "0",
+    "REVOCATION_SYNC_SECONDS": "0",
+    "JWT_SECRET_KEY": "test-secret-key-that-is-long-enough-for-hs256",
+})
+
+from app import create_app, models, ratelimit, revocation  # noqa: E402
+
+MYSQL_ONLY = [
+    (re.compile(r"\bINSERT IGNORE\b"), "INSERT OR IGNORE"),
+    (re.compile(r"\bFOR UPDATE( SKIP LOCKED)?"), ""),
+]
+
+
+def sqlite_engine(path):
+    """A SQLite file engine that accepts the MySQL statements the tests run"""
+    engine = create_engine(f"sqlite:///{path}")
+
+    @event.listens_for(engine, "connect")
+    def add_functions(dbapi_conn, record):
+        dbapi_conn.create_function("NOW", 0, lambda: datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S"))
+
+    @event.listens_for(engine, "before_cursor_execute", retval=True)
+    def rewrite(conn, cursor, statement, parameters, context, executemany):
+        for pattern, replacement in MYSQL_ONLY:
+            statement = pattern.sub(replacement, statement)
+        return statement, parameters
+
+    return engine
+
+
+USERS = """
+    CREATE TABLE users (
+        id INTEGER PRIMARY KEY, email TEXT UNIQUE COLLATE NOCASE, password_hash TEXT,
+        name TEXT, role TEXT, graduation_year INTEGER, major TEXT, company TEXT,
+        position TEXT, bio TEXT, skills TEXT, cgpa REAL, reservation_category TEXT,
+        is_lateral_entry BOOLEAN DEFAULT FALSE,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+
+def run(engine, *ddl):
+    with engine.begin() as conn:
+        for sql in ddl:
+            conn.execute(text(sql))
+
+
+@pytest.fixture
+def db(tmp_path):
+    """The primary database, empty; tests create the tables they use"""
+    engine = sqlite_engine(tmp_path / "primary.db")
+    models._engine, models._replicas = engine, []
+    yield engine
+    models._engine = models._replicas = None
+    models._recent_writes.clear()
+    models._replica_down_until.clear()
+    revocation._revoked = revocation.RevocationList()
+    ratelimit._limiter = None
+    engine.dispose()
+
+
+@pytest.fixture
+def app(db):
+    return create_app()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def add_user(engine, email, role, password="secret"):
+    """Create a user (cheap bcrypt cost) and return their id"""
+    password_hash = bcrypt.hashpw(password.encode(), bcrypt.gensalt(4)).decode()
+    with engine.begin() as conn:
+        return conn.exec_driver_sql(
+            "INSERT INTO users (email, password_hash, name, role) VALUES (?, ?, ?, ?)",
+            (email, password_hash, email.split("@")[0], role)).lastrowid
+
+
+def login(client, email, password="secret"):
+    return client.post("/api/auth/login", json={"email": email, "password": password}).get_json()
+
+
+def bearer(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def admin_login(client):
+    return client.post("/api/auth/login", json={
+        "email": "admin@alumni.local", "password": "ChangeMe123!"
+    }).get_json()
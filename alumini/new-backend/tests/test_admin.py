@@ -0,0 +1,29 @@
+from app.routes.admin import RECORD_PURGE_TOMBSTONES
+from conftest import USERS, add_user, run
+
+TABLES = (
+    USERS,
+    "CREATE TABLE stories (id INTEGER PRIMARY KEY, author_id INTEGER)",
+    "CREATE TABLE opportunities (id INTEGER PRIMARY KEY, posted_by INTEGER)",
+    "CREATE TABLE scholarships (id INTEGER PRIMARY KEY, posted_by INTEGER)",
+    "CREATE TABLE mentorship_requests (id INTEGER PRIMARY KEY, student_id INTEGER, mentor_id INTEGER)",
+    """CREATE TABLE tombstones (id INTEGER PRIMARY KEY, resource TEXT, item_id INTEGER,
+                               deleted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, UNIQUE (resource, item_id))""",
+)
+
+
+def test_rerun_purge_records_each_tombstone_once(db):
+    run(db, *TABLES)
+    user_id = add_user(db, "alumnus@example.com", "alumni")
+    run(db, f"INSERT INTO stories (id, author_id) VALUES (1, {user_id}), (2, {user_id}), (3, 999)",
+        f"INSERT INTO mentorship_requests (id, student_id, mentor_id) VALUES (4, 998, {user_id})")
+
+    # The purge job is retried from the top after a failure
+    for _ in range(2):
+        with db.begin() as conn:
+            for query in RECORD_PURGE_TOMBSTONES:
+                conn.execute(query, {"user_id": user_id})
+
+    with db.connect() as conn:
+        rows = conn.exec_driver_sql("SELECT resource, item_id FROM tombstones ORDER BY id").fetchall()
+    assert [tuple(row) for row in rows] == [("users", user_id), ("stories", 1), ("stories", 2), ("mentorship", 4)]
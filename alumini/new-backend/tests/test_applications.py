@@ -0,0 +1,53 @@
+from conftest import USERS, add_user, bearer, login, run
+
+OPPORTUNITIES = "CREATE TABLE opportunities (id INTEGER PRIMARY KEY, title TEXT, is_active BOOLEAN DEFAULT TRUE)"
+
+APPLICATIONS = """
+    CREATE TABLE applications (
+        id INTEGER PRIMARY KEY, applicant_id INTEGER, opportunity_id INTEGER, scholarship_id INTEGER,
+        type TEXT, status TEXT DEFAULT 'submitted', cover_letter TEXT, document_urls TEXT,
+        idempotency_key TEXT, match_score INTEGER DEFAULT 0, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE (applicant_id, opportunity_id), UNIQUE (applicant_id, scholarship_id)
+    )
+"""
+
+SKILLS = ("CREATE TABLE opportunity_skills (opportunity_id INTEGER, skill_id INTEGER)",
+          "CREATE TABLE user_skills (user_id INTEGER, skill_id INTEGER)")
+
+
+def apply(client, token, opportunity_id, key=None):
+    headers = dict(bearer(token), **({"Idempotency-Key": key} if key else {}))
+    return client.post("/api/applications/", headers=headers, json={
+        "type": "job", "opportunity_id": opportunity_id, "cover_letter": "Hello"
+    })
+
+
+def test_job_application_is_scored_and_deduplicated(db, client):
+    run(db, USERS, OPPORTUNITIES, APPLICATIONS, *SKILLS,
+        "INSERT INTO opportunities (id, title) VALUES (1, 'Backend')",
+        "INSERT INTO opportunity_skills VALUES (1, 10), (1, 11), (1, 12), (1, 13)")
+    user_id = add_user(db, "alice@example.com", "student")
+    run(db, f"INSERT INTO user_skills VALUES ({user_id}, 10), ({user_id}, 12), ({user_id}, 99)")
+    token = login(client, "alice@example.com")["access_token"]
+
+    first = apply(client, token, 1, key="k1")
+    assert first.status_code == 201
+    with db.connect() as conn:
+        assert conn.exec_driver_sql("SELECT match_score FROM applications").scalar() == 50
+
+    retry = apply(client, token, 1, key="k1")
+    assert retry.status_code == 201
+    assert retry.get_json()["id"] == first.get_json()["id"]
+    assert apply(client, token, 1, key="k2").status_code == 400
+
+
+def test_missing_or_closed_opportunity_is_not_found(db, client):
+    run(db, USERS, OPPORTUNITIES, APPLICATIONS, *SKILLS,
+        "INSERT INTO opportunities (id, title, is_active) VALUES (2, 'Closed', FALSE)")
+    add_user(db, "bob@example.com", "student")
+    token = login(client, "bob@example.com")["access_token"]
+
+    assert apply(client, token, 1).status_code == 404
+    assert apply(client, token, 2).status_code == 404
+    with db.connect() as conn:
+        assert conn.exec_driver_sql("SELECT COUNT(*) FROM applications").scalar() == 0
@@ -0,0 +1,34 @@
+from app import revocation
+from app.async_app import bearer_identity
+from conftest import USERS, add_user, bearer, login, run
+
+
+def scope(token):
+    return {"headers": [(name.lower().encode(), value.encode()) for name, value in bearer(token).items()]}
+
+
+def test_logged_out_token_is_refused(db, client):
+    run(db, USERS)
+    user_id = add_user(db, "alice@example.com", "student")
+    tokens = login(client, "alice@example.com")
+    assert bearer_identity(scope(tokens["access_token"])) == str(user_id)
+
+    assert client.post("/api/auth/logout", headers=bearer(tokens["access_token"])).status_code == 200
+
+    assert bearer_identity(scope(tokens["access_token"])) is None
+
+
+def test_kicked_user_is_refused(db, client):
+    run(db, USERS)
+    user_id = add_user(db, "bob@example.com", "alumni")
+    tokens = login(client, "bob@example.com")
+
+    revocation.revoke_user(user_id)
+
+    assert bearer_identity(scope(tokens["access_token"])) is None
+
+
+def test_refresh_token_is_not_an_identity(db, client):
+    run(db, USERS)
+    add_user(db, "carol@example.com", "student")
+    assert bearer_identity(scope(login(client, "carol@example.com")["refresh_token"])) is None
@@ -0,0 +1,57 @@
+from app import revocation
+from conftest import USERS, add_user, admin_login, bearer, login, run
+
+JOBS = """CREATE TABLE jobs (id INTEGER PRIMARY KEY, kind TEXT, payload TEXT, status TEXT,
+                             attempts INTEGER, max_attempts INTEGER, result TEXT, error TEXT,
+                             run_after TIMESTAMP, created_at TIMESTAMP, finished_at TIMESTAMP)"""
+
+REVOKED_TOKENS = """CREATE TABLE revoked_tokens (id INTEGER PRIMARY KEY, kind TEXT, token_key TEXT,
+                                         revoked_at INTEGER, expires_at INTEGER, UNIQUE (kind, token_key))"""
+
+
+def test_admin_token_opens_admin_routes(db, client):
+    run(db, JOBS, "INSERT INTO jobs (id, kind, status, attempts, max_attempts) VALUES (1, 'purge_user', 'queued', 0, 5)")
+    tokens = admin_login(client)
+
+    response = client.get("/api/admin/jobs/1", headers=bearer(tokens["access_token"]))
+
+    assert response.status_code == 200
+    assert response.get_json()["kind"] == "purge_user"
+
+
+def test_refreshed_admin_token_keeps_role(db, client):
+    run(db, JOBS, REVOKED_TOKENS, "INSERT INTO jobs (id, kind, status, attempts, max_attempts) VALUES (1, 'purge_user', 'queued', 0, 5)")
+    tokens = admin_login(client)
+    refreshed = client.post("/api/auth/refresh", headers=bearer(tokens["refresh_token"])).get_json()
+
+    assert client.get("/api/admin/jobs/1", headers=bearer(refreshed["access_token"])).status_code == 200
+
+
+def test_other_roles_are_refused(db, client):
+    run(db, USERS, JOBS)
+    add_user(db, "student@example.com", "student")
+    tokens = login(client, "student@example.com")
+
+    response = client.get("/api/admin/jobs/1", headers=bearer(tokens["access_token"]))
+
+    assert response.status_code == 403
+
+
+def refresh(client, tokens):
+    return client.post("/api/auth/refresh", headers=bearer(tokens["refresh_token"]))
+
+
+def test_rotated_refresh_token_is_refused_on_another_worker(db, client):
+    run(db, USERS, REVOKED_TOKENS)
+    add_user(db, "alice@example.com", "student")
+    tokens = login(client, "alice@example.com")
+    rotated = refresh(client, tokens)
+    assert rotated.status_code == 200
+
+    # A worker that has not synced this rotation yet
+    revocation._revoked = revocation.RevocationList()
+
+    assert refresh(client, tokens).status_code == 401
+    # The replay ends the whole login, the newer pair included
+    assert refresh(client, rotated.get_json()).status_code == 401
+    assert client.post("/api/auth/logout", headers=bearer(rotated.get_json()["access_token"])).status_code == 401
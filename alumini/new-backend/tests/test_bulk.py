@@ -0,0 +1,15 @@
+from conftest import USERS, add_user, admin_login, bearer, run
+
+
+def test_export_rejects_unknown_formats(db, client):
+    run(db, USERS)
+    add_user(db, "alice@example.com", "student")
+    headers = bearer(admin_login(client)["access_token"])
+
+    assert client.get("/api/admin/export/users?format=cvs", headers=headers).status_code == 400
+    assert client.get("/api/admin/export/opportunities?format=xml", headers=headers).status_code == 400
+
+    response = client.get("/api/admin/export/users?format=NDJSON", headers=headers)
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    assert b'"alice@example.com"' in response.get_data()
@@ -0,0 +1,28 @@
+from datetime import datetime
+
+import pytest
+
+from app.changes import parse_since
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("2024-05-01T10:00:00", datetime(2024, 5, 1, 10)),
+    ("2024-05-01T10:00:00.250Z", datetime(2024, 5, 1, 10, 0, 0, 250000)),
+    ("2024-05-01T12:00:00+02:00", datetime(2024, 5, 1, 10)),
+])
+def test_since_is_naive_utc(value, expected):
+    since = parse_since(value)
+    assert since == expected
+    assert since.tzinfo is None
+    # Compared with server time when deciding on a full sync
+    assert since < datetime.now()
+
+
+def test_missing_since_means_full_sync():
+    assert parse_since("") is None
+    assert parse_since(None) is None
+
+
+def test_malformed_since_is_rejected():
+    with pytest.raises(ValueError):
+        parse_since("yesterday")
@@ -0,0 +1,24 @@
+from app import directory
+from app.directory import FacetIndex
+
+
+def alumni(count, companies):
+    return [{
+        "id": i + 1, "name": f"Alumnus {(i * 7919) % count:05d}", "graduation_year": 2000 + i % 20,
+        "major": "Mathematics", "company": f"Company {i % companies}", "position": "Engineer",
+        "bio": None, "skills": "", "canonical_skills": [], "mentor_capacity": 0, "mentor_open_requests": 0,
+    } for i in range(count)]
+
+
+def test_page_through_many_small_postings(monkeypatch):
+    monkeypatch.setattr(directory, "SORT_MAX", 100)
+    rows = alumni(3000, 300)
+    index = FacetIndex()
+    index.apply(rows)
+    companies = [f"Company {i}" for i in range(20)]
+
+    result = index.search({"company": companies}, offset=40, limit=20)
+
+    expected = sorted((row for row in rows if row["company"] in companies), key=lambda row: row["name"])
+    assert result["total"] == 200
+    assert [row["id"] for row in result["alumni"]] == [row["id"] for row in expected[40:60]]
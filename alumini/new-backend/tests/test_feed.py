@@ -0,0 +1,52 @@
+from app import feed
+from conftest import USERS, add_user, bearer, login, run
+
+HOME_FEED = """
+    CREATE TABLE home_feed (
+        id INTEGER PRIMARY KEY, item_type TEXT, item_id INTEGER, title TEXT, subtitle TEXT,
+        tag TEXT, summary TEXT, author_id INTEGER, author_name TEXT,
+        is_featured BOOLEAN DEFAULT FALSE, created_at TIMESTAMP,
+        UNIQUE (item_type, item_id)
+    )
+"""
+
+SCHOLARSHIPS = "CREATE TABLE scholarships (id INTEGER PRIMARY KEY, posted_by INTEGER, is_active BOOLEAN DEFAULT TRUE)"
+
+
+def add_feed_items(db, item_type, count, featured=()):
+    with db.begin() as conn:
+        for i in range(count):
+            conn.exec_driver_sql(
+                "INSERT INTO home_feed (item_type, item_id, title, is_featured, created_at) VALUES (?, ?, ?, ?, ?)",
+                (item_type, i, f"{item_type} {i}", i in featured, f"2024-01-01 00:{i // 60:02d}:{i % 60:02d}"))
+
+
+def feed_ids(db, item_type):
+    with db.connect() as conn:
+        return {row.item_id for row in conn.exec_driver_sql(
+            "SELECT item_id FROM home_feed WHERE item_type = ?", (item_type,))}
+
+
+def test_trim_keeps_newest_and_featured(db, monkeypatch):
+    monkeypatch.setenv("HOME_FEED_SIZE", "5")
+    run(db, HOME_FEED)
+    add_feed_items(db, "story", 20, featured={0, 3})
+    add_feed_items(db, "opportunity", 8)
+
+    with db.begin() as conn:
+        feed.trim(conn, "story")
+
+    assert feed_ids(db, "story") == {0, 3, 15, 16, 17, 18, 19}
+    assert len(feed_ids(db, "opportunity")) == 8
+
+
+def test_deleting_a_scholarship_removes_it_from_the_feed(db, client):
+    run(db, USERS, HOME_FEED, SCHOLARSHIPS)
+    poster = add_user(db, "alumna@example.com", "alumni")
+    run(db, f"INSERT INTO scholarships (id, posted_by) VALUES (1, {poster})")
+    add_feed_items(db, "scholarship", 2)
+
+    response = client.delete("/api/scholarships/1", headers=bearer(login(client, "alumna@example.com")["access_token"]))
+
+    assert response.status_code == 200
+    assert feed_ids(db, "scholarship") == {0}
@@ -0,0 +1,50 @@
+import threading
+
+import pytest
+
+from app import models, probes
+from conftest import sqlite_engine
+
+
+@pytest.fixture
+def probe_with(monkeypatch):
+    """Probe `engine` as the primary (the checker is off in tests, so each request probes)"""
+    def use(engine):
+        monkeypatch.setattr(probes, "_probe_engines", (engine, []))
+    return use
+
+
+def test_ready_probes_on_request_when_the_checker_is_off(db, client, probe_with):
+    probe_with(db)
+
+    response = client.get("/api/health/ready")
+
+    assert response.status_code == 200
+    assert response.get_json()["db"] == {"ok": True}
+    assert client.get("/api/health").status_code == 200
+
+
+def test_unreachable_database_is_reported_without_details(db, client, probe_with, tmp_path):
+    probe_with(sqlite_engine(tmp_path / "missing" / "primary.db"))
+
+    response = client.get("/api/health/ready")
+    body = response.get_json()
+
+    assert response.status_code == 503
+    assert body["reason"] == "database unreachable"
+    assert body["db"] == {"ok": False}
+    assert "unable to open" not in response.get_data(as_text=True)
+    assert client.get("/api/health").get_json() == {"status": "degraded", "error": "database unreachable"}
+
+
+def test_not_ready_until_warmed_up(db, client, probe_with, monkeypatch):
+    probe_with(db)
+    monkeypatch.setenv("DB_WARM_UP", "1")
+    monkeypatch.setattr(models, "_warmed_up", threading.Event())
+
+    response = client.get("/api/health/ready")
+    assert response.status_code == 503
+    assert response.get_json()["reason"] == "starting"
+
+    models._warmed_up.set()
+    assert client.get("/api/health/ready").status_code == 200
@@ -0,0 +1,45 @@
+import pytest
+
+from app import create_app, ratelimit
+
+
+@pytest.fixture
+def limited_client(db, monkeypatch):
+    """A client of an app that allows one liveness check a minute per client, behind one proxy"""
+    monkeypatch.setenv("RATE_LIMITS", "health.live=1/minute")
+    monkeypatch.setenv("TRUSTED_PROXY_HOPS", "1")
+    monkeypatch.setattr(ratelimit, "_limiter", None)
+    yield create_app().test_client()
+    ratelimit._limiter = None
+
+
+def live(client, forwarded_for):
+    return client.get("/api/health/live", headers={"X-Forwarded-For": forwarded_for}).status_code
+
+
+def test_clients_behind_the_proxy_get_their_own_buckets(limited_client):
+    assert live(limited_client, "203.0.113.1") == 200
+    assert live(limited_client, "203.0.113.2") == 200
+    assert live(limited_client, "203.0.113.1") == 429
+
+
+def test_only_the_trusted_hop_is_used(limited_client):
+    # A client-supplied entry ahead of the proxy's own does not give a new bucket
+    assert live(limited_client, "198.51.100.7, 203.0.113.1") == 200
+    assert live(limited_client, "198.51.100.8, 203.0.113.1") == 429
+
+
+def test_batch_parts_count_against_their_endpoint(db, monkeypatch):
+    monkeypatch.setenv("RATE_LIMITS", "health.live=2/minute")
+    monkeypatch.setattr(ratelimit, "_limiter", None)
+    client = create_app().test_client()
+
+    response = client.post("/api/batch", json={"requests": {
+        name: "/api/health/live" for name in ("a", "b", "c")
+    }})
+    parts = response.get_json()
+
+    assert sorted(part["status"] for part in parts.values()) == [200, 200, 429]
+    assert all(part["retry_after"] >= 1 for part in parts.values() if part["status"] == 429)
+    # The direct route shares the buckets the parts emptied
+    assert client.get("/api/health/live").status_code == 429
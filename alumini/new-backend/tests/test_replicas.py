@@ -0,0 +1,107 @@
+"""
+Read routing with SQLite files standing in for a MySQL primary and its
+replicas: each holds a one-row `source` table naming the database.
+"""
+import time
+
+import pytest
+from sqlalchemy import text
+
+from app import models
+from app.models import STICKY_COOKIE, note_write, read_connection
+from conftest import USERS, add_user, bearer, login, run, sqlite_engine
+
+READ_SOURCE = text("SELECT name FROM source")
+
+
+def named(engine, name):
+    run(engine, "CREATE TABLE source (name TEXT)", f"INSERT INTO source VALUES ('{name}')")
+    return engine
+
+
+@pytest.fixture
+def replicas(db, tmp_path):
+    named(db, "primary")
+    models._replicas = [named(sqlite_engine(tmp_path / f"replica{i}.db"), f"replica{i}") for i in range(2)]
+    return models._replicas
+
+
+def read_source(*keys):
+    with read_connection(*keys) as conn:
+        return conn.execute(READ_SOURCE).scalar()
+
+
+def test_reads_rotate_over_replicas(replicas):
+    assert {read_source("stories") for _ in range(4)} == {"replica0", "replica1"}
+
+
+def test_reads_go_to_the_primary_without_replicas(db):
+    named(db, "primary")
+    assert read_source("stories") == "primary"
+
+
+def test_recent_write_sticks_reads_of_that_key_to_the_primary(replicas, monkeypatch):
+    note_write("stories")
+
+    assert read_source("stories") == "primary"
+    assert read_source("messages").startswith("replica")
+
+    monkeypatch.setenv("REPLICA_STICKY_SECONDS", "0")
+    assert read_source("stories").startswith("replica")
+
+
+def test_unreachable_replica_fails_over(replicas, tmp_path):
+    replicas[0] = sqlite_engine(tmp_path / "missing" / "replica.db")
+
+    assert {read_source() for _ in range(4)} == {"replica1"}
+    assert replicas[0] in models._replica_down_until
+
+
+def test_all_replicas_down_falls_back_to_the_primary(replicas):
+    for engine in replicas:
+        models.skip_replica(engine, 60)
+
+    assert read_source() == "primary"
+
+
+def test_write_cookie_is_set_for_the_client(app, replicas):
+    with app.test_request_context():
+        note_write("stories")
+        response = app.process_response(app.response_class())
+
+    assert response.headers["Set-Cookie"].startswith(f"{STICKY_COOKIE}=")
+
+
+def test_write_cookie_sticks_reads_in_another_worker(app, replicas):
+    # Another worker: nothing in its own record of recent writes
+    cookie = f"{STICKY_COOKIE}={time.time():.3f}"
+
+    with app.test_request_context(headers={"Cookie": cookie}):
+        assert read_source("stories") == "primary"
+    with app.test_request_context(headers={"Cookie": f"{STICKY_COOKIE}={time.time() - 60:.3f}"}):
+        assert read_source("stories").startswith("replica")
+
+
+MESSAGES = """CREATE TABLE messages (id INTEGER PRIMARY KEY, sender_id INTEGER, receiver_id INTEGER,
+                                    subject TEXT, content TEXT, is_read BOOLEAN DEFAULT FALSE,
+                                    created_at TIMESTAMP)"""
+
+
+def test_write_cookie_reaches_batch_parts(client, replicas):
+    # The message is on the primary only: the replicas have not caught up
+    for engine in replicas:
+        run(engine, USERS, MESSAGES)
+    run(models._engine, USERS, MESSAGES)
+    user_id = add_user(models._engine, "alice@example.com", "student")
+    run(models._engine, f"INSERT INTO messages (sender_id, receiver_id, subject, content) "
+                        f"VALUES ({user_id}, {user_id}, 'Note', 'Just sent')")
+    headers = bearer(login(client, "alice@example.com")["access_token"])
+
+    def batch_messages():
+        response = client.post("/api/batch", json={"requests": {"messages": "/api/messages/"}}, headers=headers)
+        return response.get_json()["messages"]["body"]
+
+    assert batch_messages() == []
+    # As set by a write this client made on another worker
+    client.set_cookie(STICKY_COOKIE, f"{time.time():.3f}")
+    assert [message["subject"] for message in batch_messages()] == ["Note"]
@@ -0,0 +1,26 @@
+from conftest import USERS, add_user, bearer, login, run
+
+SCHOLARSHIPS = """
+    CREATE TABLE scholarships (
+        id INTEGER PRIMARY KEY, title TEXT, description TEXT, amount REAL, deadline DATE,
+        requirements TEXT, min_cgpa REAL, reservation_category TEXT, lateral_entry_allowed BOOLEAN,
+        eligible_years TEXT, eligible_majors TEXT, other_criteria TEXT, posted_by INTEGER,
+        is_active BOOLEAN DEFAULT TRUE, created_at TIMESTAMP, updated_at TIMESTAMP
+    )
+"""
+
+
+def test_scholarship_detail_for_each_role(db, client):
+    run(db, USERS, SCHOLARSHIPS)
+    poster = add_user(db, "alumnus@example.com", "alumni")
+    add_user(db, "student@example.com", "student")
+    run(db, f"INSERT INTO scholarships (id, title, posted_by) VALUES (1, 'Merit', {poster})")
+
+    alumnus = client.get("/api/scholarships/1", headers=bearer(login(client, "alumnus@example.com")["access_token"]))
+    assert alumnus.status_code == 200
+    assert alumnus.get_json()["posted_by_name"] == "alumnus"
+    assert "is_eligible" not in alumnus.get_json()
+
+    student = client.get("/api/scholarships/1", headers=bearer(login(client, "student@example.com")["access_token"]))
+    assert student.status_code == 200
+    assert "is_eligible" in student.get_json()
@@ -0,0 +1,13 @@
+from app.sketches import TopK
+
+
+def test_stored_and_local_mentor_counts_merge():
+    stored = TopK()
+    stored.add(5, 10)
+    stored.add(7, 4)
+    local = TopK()
+    local.add(5, 3)
+
+    merged = TopK.from_bytes(stored.to_bytes()).merge(local)
+
+    assert merged.top(5) == [("5", 13), ("7", 4)]
@@ -8,6 +8,7 @@ from app import create_app  # noqa: E402
 app = create_app()
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=5000, debug=True)
+    # The debug reloader builds the app twice (watcher and server process); FLASK_DEBUG=0 skips it
+    app.run(host="0.0.0.0", port=5000, debug=os.getenv("FLASK_DEBUG", "1") == "1")
 
 
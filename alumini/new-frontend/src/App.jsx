@@ -9,6 +9,8 @@ import Admin from './pages/Admin'
 import AdminStudents from './pages/AdminStudents'
 import AdminAlumni from './pages/AdminAlumni'
 import Login from './pages/Login'
+import apiUrl from './utils/api'
+import { REFRESH_INTERVAL_MS, refreshSession } from './utils/session'
 
 function Sidebar() {
   const location = useLocation()
@@ -55,7 +57,16 @@ function Sidebar() {
 function Header() {
   const user = JSON.parse(localStorage.getItem('user') || '{}')
 
-  const handleLogout = () => {
+  const handleLogout = async () => {
+    // Revoke the token server-side; log out locally even if that fails
+    try {
+      await fetch(apiUrl('/api/auth/logout'), {
+        method: 'POST',
+        headers: { 'Authorization': `Bearer ${localStorage.getItem('token')}` }
+      })
+    } catch (err) {
+      console.error('Logout failed:', err)
+    }
     localStorage.clear()
     window.location.reload()
   }
@@ -105,6 +116,22 @@ function ProtectedRoute({ children, allowedRoles }) {
 }
 
 function ProtectedApp() {
+  // Keep the access token fresh; back to the login page once the session ends
+  useEffect(() => {
+    const refresh = () => refreshSession()
+      .then(active => {
+        if (!active) {
+          localStorage.clear()
+          window.location.reload()
+        }
+      })
+      .catch(err => console.error('Session refresh failed:', err))
+
+    refresh()
+    const timer = setInterval(refresh, REFRESH_INTERVAL_MS)
+    return () => clearInterval(timer)
+  }, [])
+
   return (
     <div className="main-layout">
       <Sidebar />
@@ -1,4 +1,6 @@
 import { useState, useEffect } from 'react'
+import { waitForJob } from '../utils/jobs'
+import { fromColumnar } from '../utils/columnar'
 
 export default function Admin() {
   const [users, setUsers] = useState([])
@@ -15,7 +17,7 @@ export default function Admin() {
   const fetchUsers = async () => {
     try {
       const token = localStorage.getItem('token')
-      const response = await fetch('/api/admin/users', {
+      const response = await fetch('/api/admin/users?format=columnar', {
         headers: {
           'Authorization': `Bearer ${token}`
         }
@@ -26,7 +28,7 @@ export default function Admin() {
       }
 
       const data = await response.json()
-      setUsers(data)
+      setUsers(fromColumnar(data))
       setLoading(false)
     } catch (err) {
       setError(err.message)
@@ -72,7 +74,8 @@ export default function Admin() {
         throw new Error(errorData.error || 'Failed to kick user')
       }
 
-      const result = await response.json()
+      const { job_id } = await response.json()
+      const result = await waitForJob(job_id, token)
       alert(`✅ ${result.message}\n\nDeleted:\n- Stories: ${result.deleted.stories}\n- Opportunities: ${result.deleted.opportunities}\n- Scholarships: ${result.deleted.scholarships}\n- Mentorship Requests: ${result.deleted.mentorship_requests}\n- Messages: ${result.deleted.messages}\n- Applications: ${result.deleted.applications}`)
       
       // Refresh the user list
@@ -1,4 +1,6 @@
 import { useState, useEffect } from 'react'
+import { waitForJob } from '../utils/jobs'
+import { fromColumnar } from '../utils/columnar'
 
 export default function AdminAlumni() {
   const [alumni, setAlumni] = useState([])
@@ -13,7 +15,7 @@ export default function AdminAlumni() {
   const fetchAlumni = async () => {
     try {
       const token = localStorage.getItem('token')
-      const response = await fetch('/api/admin/alumni', {
+      const response = await fetch('/api/admin/alumni?format=columnar', {
         headers: {
           'Authorization': `Bearer ${token}`
         }
@@ -25,7 +27,7 @@ export default function AdminAlumni() {
       }
 
       const data = await response.json()
-      setAlumni(data)
+      setAlumni(fromColumnar(data))
       setLoading(false)
     } catch (err) {
       console.error('Fetch alumni error:', err)
@@ -54,7 +56,8 @@ export default function AdminAlumni() {
         throw new Error(errorData.error || 'Failed to kick alumni')
       }
 
-      const result = await response.json()
+      const { job_id } = await response.json()
+      const result = await waitForJob(job_id, token)
       alert(`✅ ${result.message}\n\nDeleted:\n- Stories: ${result.deleted.stories}\n- Opportunities: ${result.deleted.opportunities}\n- Scholarships: ${result.deleted.scholarships}\n- Mentorship Requests: ${result.deleted.mentorship_requests}\n- Messages: ${result.deleted.messages}`)
       
       // Refresh the alumni list
@@ -1,4 +1,6 @@
 import { useState, useEffect } from 'react'
+import { waitForJob } from '../utils/jobs'
+import { fromColumnar } from '../utils/columnar'
 
 export default function AdminStudents() {
   const [students, setStudents] = useState([])
@@ -13,7 +15,7 @@ export default function AdminStudents() {
   const fetchStudents = async () => {
     try {
       const token = localStorage.getItem('token')
-      const response = await fetch('/api/admin/students', {
+      const response = await fetch('/api/admin/students?format=columnar', {
         headers: {
           'Authorization': `Bearer ${token}`
         }
@@ -25,7 +27,7 @@ export default function AdminStudents() {
       }
 
       const data = await response.json()
-      setStudents(data)
+      setStudents(fromColumnar(data))
       setLoading(false)
     } catch (err) {
       console.error('Fetch students error:', err)
@@ -54,7 +56,8 @@ export default function AdminStudents() {
         throw new Error(errorData.error || 'Failed to kick student')
       }
 
-      const result = await response.json()
+      const { job_id } = await response.json()
+      const result = await waitForJob(job_id, token)
       alert(`✅ ${result.message}\n\nDeleted:\n- Stories: ${result.deleted.stories}\n- Mentorship Requests: ${result.deleted.mentorship_requests}\n- Messages: ${result.deleted.messages}\n- Applications: ${result.deleted.applications}`)
       
       // Refresh the student list
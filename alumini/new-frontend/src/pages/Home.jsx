@@ -8,22 +8,29 @@ export default function Home() {
   const user = JSON.parse(localStorage.getItem('user') || '{}')
 
   useEffect(() => {
-    // Check backend health
-    fetch('/api/health').then(async (r) => {
-      const j = await r.json().catch(() => ({}))
-      setStatus(r.ok ? `ok (db: ${j.db || 'ok'})` : 'degraded')
-    }).catch(() => setStatus('offline'))
-
-    // Load dashboard data
-    Promise.all([
-      fetch('/api/opportunities').then(r => r.json()).catch(() => []),
-      fetch('/api/stories').then(r => r.json()).catch(() => [])
-    ]).then(([opportunities, stories]) => {
-      setRecentOpportunities(opportunities.slice(0, 3))
-      setRecentStories(stories.slice(0, 3))
+    // Check backend health and load dashboard data in one round-trip
+    fetch('/api/batch', {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({
+        requests: {
+          health: '/api/health',
+          feed: '/api/feed/?limit=3'
+        }
+      })
+    }).then(r => r.json()).then(({ health, feed }) => {
+      const ok = health.status === 200
+      setStatus(ok ? `ok (db: ${health.body.db || 'ok'})` : 'degraded')
+      return feed.status === 200 ? feed.body : { opportunities: [], stories: [], counts: null }
+    }).catch(() => {
+      setStatus('offline')
+      return { opportunities: [], stories: [], counts: null }
+    }).then(({ opportunities, stories, counts }) => {
+      setRecentOpportunities(opportunities)
+      setRecentStories(stories)
       setStats({
-        opportunities: opportunities.length,
-        stories: stories.length
+        opportunities: counts ? counts.opportunities : opportunities.length,
+        stories: counts ? counts.stories : stories.length
       })
     })
   }, [])
@@ -102,10 +109,10 @@ export default function Home() {
                         {opp.title}
                       </h4>
                       <p style={{ margin: '0 0 4px 0', fontSize: '14px', color: '#666' }}>
-                        {opp.company}
+                        {opp.subtitle}
                       </p>
-                      <span className={`badge badge-${opp.type === 'internship' ? 'info' : 'primary'}`}>
-                        {opp.type}
+                      <span className={`badge badge-${opp.tag === 'internship' ? 'info' : 'primary'}`}>
+                        {opp.tag}
                       </span>
                     </div>
                     <div style={{ textAlign: 'right' }}>
@@ -148,7 +155,7 @@ export default function Home() {
                     By {story.author_name}
                   </p>
                   <p style={{ margin: '0 0 8px 0', fontSize: '13px', color: '#888', lineHeight: '1.4' }}>
-                    {story.content?.substring(0, 120)}...
+                    {story.summary?.substring(0, 120)}...
                   </p>
                   <div style={{ fontSize: '12px', color: '#666' }}>
                     {new Date(story.created_at).toLocaleDateString()}
@@ -63,6 +63,8 @@ export default function Login({ onLoginSuccess }) {
       }
 
       localStorage.setItem('token', data.access_token);
+      localStorage.setItem('refresh_token', data.refresh_token);
+      localStorage.setItem('refreshed_at', String(Date.now()));
       localStorage.setItem('user', JSON.stringify(data.user));
       
       if (onLoginSuccess) {
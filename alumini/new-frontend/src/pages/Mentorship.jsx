@@ -1,8 +1,14 @@
 import { useEffect, useState } from 'react'
 import apiUrl from '../utils/api'
+import { applyChanges, changesPath, loadCached, syncList } from '../utils/sync'
+
+const MENTORSHIP_PATH = '/api/mentorship/'
+
+// Same order as GET /api/mentorship/
+const requestOrder = (a, b) => (b.created_at || '').localeCompare(a.created_at || '')
 
 export default function Mentorship() {
-  const [requests, setRequests] = useState([])
+  const [requests, setRequests] = useState(() => loadCached(MENTORSHIP_PATH).rows)
   const [alumni, setAlumni] = useState([])
   const [loading, setLoading] = useState(true)
   const [showRequestForm, setShowRequestForm] = useState(false)
@@ -13,11 +19,24 @@ export default function Mentorship() {
   })
   const user = JSON.parse(localStorage.getItem('user') || '{}')
 
+  const authHeaders = () => ({ 'Authorization': `Bearer ${localStorage.getItem('token')}` })
+
   useEffect(() => {
-    Promise.all([
-      fetch(apiUrl('/api/mentorship/')).then(r => r.json()).catch(() => []),
-      fetch(apiUrl('/api/users/alumni')).then(r => r.json()).catch(() => [])
-    ]).then(([mentorshipRequests, alumniList]) => {
+    fetch(apiUrl('/api/batch'), {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json', ...authHeaders() },
+      body: JSON.stringify({
+        requests: {
+          mentorships: changesPath(MENTORSHIP_PATH, loadCached(MENTORSHIP_PATH).since),
+          alumni: '/api/users/alumni'
+        }
+      })
+    }).then(r => r.json()).then(({ mentorships, alumni }) => [
+      mentorships.status === 200
+        ? applyChanges(MENTORSHIP_PATH, mentorships.body, requestOrder)
+        : loadCached(MENTORSHIP_PATH).rows,
+      alumni.status === 200 ? alumni.body : []
+    ]).catch(() => [[], []]).then(([mentorshipRequests, alumniList]) => {
       setRequests(mentorshipRequests)
       setAlumni(alumniList)
       setLoading(false)
@@ -46,11 +65,13 @@ export default function Mentorship() {
         alert('Mentorship request submitted successfully!')
         setShowRequestForm(false)
         setNewRequest({ mentor_id: '', subject: '', message: '' })
-        // Refresh requests
-        fetch(apiUrl('/api/mentorship/')).then(r => r.json()).then(setRequests)
+        syncList(MENTORSHIP_PATH, requestOrder, authHeaders()).then(setRequests).catch(() => {})
       } else {
         const error = await response.json()
-        alert('Error: ' + (error.error || 'Failed to submit request'))
+        // A full mentor's 409 suggests alumni who still have free slots
+        const suggestions = (error.suggestions || []).map(mentor => mentor.name).join(', ')
+        alert('Error: ' + (error.error || 'Failed to submit request') +
+          (suggestions ? `\n\nMentors with free slots: ${suggestions}` : ''))
       }
     } catch (err) {
       alert('Error submitting request: ' + err.message)
@@ -60,7 +81,7 @@ export default function Mentorship() {
   const handleStatusUpdate = async (requestId, status) => {
     try {
       const token = localStorage.getItem('token')
-      const response = await fetch(`/api/mentorship/${requestId}/status`, {
+      const response = await fetch(apiUrl(`/api/mentorship/${requestId}/status`), {
         method: 'PUT',
         headers: {
           'Content-Type': 'application/json',
@@ -71,8 +92,7 @@ export default function Mentorship() {
 
       if (response.ok) {
         alert(`Request ${status} successfully!`)
-        // Refresh requests
-        fetch(apiUrl('/api/mentorship/')).then(r => r.json()).then(setRequests)
+        syncList(MENTORSHIP_PATH, requestOrder, authHeaders()).then(setRequests).catch(() => {})
       } else {
         const error = await response.json()
         alert('Error: ' + (error.error || 'Failed to update request'))
@@ -131,11 +151,14 @@ export default function Mentorship() {
                   required
                 >
                   <option value="">Choose a mentor...</option>
-                  {alumni.map(alumnus => (
-                    <option key={alumnus.id} value={alumnus.id}>
-                      {alumnus.name} - {alumnus.position} at {alumnus.company}
-                    </option>
-                  ))}
+                  {alumni.map(alumnus => {
+                    const full = alumnus.mentor_open_requests >= alumnus.mentor_capacity
+                    return (
+                      <option key={alumnus.id} value={alumnus.id} disabled={full}>
+                        {alumnus.name} - {alumnus.position} at {alumnus.company}{full ? ' (no free slots)' : ''}
+                      </option>
+                    )
+                  })}
                 </select>
               </div>
 
@@ -200,6 +223,9 @@ export default function Mentorship() {
                   <div style={{ fontSize: '12px', color: '#666' }}>
                     Graduated: {mentor.graduation_year} | Major: {mentor.major}
                   </div>
+                  <div style={{ fontSize: '12px', color: '#666', marginTop: '4px' }}>
+                    Mentees: {mentor.mentor_open_requests} / {mentor.mentor_capacity}
+                  </div>
                 </div>
               ))}
             </div>
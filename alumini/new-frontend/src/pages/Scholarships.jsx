@@ -428,6 +428,8 @@ function ApplyModal({ scholarship, onClose, onSuccess }) {
   const [uploading, setUploading] = useState(false);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState('');
+  // One key per modal: resubmits (double clicks, retries) replay the first application
+  const [idempotencyKey] = useState(() => crypto.randomUUID());
 
   const handleFileChange = (e) => {
     const files = Array.from(e.target.files);
@@ -447,7 +449,8 @@ function ApplyModal({ scholarship, onClose, onSuccess }) {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
-          'Authorization': `Bearer ${localStorage.getItem('token')}`
+          'Authorization': `Bearer ${localStorage.getItem('token')}`,
+          'Idempotency-Key': idempotencyKey
         },
         body: JSON.stringify({
           cover_letter: coverLetter,
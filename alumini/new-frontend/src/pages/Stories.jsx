@@ -1,9 +1,16 @@
 import { useEffect, useState } from 'react'
 import apiUrl from '../utils/api'
+import { loadCached, syncList } from '../utils/sync'
+
+const STORIES_PATH = '/api/stories'
+
+// Same order as GET /api/stories
+const storyOrder = (a, b) =>
+  (b.is_featured - a.is_featured) || (b.created_at || '').localeCompare(a.created_at || '')
 
 export default function Stories() {
-  const [stories, setStories] = useState([])
-  const [loading, setLoading] = useState(true)
+  const [stories, setStories] = useState(() => loadCached(STORIES_PATH).rows)
+  const [loading, setLoading] = useState(() => loadCached(STORIES_PATH).since === null)
   const [showStoryForm, setShowStoryForm] = useState(false)
   const [newStory, setNewStory] = useState({
     title: '',
@@ -12,12 +19,15 @@ export default function Stories() {
   })
   const user = JSON.parse(localStorage.getItem('user') || '{}')
 
-  useEffect(() => {
-    fetch(apiUrl('/api/stories'))
-      .then(r => r.json())
+  // Show the cached stories straight away, then fetch only what changed
+  const refreshStories = () =>
+    syncList(STORIES_PATH, storyOrder)
       .then(setStories)
-      .catch(() => setStories([]))
+      .catch(() => {})
       .finally(() => setLoading(false))
+
+  useEffect(() => {
+    refreshStories()
   }, [])
 
   const handleSubmitStory = async (e) => {
@@ -42,8 +52,7 @@ export default function Stories() {
         alert('Success story shared successfully!')
         setShowStoryForm(false)
         setNewStory({ title: '', content: '', category: 'career' })
-        // Refresh stories
-        fetch(apiUrl('/api/stories')).then(r => r.json()).then(setStories)
+        refreshStories()
       } else {
         const error = await response.json()
         alert('Error: ' + (error.error || 'Failed to share story'))
@@ -0,0 +1,23 @@
+// Decode a ?format=columnar response ({columns, values}) back into an array
+// of row objects. Dotted column names ("stats.stories") become nested objects.
+export const fromColumnar = ({ columns, values }) => {
+  const rowCount = values.length ? values[0].length : 0
+  const paths = columns.map(column => column.split('.'))
+  const rows = new Array(rowCount)
+
+  for (let i = 0; i < rowCount; i++) {
+    const row = {}
+    for (let c = 0; c < paths.length; c++) {
+      const path = paths[c]
+      let target = row
+      for (let p = 0; p < path.length - 1; p++) {
+        target = target[path[p]] || (target[path[p]] = {})
+      }
+      target[path[path.length - 1]] = values[c][i]
+    }
+    rows[i] = row
+  }
+  return rows
+}
+
+export default fromColumnar
@@ -0,0 +1,23 @@
+// Poll a background job (see /api/admin/jobs/:id) until it finishes
+export const waitForJob = async (jobId, token, intervalMs = 1000) => {
+  for (;;) {
+    const response = await fetch(`/api/admin/jobs/${jobId}`, {
+      headers: {
+        'Authorization': `Bearer ${token}`
+      }
+    })
+
+    if (!response.ok) {
+      const errorData = await response.json().catch(() => ({}))
+      throw new Error(errorData.error || `Failed to fetch job (${response.status})`)
+    }
+
+    const job = await response.json()
+    if (job.status === 'succeeded') return job.result
+    if (job.status === 'failed') throw new Error(job.error || 'Job failed')
+
+    await new Promise(resolve => setTimeout(resolve, intervalMs))
+  }
+}
+
+export default waitForJob
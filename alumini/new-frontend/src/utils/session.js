@@ -0,0 +1,37 @@
+import apiUrl from './api'
+
+// Access tokens expire after JWT_ACCESS_TOKEN_EXPIRES (15 minutes by
+// default); renew them well before that with the refresh token.
+export const REFRESH_INTERVAL_MS = 10 * 60 * 1000
+
+// Each refresh token works once (see POST /api/auth/refresh), so tabs
+// sharing localStorage skip a refresh another tab has just made.
+const RECENTLY_REFRESHED_MS = 60 * 1000
+
+// Trade the stored refresh token for a new pair. Resolves to false when the
+// session is over (revoked or expired) and the user has to log in again.
+export const refreshSession = async () => {
+  const refreshToken = localStorage.getItem('refresh_token')
+  if (!refreshToken) return false
+
+  const refreshedAt = Number(localStorage.getItem('refreshed_at') || 0)
+  if (Date.now() - refreshedAt < RECENTLY_REFRESHED_MS) return true
+  localStorage.setItem('refreshed_at', String(Date.now()))
+
+  const response = await fetch(apiUrl('/api/auth/refresh'), {
+    method: 'POST',
+    headers: {
+      'Authorization': `Bearer ${refreshToken}`
+    }
+  })
+  if (response.status === 401 || response.status === 422) return false
+  if (!response.ok) throw new Error(`Failed to refresh session (${response.status})`)
+
+  const data = await response.json()
+  localStorage.setItem('token', data.access_token)
+  localStorage.setItem('refresh_token', data.refresh_token)
+  localStorage.setItem('user', JSON.stringify(data.user))
+  return true
+}
+
+export default refreshSession
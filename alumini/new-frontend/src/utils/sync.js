@@ -0,0 +1,52 @@
+import apiUrl from './api'
+
+// Client-side cache of a list endpoint, kept current with its /changes feed
+// (GET <path>/changes?since=<watermark>, see new-backend/app/changes.py).
+// The rows and the watermark live in localStorage under
+// `sync:<user id>:<path>`, since some feeds only show the caller's rows.
+const storageKey = path => {
+  const user = JSON.parse(localStorage.getItem('user') || '{}')
+  return `sync:${user.id ?? 'anonymous'}:${path}`
+}
+
+export const changesPath = (path, since) =>
+  `${path.replace(/\/$/, '')}/changes${since ? `?since=${encodeURIComponent(since)}` : ''}`
+
+export const loadCached = path => {
+  try {
+    return JSON.parse(localStorage.getItem(storageKey(path))) || { rows: [], since: null }
+  } catch {
+    return { rows: [], since: null }
+  }
+}
+
+// Merge a /changes response into the cached rows and store the result.
+// `order` sorts the merged rows the way the list endpoint does.
+export const applyChanges = (path, delta, order) => {
+  const cached = loadCached(path)
+  const byId = new Map(delta.full ? [] : cached.rows.map(row => [row.id, row]))
+  for (const id of delta.deleted) byId.delete(id)
+  for (const row of delta.changes) byId.set(row.id, row)
+
+  const rows = [...byId.values()]
+  if (order) rows.sort(order)
+  const next = { rows, since: delta.since || cached.since }
+  try {
+    localStorage.setItem(storageKey(path), JSON.stringify(next))
+  } catch {
+    // Storage full: the rows are still returned, the next visit syncs in full
+  }
+  return rows
+}
+
+// Fetch what changed since the cached watermark and return the merged rows
+export const syncList = async (path, order, headers = {}) => {
+  const { since } = loadCached(path)
+  const response = await fetch(apiUrl(changesPath(path, since)), { headers })
+  if (!response.ok) {
+    throw new Error(`Failed to sync ${path} (${response.status})`)
+  }
+  return applyChanges(path, await response.json(), order)
+}
+
+export default syncList
@@ -13,6 +13,8 @@ export default defineConfig({
         changeOrigin: true,
         secure: false,
         ws: true,
+        // Pass the browser's address on (X-Forwarded-For) for per-client rate limits
+        xfwd: true,
       },
     },
   },